@@ -0,0 +1,137 @@
+"""Benchmark of the role icon lookup on a large synthetic guild.
+
+Builds a guild with ``--members`` members, ``--roles`` roles and
+``--icons`` configured role icons and measures how fast the icon list of
+every member is computed:
+
+* ``naive``  – the original algorithm: collect the member's emojis, sort all
+  configured icons by priority, filter (per member)
+* ``scan``   – sorted icon order precomputed once, filtered per member
+* ``index``  – role → rank index of :class:`RoleIconsSnapshot`, only the
+  member's matching roles are merged
+* ``auto``   – :meth:`RoleIconsSnapshot.emojis_for`, which scans up to
+  ``SCAN_MAX_ICONS`` icons and uses the rank index above
+
+Scan and index are about equal at the default 60 icons (which one wins
+depends on the machine); the index pulls ahead as icons are added and is
+2-3x faster than the scan at 250.
+
+``nicknames`` additionally times the complete nickname computation
+(``compute_nickname``) for all members.  All variants are checked to produce
+identical results.  Output is JSON::
+
+    PYTHONPATH=src python benchmarks/role_icons_bench.py
+    PYTHONPATH=src python benchmarks/role_icons_bench.py --members 50000 --icons 200 --output icons.json
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import platform
+import random
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from types import SimpleNamespace
+from typing import Any, Callable, Mapping
+
+from sentinel.utils.nickname_engine import compute_nickname
+from sentinel.utils.snapshots import RoleIconsSnapshot
+
+EMOJIS = "⚔️ 🛡️ 🏹 🔮 🩹 ⭐ 🔥 ❄️ ⚡ 🌙 ☀️ 🍀 💎 👑 🎯 🎲 🐉 🦅 🐺 🦊".split()
+
+
+def make_guild(members: int, roles: int, icons: int, roles_per_member: int, rng: random.Random) -> tuple[dict[str, Any], list[Any]]:
+    """Return a role icon config and *members* fake members."""
+
+    role_ids = [10**17 + i for i in range(roles)]
+    icon_roles = rng.sample(role_ids, min(icons, roles))
+    cfg = {
+        "role_icon_enabled": True,
+        "role_icons": {
+            str(rid): {"emoji": EMOJIS[i % len(EMOJIS)] + str(i // len(EMOJIS) or ""), "priority": rng.randint(0, 50)}
+            for i, rid in enumerate(icon_roles)
+        },
+    }
+    people = []
+    for i in range(members):
+        held = [SimpleNamespace(id=rid) for rid in rng.sample(role_ids, rng.randint(0, roles_per_member))]
+        people.append(SimpleNamespace(id=i, display_name=f"member{i}", roles=held))
+    return cfg, people
+
+
+def naive_emojis(icons_cfg: Mapping[str, Any], member: Any) -> list[str]:
+    emojis = [icons_cfg[str(role.id)]["emoji"] for role in member.roles if str(role.id) in icons_cfg]
+    if emojis:
+        icons_sorted = [e["emoji"] for e in sorted(icons_cfg.values(), key=lambda e: e.get("priority", 0))]
+        emojis = [e for e in icons_sorted if e in emojis]
+    return emojis
+
+
+def scan_emojis(snap: RoleIconsSnapshot, member: Any) -> list[str]:
+    held = {snap.role_emoji[r.id] for r in member.roles if r.id in snap.role_emoji}
+    return [e for e in snap.emoji_order if e in held] if held else []
+
+
+def run(fn: Callable[[Any], Any], people: list[Any], rounds: int) -> tuple[dict[str, float], list[Any]]:
+    best = float("inf")
+    out: list[Any] = []
+    for _ in range(rounds):
+        start = time.perf_counter()
+        out = [fn(m) for m in people]
+        best = min(best, time.perf_counter() - start)
+    return {
+        "total_ms": round(best * 1000, 1),
+        "per_member_us": round(best / len(people) * 1e6, 3),
+        "members_per_s": round(len(people) / best),
+    }, out
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--members", type=int, default=50_000)
+    parser.add_argument("--roles", type=int, default=300, help="roles in the guild")
+    parser.add_argument("--icons", type=int, default=60, help="roles with an icon")
+    parser.add_argument("--roles-per-member", type=int, default=8, help="upper bound of roles per member")
+    parser.add_argument("--rounds", type=int, default=3, help="repetitions, the best one is reported")
+    parser.add_argument("--seed", type=int, default=1234)
+    parser.add_argument("--output", type=Path, help="write JSON here instead of stdout")
+    args = parser.parse_args(argv)
+
+    rng = random.Random(args.seed)
+    cfg, people = make_guild(args.members, args.roles, args.icons, args.roles_per_member, rng)
+
+    start = time.perf_counter()
+    snap = RoleIconsSnapshot(cfg)
+    build_ms = (time.perf_counter() - start) * 1000
+
+    icons_cfg = cfg["role_icons"]
+    results: dict[str, Any] = {"snapshot_build_ms": round(build_ms, 3)}
+    results["naive"], expected = run(lambda m: naive_emojis(icons_cfg, m), people, args.rounds)
+    results["scan"], scanned = run(lambda m: scan_emojis(snap, m), people, args.rounds)
+    results["index"], indexed = run(lambda m: snap._emojis_by_rank([r.id for r in m.roles]), people, args.rounds)
+    results["auto"], chosen = run(lambda m: snap.emojis_for([r.id for r in m.roles]), people, args.rounds)
+    results["auto"]["strategy"] = "scan" if snap.use_scan else "index"
+    results["nicknames"], _ = run(lambda m: compute_nickname(m, snap), people, args.rounds)
+    results["identical"] = expected == scanned == indexed == chosen
+    results["speedup_vs_naive"] = round(results["naive"]["total_ms"] / results["auto"]["total_ms"], 1)
+
+    report = {
+        "meta": {
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "args": {k: str(v) if isinstance(v, Path) else v for k, v in vars(args).items()},
+        },
+        "results": results,
+    }
+    payload = json.dumps(report, indent=2)
+    if args.output:
+        args.output.write_text(payload + "\n", encoding="utf-8")
+    else:
+        print(payload)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,398 @@
+"""Benchmarks for guild config persistence.
+
+Generates synthetic guild configs for every combination of guild count and
+document size, then measures through the public ``sentinel.utils.storage``
+API:
+
+* cold reads  – in-process cache empty, documents come from the backend
+* warm reads  – ``load_guild_config`` (copy) and ``get_guild_config_view``
+* writes      – synchronous ``save_guild_config``
+* concurrency – many asyncio tasks calling ``update_guild_config``
+* crashes     – a writer process killed at random moments, afterwards every
+  document is checked for corruption (a naive ``open(..., "w")`` writer is
+  measured as reference)
+* codecs      – encoded size, encode and decode time of one document for
+  every available storage codec
+
+Results are printed (or written with ``--output``) as JSON so runs against
+different backends or revisions can be compared::
+
+    PYTHONPATH=src python benchmarks/storage_bench.py --backend json --output json.json
+    PYTHONPATH=src python benchmarks/storage_bench.py --backend sqlite --guilds 1000 --sizes 50
+    PYTHONPATH=src python benchmarks/storage_bench.py --codec msgpack --crash-trials 0
+    PYTHONPATH=src python benchmarks/storage_bench.py --backend journal
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import multiprocessing
+import platform
+import random
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Callable
+
+from sentinel.utils import storage
+from sentinel.utils.storage_backends import JournalBackend, JsonFileBackend, SqliteBackend, StorageBackend
+from sentinel.utils.storage_codecs import CODECS, CodecError, decode, get_codec
+
+MARKER_KEY = "bench_guild_id"
+
+
+# ---------------------------------------------------------------------------
+# Synthetic data
+# ---------------------------------------------------------------------------
+
+
+def make_config(guild_id: int, size_kb: int, rng: random.Random) -> dict[str, Any]:
+    """Return a guild config of roughly *size_kb* KiB (serialised, indent=2).
+
+    The bulk of the document is made of the two keys that grow in real
+    deployments: ``role_icons`` and ``google_sheet.username_mappings``.
+    """
+
+    n_icons = max(2, size_kb // 4)
+    icons = {
+        str(rng.getrandbits(60)): {"emoji": f"<:icon{i}:{rng.getrandbits(60)}>", "priority": i}
+        for i in range(n_icons)
+    }
+    cfg: dict[str, Any] = {
+        MARKER_KEY: guild_id,
+        "role_icon_enabled": True,
+        "name_format": "{username} [{icons}]",
+        "role_icons": icons,
+        "voice_channel_user_creation_enabled": True,
+        "voice_channel_user_creation_config": {
+            str(rng.getrandbits(60)): {"target_category_id": str(rng.getrandbits(60)), "name_pattern": "{username} #{number}"}
+        },
+        "voice_channel_user_creation_autochannels": [rng.getrandbits(60) for _ in range(5)],
+        "google_sheet": {"sheet_id": "bench", "worksheet_name": "Members", "username_mappings": {}},
+    }
+    mappings = cfg["google_sheet"]["username_mappings"]
+    target = size_kb * 1024
+    # Each mapping adds ~50 bytes with indent=2; grow in chunks, re-measure
+    while (size := len(json.dumps(cfg, ensure_ascii=False, indent=2))) < target:
+        for _ in range(max(1, (target - size) // 50)):
+            mappings[str(rng.getrandbits(60))] = f"player_{rng.getrandbits(32):08x}"
+    return cfg
+
+
+# ---------------------------------------------------------------------------
+# Helpers
+# ---------------------------------------------------------------------------
+
+
+class CountingBackend(StorageBackend):
+    """Wraps a backend and counts the calls that reach it."""
+
+    def __init__(self, inner: StorageBackend):
+        self.inner = inner
+        self.name = inner.name
+        self.counts = {"read": 0, "write": 0, "apply": 0}
+
+    def read(self, guild_id: int) -> dict[str, Any]:
+        self.counts["read"] += 1
+        return self.inner.read(guild_id)
+
+    def write(self, guild_id: int, data: dict[str, Any]) -> None:
+        self.counts["write"] += 1
+        self.inner.write(guild_id, data)
+
+    def apply(self, guild_id, deltas, data) -> None:
+        self.counts["apply"] += 1
+        self.inner.apply(guild_id, deltas, data)
+
+    def stamp(self, guild_id: int):
+        return self.inner.stamp(guild_id)
+
+    def guild_ids(self) -> list[int]:
+        return self.inner.guild_ids()
+
+    def close(self) -> None:
+        self.inner.close()
+
+
+BACKENDS: dict[str, Callable[[Path, str], StorageBackend]] = {
+    "json": lambda workdir, codec: JsonFileBackend(workdir / "data", get_codec(codec)),
+    "sqlite": lambda workdir, codec: SqliteBackend(workdir / "sentinel.db"),
+    "journal": lambda workdir, codec: JournalBackend(workdir / "journal"),
+}
+
+
+def summarize(samples_s: list[float]) -> dict[str, float]:
+    """Latency summary in microseconds."""
+
+    if not samples_s:
+        return {}
+    us = sorted(s * 1e6 for s in samples_s)
+
+    def pct(p: float) -> float:
+        return round(us[min(len(us) - 1, int(p * len(us)))], 1)
+
+    return {
+        "n": len(us),
+        "mean_us": round(statistics.fmean(us), 1),
+        "p50_us": pct(0.50),
+        "p95_us": pct(0.95),
+        "p99_us": pct(0.99),
+        "max_us": round(us[-1], 1),
+    }
+
+
+def timed(fn: Callable[[], Any]) -> float:
+    start = time.perf_counter()
+    fn()
+    return time.perf_counter() - start
+
+
+# ---------------------------------------------------------------------------
+# Scenarios
+# ---------------------------------------------------------------------------
+
+
+def bench_reads(gids: list[int], samples: int, rng: random.Random) -> dict[str, Any]:
+    picks = [rng.choice(gids) for _ in range(samples)]
+
+    storage.invalidate_guild_config()
+    cold = [timed(lambda g=g: storage.load_guild_config(g)) for g in dict.fromkeys(picks)]
+    warm = [timed(lambda g=g: storage.load_guild_config(g)) for g in picks]
+    view = [timed(lambda g=g: storage.get_guild_config_view(g)) for g in picks]
+    return {
+        "cold_read": summarize(cold),
+        "warm_read": summarize(warm),
+        "view_read": summarize(view),
+        "cache": storage.cache_stats(),
+    }
+
+
+def bench_writes(gids: list[int], samples: int, rng: random.Random) -> dict[str, Any]:
+    lat = []
+    for i in range(samples):
+        gid = rng.choice(gids)
+        cfg = storage.load_guild_config(gid)
+        cfg["bench_counter"] = i
+        lat.append(timed(lambda: storage.save_guild_config(gid, cfg)))
+    return {"write": summarize(lat)}
+
+
+async def _concurrent(gids: list[int], writers: int, ops: int, hot: int, rng: random.Random) -> dict[str, Any]:
+    hot_gids = rng.sample(gids, min(hot, len(gids)))
+    lat: list[float] = []
+    expected: dict[tuple[int, str], int] = {}
+
+    async def writer(wid: int) -> None:
+        for i in range(ops // writers):
+            gid = rng.choice(hot_gids)
+            start = time.perf_counter()
+            await storage.update_guild_config(gid, storage.set_key(("bench", f"w{wid}"), i))
+            lat.append(time.perf_counter() - start)
+            expected[(gid, f"w{wid}")] = i
+
+    start = time.perf_counter()
+    await asyncio.gather(*(writer(w) for w in range(writers)))
+    queued = time.perf_counter() - start
+    await storage.flush_pending()
+    total = time.perf_counter() - start
+
+    # Every writer's last value must have survived – re-read from the backend
+    storage.invalidate_guild_config()
+    lost = sum(
+        1
+        for (gid, key), value in expected.items()
+        if storage.get_guild_config_view(gid).get("bench", {}).get(key) != value
+    )
+    return {
+        "writers": writers,
+        "ops": len(lat),
+        "hot_guilds": len(hot_gids),
+        "update": summarize(lat),
+        "queued_s": round(queued, 4),
+        "durable_s": round(total, 4),
+        "throughput_ops_s": round(len(lat) / total, 1) if total else 0.0,
+        "lost_updates": lost,
+    }
+
+
+def bench_concurrent(gids: list[int], writers: int, ops: int, hot: int, rng: random.Random) -> dict[str, Any]:
+    backend = storage.get_backend()
+    before = dict(backend.counts) if isinstance(backend, CountingBackend) else None
+    result = asyncio.run(_concurrent(gids, writers, ops, hot, rng))
+    if before is not None:
+        result["backend_calls"] = {k: backend.counts[k] - before[k] for k in before}
+    return result
+
+
+def bench_codecs(doc: dict[str, Any], rounds: int) -> dict[str, Any]:
+    results = {}
+    for name in CODECS:
+        try:
+            codec = get_codec(name)
+        except CodecError as exc:
+            results[name] = {"skipped": str(exc)}
+            continue
+        raw = codec.encode(doc)
+        assert decode(raw) == doc
+        results[name] = {
+            "bytes": len(raw),
+            "encode": summarize([timed(lambda: codec.encode(doc)) for _ in range(rounds)]),
+            "decode": summarize([timed(lambda: decode(raw)) for _ in range(rounds)]),
+        }
+    return results
+
+
+def _crash_writer(kind: str, codec: str, workdir: str, gids: list[int], size_kb: int, naive: bool) -> None:
+    """Child process: rewrite documents forever until killed."""
+
+    rng = random.Random()
+    docs = {gid: make_config(gid, size_kb, rng) for gid in gids}
+    if naive:
+        data_dir = Path(workdir) / "data"
+        while True:
+            for gid, doc in docs.items():
+                doc["bench_counter"] = rng.random()
+                with open(data_dir / f"guild_{gid}.json", "w", encoding="utf-8") as fp:
+                    json.dump(doc, fp, ensure_ascii=False, indent=2)
+    storage.set_backend(BACKENDS[kind](Path(workdir), codec))
+    while True:
+        for gid, doc in docs.items():
+            doc["bench_counter"] = rng.random()
+            storage.save_guild_config(gid, doc)
+
+
+def bench_crashes(
+    kind: str, codec: str, workdir: Path, gids: list[int], size_kb: int, trials: int, naive: bool
+) -> dict[str, Any]:
+    ctx = multiprocessing.get_context("spawn")
+    victims = gids[:8]
+    corrupted = 0
+    for _ in range(trials):
+        proc = ctx.Process(target=_crash_writer, args=(kind, codec, str(workdir), victims, size_kb, naive), daemon=True)
+        proc.start()
+        time.sleep(0.3 + random.random() * 0.3)  # spawn + a few writes
+        proc.kill()
+        proc.join()
+
+        backend = BACKENDS[kind](workdir, codec)
+        try:
+            for gid in victims:
+                # JsonFileBackend returns {} for unparsable files
+                if backend.read(gid).get(MARKER_KEY) != gid:
+                    corrupted += 1
+        finally:
+            backend.close()
+    checked = trials * len(victims)
+    return {
+        "writer": "naive" if naive else f"{kind}:{codec}",
+        "trials": trials,
+        "documents_checked": checked,
+        "corrupted": corrupted,
+        "corruption_rate": round(corrupted / checked, 4) if checked else 0.0,
+    }
+
+
+# ---------------------------------------------------------------------------
+# Driver
+# ---------------------------------------------------------------------------
+
+
+def run_case(args: argparse.Namespace, n_guilds: int, size_kb: int) -> dict[str, Any]:
+    rng = random.Random(args.seed)
+    workdir = Path(tempfile.mkdtemp(prefix="sentinel-bench-"))
+    try:
+        backend = CountingBackend(BACKENDS[args.backend](workdir, args.codec))
+        storage.set_backend(backend)
+
+        gids = [10**17 + i for i in range(n_guilds)]
+        # Documents of one size class share their bulk, only the marker differs
+        template = make_config(0, size_kb, rng)
+        doc_bytes = len(json.dumps(template, ensure_ascii=False, indent=2).encode())
+        start = time.perf_counter()
+        for gid in gids:
+            backend.inner.write(gid, {**template, MARKER_KEY: gid})
+        populate_s = time.perf_counter() - start
+
+        result: dict[str, Any] = {
+            "guilds": n_guilds,
+            "size_kb": size_kb,
+            "doc_bytes": doc_bytes,
+            "populate_s": round(populate_s, 3),
+            "codecs": bench_codecs(template, args.codec_rounds),
+        }
+        result.update(bench_reads(gids, args.samples, rng))
+        result.update(bench_writes(gids, args.samples, rng))
+        result["concurrent"] = bench_concurrent(gids, args.writers, args.ops, args.hot_guilds, rng)
+
+        backend.close()
+
+        if args.crash_trials:
+            crash = [bench_crashes(args.backend, args.codec, workdir, gids, size_kb, args.crash_trials, naive=False)]
+            if args.backend == "json":
+                crash.append(bench_crashes("json", "json", workdir, gids, size_kb, args.crash_trials, naive=True))
+            result["crash"] = crash
+        return result
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+def _int_list(value: str) -> list[int]:
+    return [int(v) for v in value.split(",") if v.strip()]
+
+
+def parse_args(argv: list[str] | None = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--backend", choices=sorted(BACKENDS), default="json")
+    parser.add_argument("--codec", choices=sorted(CODECS), default="json", help="file format of the json backend")
+    parser.add_argument("--guilds", type=_int_list, default=[100, 1000, 5000], help="comma separated guild counts")
+    parser.add_argument("--sizes", type=_int_list, default=[2, 50, 200], help="comma separated document sizes in KiB")
+    parser.add_argument("--max-mb", type=int, default=512, help="skip cases whose data set exceeds this size")
+    parser.add_argument("--samples", type=int, default=500, help="reads/writes measured per case")
+    parser.add_argument("--writers", type=int, default=32, help="concurrent asyncio writers")
+    parser.add_argument("--ops", type=int, default=4000, help="total updates issued by the writers")
+    parser.add_argument("--hot-guilds", type=int, default=50, help="guilds the concurrent writers touch")
+    parser.add_argument("--crash-trials", type=int, default=10, help="killed writer processes per case (0 = skip)")
+    parser.add_argument("--codec-rounds", type=int, default=50, help="encode/decode repetitions per codec")
+    parser.add_argument("--seed", type=int, default=1234)
+    parser.add_argument("--output", type=Path, help="write JSON here instead of stdout")
+    return parser.parse_args(argv)
+
+
+def main(argv: list[str] | None = None) -> None:
+    args = parse_args(argv)
+    results, skipped = [], []
+    for n_guilds in args.guilds:
+        for size_kb in args.sizes:
+            if n_guilds * size_kb > args.max_mb * 1024:
+                skipped.append({"guilds": n_guilds, "size_kb": size_kb})
+                continue
+            print(f"[bench] {args.backend}: {n_guilds} guilds x {size_kb} KiB", file=sys.stderr)
+            results.append(run_case(args, n_guilds, size_kb))
+
+    report = {
+        "meta": {
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "backend": args.backend,
+            "codec": args.codec,
+            "args": {k: str(v) if isinstance(v, Path) else v for k, v in vars(args).items()},
+        },
+        "results": results,
+        "skipped": skipped,
+    }
+    payload = json.dumps(report, indent=2)
+    if args.output:
+        args.output.write_text(payload + "\n", encoding="utf-8")
+    else:
+        print(payload)
+
+
+if __name__ == "__main__":
+    main()
@@ -10,6 +10,7 @@ from discord import Intents
 from discord.ext import commands
 
 from .config import get_settings
+from .utils import storage
 from .web.server import get_app
 
 _log = logging.getLogger(__name__)
@@ -116,4 +117,6 @@ class SentinelBot(commands.Bot):
 
         if self._uvicorn and self._uvicorn.started:
             await self._uvicorn.shutdown()
+        await storage.flush_pending()
+        await storage.close_backend()
         await super().close() 
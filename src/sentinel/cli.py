@@ -1,7 +1,9 @@
+import argparse
 import asyncio
 import logging
 import signal
 import sys
+from pathlib import Path
 
 from .bot import SentinelBot
 from .config import get_settings
@@ -29,9 +31,41 @@ async def _run():
     await bot.start(settings.discord_token)
 
 
-def main() -> None:  # noqa: D401
+def _convert_configs(args: argparse.Namespace) -> int:
+    """Rewrite the per-guild config files in another storage codec."""
+
+    from .utils.storage_backends import DEFAULT_DATA_DIR, convert_documents
+    from .utils.storage_codecs import CodecError, get_codec
+
+    data_dir = Path(args.data_dir) if args.data_dir else DEFAULT_DATA_DIR
+    try:
+        codec = get_codec(args.codec)
+    except CodecError as exc:
+        logging.error("%s", exc)
+        return 1
+    count = convert_documents(data_dir, codec)
+    logging.info("Converted %d guild config file(s) in %s to %s", count, data_dir, codec.name)
+    return 0
+
+
+def _parse_args(argv: list[str] | None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(prog="sentinel", description="Aeternum-Sentinel Discord bot.")
+    sub = parser.add_subparsers(dest="command")
+    sub.add_parser("run", help="start the bot and web server (default)")
+
+    convert = sub.add_parser("convert-configs", help="rewrite guild config files in another format")
+    convert.add_argument("--codec", required=True, help="target format: json, orjson or msgpack")
+    convert.add_argument("--data-dir", help="directory with guild_<id> files (default: ./data)")
+    return parser.parse_args(argv)
+
+
+def main(argv: list[str] | None = None) -> None:  # noqa: D401
     """CLI entry point declared in pyproject.toml."""
 
+    args = _parse_args(argv)
+    if args.command == "convert-configs":
+        sys.exit(_convert_configs(args))
+
     try:
         asyncio.run(_run())
     except KeyboardInterrupt:
@@ -17,6 +17,7 @@ from discord.ext import commands
 from discord.ext import tasks
 
 import sentinel.utils.storage as storage
+from sentinel.utils import config_events, feature_index
 from sentinel.integrations.google_sheets import get_async_gspread_client_manager
 
 _log = logging.getLogger(__name__)
@@ -28,8 +29,18 @@ class GoogleSheetsSync(commands.Cog):
     def __init__(self, bot: commands.Bot):
         self.bot = bot
         self._pending: Set[int] = set()
+        self._subscription = config_events.subscribe(self._on_config_change, key="google_sheet")
         self._sync_loop.start()
 
+    def cog_unload(self):
+        self._subscription.unsubscribe()
+        self._sync_loop.cancel()
+
+    def _on_config_change(self, change: config_events.ConfigChange) -> None:
+        # New sheet/mapping settings → push the member list again on the next run
+        if change.source in ("save", "update"):
+            self._pending.add(change.guild_id)
+
     # ------------------------------------------------------------------
     # Slash-commands
     # ------------------------------------------------------------------
@@ -92,7 +103,8 @@ class GoogleSheetsSync(commands.Cog):
     # --------------------------------------------------------------
 
     async def _schedule_sync(self, guild: discord.Guild):
-        self._pending.add(guild.id)
+        if feature_index.is_enabled(feature_index.GOOGLE_SHEET, guild.id):
+            self._pending.add(guild.id)
 
     @commands.Cog.listener()
     async def on_member_join(self, member: discord.Member):
@@ -11,6 +11,8 @@ from discord import app_commands
 from discord.ext import commands
 
 import sentinel.utils.storage as storage
+from sentinel.utils import config_events, feature_index
+from sentinel.utils.snapshots import IMAGE_ANALYSIS_KEYS, get_snapshot, refresh_snapshot
 from sentinel.integrations.google_sheets import get_async_gspread_client_manager
 
 _log = logging.getLogger(__name__)
@@ -46,8 +48,12 @@ class ImageAnalysis(commands.Cog):
         # Store pending username edits: message_id -> {usernames: List[str], original_message_id: int}
         self._pending_edits: Dict[int, Dict] = {}
 
+        # Recompile the channel/role snapshot whenever the web UI changes it
+        self._subscriptions = [config_events.subscribe(refresh_snapshot, key=key) for key in IMAGE_ANALYSIS_KEYS]
+
     def cog_unload(self):
-        pass
+        for sub in self._subscriptions:
+            sub.unsubscribe()
 
     # ------------------------------------------------------------------
     # Configuration helpers
@@ -962,24 +968,17 @@ class ImageAnalysis(commands.Cog):
         if not guild:
             return
         
-        cfg = storage.load_guild_config(guild.id)
-        if not self._is_enabled(cfg):
+        # Cheap reject for guilds/threads without image analysis
+        if not feature_index.watches(feature_index.IMAGE_ANALYSIS, guild.id, message.channel.parent_id):
             return
         
-        # Check if this thread belongs to one of the configured channels
-        channel_id = self._get_channel_id(cfg)
-        second_channel_id = self._get_second_channel_id(cfg)
-        
-        # Check if thread belongs to either configured channel and determine value
-        if not channel_id and not second_channel_id:
+        snap = get_snapshot(guild.id).image_analysis
+        if not snap.enabled:
             return
         
-        channel_value = 1  # Default value
-        if channel_id and message.channel.parent_id == channel_id:
-            channel_value = self._get_channel_value(cfg)  # First channel value
-        elif second_channel_id and message.channel.parent_id == second_channel_id:
-            channel_value = self._get_second_channel_value(cfg)  # Second channel value
-        else:
+        # Check if this thread belongs to one of the configured channels and determine value
+        channel_value = snap.channel_values.get(message.channel.parent_id)
+        if channel_value is None:
             return  # Thread doesn't belong to any configured channel
         
         # Check if message has attachments
@@ -1448,19 +1447,16 @@ class UsernameEditView(discord.ui.View):
             return
         
         # Load guild configuration
-        cfg = storage.load_guild_config(guild.id)
-        confirmation_roles = self.cog._get_confirmation_roles(cfg)
+        confirmation_roles = get_snapshot(guild.id).image_analysis.confirmation_role_ids
         
         # Check if user has required roles
-        user_roles = [role.id for role in interaction.user.roles]
+        user_roles = {role.id for role in interaction.user.roles}
         
         has_permission = False
         
         # Check specific roles - user needs at least ONE of the configured roles
         if confirmation_roles:
-            # Convert confirmation_roles to integers for comparison
-            confirmation_role_ids = [int(role_id) for role_id in confirmation_roles if str(role_id).isdigit()]
-            has_permission = any(role_id in user_roles for role_id in confirmation_role_ids)
+            has_permission = any(role_id in user_roles for role_id in confirmation_roles)
         else:
             # If no roles configured, allow everyone (default behavior)
             has_permission = True
@@ -1497,19 +1493,16 @@ class UsernameEditView(discord.ui.View):
             return
         
         # Load guild configuration
-        cfg = storage.load_guild_config(guild.id)
-        confirmation_roles = self.cog._get_confirmation_roles(cfg)
+        confirmation_roles = get_snapshot(guild.id).image_analysis.confirmation_role_ids
         
         # Check if user has required roles
-        user_roles = [role.id for role in interaction.user.roles]
+        user_roles = {role.id for role in interaction.user.roles}
         
         has_permission = False
         
         # Check specific roles - user needs at least ONE of the configured roles
         if confirmation_roles:
-            # Convert confirmation_roles to integers for comparison
-            confirmation_role_ids = [int(role_id) for role_id in confirmation_roles if str(role_id).isdigit()]
-            has_permission = any(role_id in user_roles for role_id in confirmation_role_ids)
+            has_permission = any(role_id in user_roles for role_id in confirmation_roles)
         else:
             # If no roles configured, allow everyone (default behavior)
             has_permission = True
@@ -1,69 +1,96 @@
 from __future__ import annotations
 
+import asyncio
 import logging
-from typing import Optional, Dict, Any
+from typing import Any, Dict, Optional
 
 import discord
 from discord.ext import commands
 
-import sentinel.utils.storage as storage
+from sentinel.utils import config_events
+from sentinel.utils.panel_publisher import PanelPublisher
+from sentinel.utils.reaction_index import ReactionRoleIndex
+from sentinel.utils.reaction_reconcile import ReactionReconciler
+from sentinel.utils.role_mutations import RoleMutationBuffer
+from sentinel.utils.snapshots import refresh_snapshot
 
 _log = logging.getLogger(__name__)
 
 
 CONFIG_KEY = "reaction_roles"
+# Seconds role changes of a member are collected before they are applied
+ROLE_MUTATION_WINDOW = 0.75
 
 
 class ReactionRoles(commands.Cog):
     """Assign/remove roles when users react/unreact on a configured message.
 
-    Configuration is stored per guild under the key ``reaction_roles`` and
-    expected to look like this (persisted by the web UI):
+    Configuration is stored per guild under the key ``reaction_roles``; a guild
+    can run any number of panels, each with its own message (persisted by the
+    web UI, see :mod:`sentinel.utils.reaction_panels`):
 
     {
-        "channel_id": "123456789012345678",
-        "message_id": 987654321098765432,  # optional until published
-        "title": "Choose your roles",
-        "description": "Pick the roles that match you.",
-        "items": [
-            {"emoji_id": "111111111111111111", "emoji_name": "myemoji", "emoji_unicode": null, "role_id": "2222", "description": "Some desc"},
-            {"emoji_id": null, "emoji_name": null, "emoji_unicode": "😀", "role_id": "3333", "description": "Other desc"}
-        ]
+        "panels": {
+            "classes": {
+                "channel_id": "123456789012345678",
+                "message_id": 987654321098765432,  # optional until published
+                "title": "Choose your roles",
+                "description": "Pick the roles that match you.",
+                "items": [
+                    {"emoji_id": "111111111111111111", "emoji_name": "myemoji", "emoji_unicode": null, "role_id": "2222", "description": "Some desc"},
+                    {"emoji_id": null, "emoji_name": null, "emoji_unicode": "😀", "role_id": "3333", "description": "Other desc"}
+                ]
+            }
+        }
     }
+
+    Reactions of all panels of all guilds are dispatched through one
+    message-ID index.  The resulting role changes are buffered per member
+    for a moment so rapid clicking costs one REST call instead of one per
+    reaction.  Reactions missed while the bot was offline are reconciled in
+    the background after startup and reconnects.
     """
 
     def __init__(self, bot: commands.Bot):
         self.bot = bot
+        # message ID → emoji → role ID of every panel, see ``on_ready``
+        self.index = ReactionRoleIndex()
+        self.roles = RoleMutationBuffer(window=ROLE_MUTATION_WINDOW)
+        # Background publish jobs started from the web UI
+        self.publisher = PanelPublisher()
+        # Catches up on reactions missed while offline, see ``on_ready``/``on_resumed``
+        self.reconciler = ReactionReconciler(bot, mutations=self.roles)
+        self._subscriptions = [
+            config_events.subscribe(refresh_snapshot, key=CONFIG_KEY),
+            config_events.subscribe(self._on_config_change, key=CONFIG_KEY),
+        ]
+
+    async def cog_unload(self):
+        for sub in self._subscriptions:
+            sub.unsubscribe()
+        self.publisher.cancel_all()
+        self.reconciler.cancel()
+        await self.roles.flush()
+
+    def _on_config_change(self, change: config_events.ConfigChange) -> None:
+        self.index.index_guild(change.guild_id)
+
+    def stats(self) -> Dict[str, Any]:
+        """Indexed panels and role mutation counters (for the debug endpoint)."""
+
+        return {
+            "panels": len(self.index),
+            "mutations": self.roles.stats(),
+            "reconcile": self.reconciler.stats(),
+        }
 
     # ------------------------------------------------------------------
     # Helpers
     # ------------------------------------------------------------------
 
-    @staticmethod
-    def _load_cfg(guild_id: int) -> Optional[Dict[str, Any]]:
-        cfg = storage.load_guild_config(guild_id)
-        rr = cfg.get(CONFIG_KEY)
-        if not isinstance(rr, dict):
-            return None
-        # Basic shape validation
-        if "channel_id" not in rr or "items" not in rr:
-            return None
-        return rr
-
-    @staticmethod
-    def _match_item(payload_emoji: discord.PartialEmoji, items: list[dict[str, Any]]) -> Optional[dict[str, Any]]:
-        # For custom emoji we prefer matching by ID; for unicode by name field (which is the unicode char)
-        if payload_emoji.id:
-            pid = str(payload_emoji.id)
-            for item in items:
-                if item.get("emoji_id") and str(item.get("emoji_id")) == pid:
-                    return item
-        else:
-            name = payload_emoji.name
-            for item in items:
-                if item.get("emoji_unicode") == name:
-                    return item
-        return None
+    def _lookup_role_id(self, message_id: int, payload_emoji: discord.PartialEmoji) -> Optional[int]:
+        # Reactions on any other message are discarded by one dict lookup
+        return self.index.role_for(message_id, payload_emoji.id, payload_emoji.name)
 
     async def _ensure_guild_role(self, guild: discord.Guild, role_id: str | int) -> Optional[discord.Role]:
         try:
@@ -77,6 +104,27 @@ class ReactionRoles(commands.Cog):
     # Raw reaction events
     # ------------------------------------------------------------------
 
+    @commands.Cog.listener()
+    async def on_ready(self):
+        # Reads every guild config, so not on the event loop
+        await asyncio.to_thread(self.index.index_guilds, [guild.id for guild in self.bot.guilds])
+        _log.info("Indexed %d reaction-role panels", len(self.index))
+        # Runs in the background, roles of big panels are corrected gradually
+        self.reconciler.start()
+
+    @commands.Cog.listener()
+    async def on_resumed(self):
+        # Reaction events sent while the connection was down are not replayed
+        self.reconciler.start()
+
+    @commands.Cog.listener()
+    async def on_guild_join(self, guild: discord.Guild):
+        self.index.index_guild(guild.id)
+
+    @commands.Cog.listener()
+    async def on_guild_remove(self, guild: discord.Guild):
+        self.index.drop_guild(guild.id)
+
     @commands.Cog.listener()
     async def on_raw_reaction_add(self, payload: discord.RawReactionActionEvent):
         # Ignore own reactions and DMs
@@ -85,23 +133,15 @@ class ReactionRoles(commands.Cog):
         if payload.guild_id is None:
             return
 
-        rr_cfg = self._load_cfg(payload.guild_id)
-        if not rr_cfg:
-            return
-
-        # Only handle reactions on the configured message
-        if int(rr_cfg.get("message_id") or 0) != payload.message_id:
+        role_id = self._lookup_role_id(payload.message_id, payload.emoji)
+        if role_id is None:
             return
 
         guild = self.bot.get_guild(payload.guild_id)
         if not guild:
             return
 
-        item = self._match_item(payload.emoji, rr_cfg.get("items", []))
-        if not item:
-            return
-
-        role = await self._ensure_guild_role(guild, item.get("role_id"))
+        role = await self._ensure_guild_role(guild, role_id)
         if not role:
             return
 
@@ -119,13 +159,7 @@ class ReactionRoles(commands.Cog):
         if member is None or member.bot:
             return
 
-        try:
-            if role not in member.roles:
-                await member.add_roles(role, reason="Reaction role opt-in")
-        except discord.Forbidden:
-            _log.warning("Missing permissions to add role %s in guild %s", role.id, guild.id)
-        except discord.HTTPException as exc:
-            _log.error("Failed to add role via reaction: %s", exc)
+        self.roles.add(member, role, reason="Reaction role opt-in")
 
     @commands.Cog.listener()
     async def on_raw_reaction_remove(self, payload: discord.RawReactionActionEvent):
@@ -133,22 +167,15 @@ class ReactionRoles(commands.Cog):
         if payload.guild_id is None:
             return
 
-        rr_cfg = self._load_cfg(payload.guild_id)
-        if not rr_cfg:
-            return
-
-        if int(rr_cfg.get("message_id") or 0) != payload.message_id:
+        role_id = self._lookup_role_id(payload.message_id, payload.emoji)
+        if role_id is None:
             return
 
         guild = self.bot.get_guild(payload.guild_id)
         if not guild:
             return
 
-        item = self._match_item(payload.emoji, rr_cfg.get("items", []))
-        if not item:
-            return
-
-        role = await self._ensure_guild_role(guild, item.get("role_id"))
+        role = await self._ensure_guild_role(guild, role_id)
         if not role:
             return
 
@@ -156,13 +183,7 @@ class ReactionRoles(commands.Cog):
         if member is None or member.bot:
             return
 
-        try:
-            if role in member.roles:
-                await member.remove_roles(role, reason="Reaction role opt-out")
-        except discord.Forbidden:
-            _log.warning("Missing permissions to remove role %s in guild %s", role.id, guild.id)
-        except discord.HTTPException as exc:
-            _log.error("Failed to remove role via reaction: %s", exc)
+        self.roles.remove(member, role, reason="Reaction role opt-out")
 
 
 async def setup(bot: commands.Bot):  # noqa: D401
@@ -1,139 +1,172 @@
 from __future__ import annotations
 
+import asyncio
 import logging
-from typing import List
+import time
+from collections import Counter, OrderedDict
+from typing import Any, Dict, List, Mapping, Tuple
 import re
 
 import discord
 from discord import app_commands
 from discord.ext import commands
 
-from sentinel.utils.storage import load_guild_config, save_guild_config
+from sentinel.utils.nickname_engine import NicknameEngine, compute_nickname, plan_nicknames
+from sentinel.utils.nicknames import build_regex, format_name
+from sentinel.utils import config_events, feature_index
+from sentinel.utils.snapshots import ROLE_ICONS_KEYS, get_snapshot, refresh_snapshot
 
 _log = logging.getLogger(__name__)
 
 
-ROLE_ICONS_KEY = "role_icons"
-FORMAT_KEY = "name_format"
-DEFAULT_FORMAT = "{username} [{icons}]"
-
-
 class RoleIcons(commands.Cog):
     """Manage role-based icons and update member nicknames accordingly."""
 
+    # Member updates arriving within this many seconds are evaluated once
+    UPDATE_DEBOUNCE_SECONDS = 1.5
+    # Own nickname edits whose gateway echo did not arrive by then are forgotten
+    OWN_EDIT_TTL_SECONDS = 60.0
+
     def __init__(self, bot: commands.Bot):
         self.bot = bot
+        self.nicknames = NicknameEngine(bot, on_edit=self._remember_edit)
+        self._subscriptions = [config_events.subscribe(refresh_snapshot, key=key) for key in ROLE_ICONS_KEYS]
+        # (guild_id, member_id) → pending evaluation / (nickname we just set, expiry), oldest first
+        self._pending: Dict[Tuple[int, int], asyncio.Task] = {}
+        self._own_edits: OrderedDict[Tuple[int, int], Tuple[str, float]] = OrderedDict()
+        self.update_stats: Counter[str] = Counter()
+
+    def cog_unload(self):
+        for sub in self._subscriptions:
+            sub.unsubscribe()
+        self.nicknames.cancel_all()
+        for task in self._pending.values():
+            task.cancel()
 
     # Utility methods -----------------------------------------------------
 
     @staticmethod
-    def _sorted_emojis(icons: List[dict]) -> List[str]:
+    def _sorted_emojis(icons: List[Mapping]) -> List[str]:
         # Sort by priority ascending (lower value = leftmost)
         return [entry["emoji"] for entry in sorted(icons, key=lambda e: e.get("priority", 0))]
 
     def _format_name(self, username: str, emojis: List[str], fmt: str) -> str:
-        """Replace placeholders in *fmt* and tidy up if no *emojis* are present.
-
-        Besides the simple placeholder replacement we perform an additional cleanup
-        step: if *emojis* is empty we remove any left-over punctuation or whitespace
-        which might have surrounded the ``{icons}`` placeholder (e.g. "[ ]", "()",
-        or simple trailing spaces). This prevents artefacts such as an empty pair
-        of brackets ("[]") or a dangling space from remaining in the nickname when
-        the icon list is empty.
-        """
-
-        # First perform the raw replacement.
-        rendered = fmt.replace("{username}", username).replace("{icons}", "".join(emojis))
-
-        # If there are no emojis we may have to strip left-over characters that
-        # were intended to wrap the icons (e.g. " []", " ()", " {}") or superfluous
-        # whitespace. We only run this expensive regex cleanup if *emojis* is empty
-        # because otherwise we want to keep the surrounding delimiters.
-        if not emojis:
-            # 1) Remove common wrapping patterns that ended up empty, optionally
-            #    preceded by whitespace.  Examples that should vanish:
-            #       " []", "()", " \u200B[]" …
-            rendered = re.sub(r"\s*([\[\(\{])\s*[\]\)\}]\s*", "", rendered)
-
-            # 2) Remove dangling separators like '|', '-', ':' etc. that remain
-            #    at the *end* of the nickname once the icons are gone.
-            rendered = re.sub(r"\s*[\|\-–—~•:;>+]+\s*$", "", rendered)
+        """Replace placeholders in *fmt*, see :func:`sentinel.utils.nicknames.format_name`."""
 
-            # 3) Collapse multiple consecutive whitespace characters and trim.
-            rendered = re.sub(r"\s{2,}", " ", rendered).strip()
-
-        return rendered
+        return format_name(username, emojis, fmt)
 
     @staticmethod
     def _build_regex(fmt: str) -> re.Pattern:
-        """Build a regex that extracts the *base* username from an already
-        formatted nickname.
-
-        The resulting pattern always contains a named capturing group ``name`` for
-        the username.  If the supplied *fmt* still contains an ``{icons}``
-        placeholder we replace it with a greedy ``.*``.  If it no longer contains
-        that placeholder (because the guild owner removed it) we nevertheless
-        allow an *optional* trailing icon segment so that we can clean up stale
-        icons that might still be present in old nicknames.
-        """
-
-        has_icons_placeholder = "{icons}" in fmt
+        """Regex extracting the base username, see :func:`sentinel.utils.nicknames.build_regex`."""
 
-        # Use NON-greedy capture when we *expect* an icon segment afterwards, but
-        # greedy capture when the segment is optional – otherwise we would only
-        # grab the first word of multi-part names ("Tim Hubert" → "Tim").
-        name_group = r"(?P<name>.+?)" if has_icons_placeholder else r"(?P<name>.+)"
+        return build_regex(fmt)
 
-        pattern = re.escape(fmt).replace(r"\{username\}", name_group)
+    def plan_update(self, guild: discord.Guild, *, old_format: str | None = None, limit: int | None = None) -> Dict[str, Any]:
+        """Dry run of a bulk update: which nicknames would change, without any API call.
 
-        if has_icons_placeholder:
-            # The format still includes the placeholder ⇒ direct substitution.
-            pattern = pattern.replace(r"\{icons\}", r".*")
-        else:
-            # No placeholder anymore ⇒ treat a trailing icon part as *optional*.
-            # Typical historic patterns have icons at the end, separated by a
-            # space and maybe wrapped in brackets.  We therefore allow either:
-            #   " <anything>"           – space followed by icons
-            #   " [<anything>]"         – space + icons wrapped in []
-            pattern += r"(?:\s*\[.*\]|\s+.*)?"
+        *limit* caps the number of diff entries returned, the counts always
+        cover every member.
+        """
 
-        return re.compile(f"^{pattern}$")
+        start = time.perf_counter()
+        changes, counts = plan_nicknames(guild, old_format=old_format)
+        elapsed_ms = (time.perf_counter() - start) * 1000
+
+        # Rough duration estimate from the throughput of the last finished job
+        last = self.nicknames.get_job(guild.id)
+        rate = last.progress()["edits_per_s"] if last is not None and last.finished_at else 0.0
+
+        return {
+            **counts,
+            "changes": len(changes),
+            "planning_ms": round(elapsed_ms, 2),
+            "estimated_s": round(len(changes) / rate, 1) if rate else None,
+            "diff": [
+                {"member_id": str(c.member.id), "member": str(c.member), "old": c.old, "new": c.new}
+                for c in changes[:limit]
+            ],
+        }
 
     async def _apply_nickname(self, member: discord.Member):
-        cfg = load_guild_config(member.guild.id)
-        if not cfg.get("role_icon_enabled", False):
+        snap = get_snapshot(member.guild.id).role_icons
+        if not snap.enabled:
             return
-        fmt = cfg.get(FORMAT_KEY, DEFAULT_FORMAT)
-        icons_cfg = cfg.get(ROLE_ICONS_KEY, {})
-
-        # Determine emojis for this member based on roles
-        emojis: List[str] = []
-        for role in member.roles:
-            if str(role.id) in icons_cfg:
-                emojis.append(icons_cfg[str(role.id)]["emoji"])
-        # Order them by priority
-        if emojis:
-            icons_sorted = self._sorted_emojis(list(icons_cfg.values()))
-            emojis = [e for e in icons_sorted if e in emojis]
-
-        # Determine base username from current display_name to avoid double application
-        regex = self._build_regex(fmt)
-        match = regex.match(member.display_name)
-        base_username = match.group("name").strip() if match else member.display_name.strip()
-
-        new_nick = self._format_name(base_username, emojis, fmt)
+
+        # Icons ordered by priority, base username parsed from the current
+        # display_name to avoid double application
+        new_nick = compute_nickname(member, snap)
 
         # Only update when necessary to avoid endless re-formatting
         if member.display_name == new_nick:
+            self.update_stats["unchanged"] += 1
             return
 
-        try:    
+        self._remember_edit(member, new_nick)
+        try:
             await member.edit(nick=new_nick, reason='Updating role icons')
+            self.update_stats["edited"] += 1
         except discord.Forbidden:
+            self._own_edits.pop((member.guild.id, member.id), None)
+            self.update_stats["failed"] += 1
             _log.warning("Missing permissions to edit nickname for %s", member)
         except discord.HTTPException as exc:
+            self._own_edits.pop((member.guild.id, member.id), None)
+            self.update_stats["failed"] += 1
             _log.error("Failed to change nickname: %s", exc)
 
+    def _remember_edit(self, member: discord.Member, nick: str) -> None:
+        now = time.monotonic()
+        key = (member.guild.id, member.id)
+        self._own_edits[key] = (nick, now + self.OWN_EDIT_TTL_SECONDS)
+        self._own_edits.move_to_end(key)
+        # Entries expire in insertion order: drop echoes that never came
+        # (failed or coalesced edits, members who left)
+        while self._own_edits:
+            oldest = next(iter(self._own_edits))
+            if self._own_edits[oldest][1] > now:
+                break
+            del self._own_edits[oldest]
+            self.update_stats["echoes_expired"] += 1
+
+    def _is_own_edit(self, member: discord.Member) -> bool:
+        key = (member.guild.id, member.id)
+        entry = self._own_edits.get(key)
+        if entry is None:
+            return False
+        nick, expires_at = entry
+        if nick != member.display_name or expires_at <= time.monotonic():
+            return False
+        del self._own_edits[key]
+        return True
+
+    def _schedule_update(self, member: discord.Member) -> None:
+        """Evaluate *member* once after the debounce window (coalescing bursts)."""
+
+        key = (member.guild.id, member.id)
+        if key in self._pending:
+            self.update_stats["coalesced"] += 1
+            return
+        self._pending[key] = asyncio.create_task(self._debounced_update(key))
+
+    async def _debounced_update(self, key: Tuple[int, int]) -> None:
+        try:
+            await asyncio.sleep(self.UPDATE_DEBOUNCE_SECONDS)
+        finally:
+            self._pending.pop(key, None)
+
+        # Evaluate the member's latest state, not the one from the first event
+        guild = self.bot.get_guild(key[0])
+        member = guild.get_member(key[1]) if guild is not None else None
+        if member is None:
+            return
+        self.update_stats["evaluated"] += 1
+        await self._apply_nickname(member)
+
+    def stats(self) -> Dict[str, Any]:
+        """Counters of the member update listener (for the debug endpoint)."""
+
+        return {**self.update_stats, "pending": len(self._pending), "own_edits": len(self._own_edits)}
+
     # Commands ------------------------------------------------------------
 
     @app_commands.command(name="update_icons", description="Update all member nicknames with role icons.")
@@ -146,34 +179,58 @@ class RoleIcons(commands.Cog):
             await interaction.followup.send(embed=embed_err, ephemeral=True)
             return
 
-        for member in guild.members:
-            await self._apply_nickname(member)
+        job = await self.nicknames.start(guild)
+        status_msg = await interaction.followup.send(
+            embed=discord.Embed(description="⏳ Nicknames werden aktualisiert …", color=discord.Color.blurple()),
+            wait=True,
+        )
+
+        # Report progress every few seconds until the job is finished
+        while job.task is not None and not job.task.done():
+            await asyncio.wait({job.task}, timeout=5)
+            p = job.progress()
+            if p["status"] == "running":
+                embed = discord.Embed(
+                    description=f"⏳ {p['done']}/{p['total']} Nicknames aktualisiert ({p['edits_per_s']}/s) …",
+                    color=discord.Color.blurple(),
+                )
+                try:
+                    await status_msg.edit(embed=embed)
+                except discord.HTTPException:
+                    pass  # interaction token expired, the job keeps running
+
+        p = job.progress()
+        if p["status"] == "done":
+            embed_ok = discord.Embed(
+                description=f"✔️ Alle Nicknames aktualisiert ({p['edited']} geändert, {p['failed']} fehlgeschlagen).",
+                color=discord.Color.green(),
+            )
+        else:
+            embed_ok = discord.Embed(description="⚠️ Aktualisierung abgebrochen.", color=discord.Color.orange())
+        try:
+            await status_msg.edit(embed=embed_ok)
+        except discord.HTTPException:
+            pass
 
-        embed_ok = discord.Embed(description="✔️ Alle Nicknames aktualisiert.", color=discord.Color.green())
-        await interaction.followup.send(embed=embed_ok)
+    @commands.Cog.listener()
+    async def on_ready(self):
+        await self.nicknames.resume_interrupted()
 
     # Listener to auto-update when role added/removed
 
     @commands.Cog.listener()
     async def on_member_update(self, before: discord.Member, after: discord.Member):
-        if before.roles == after.roles and before.display_name == after.display_name:
+        if before.roles == after.roles:
+            if before.display_name == after.display_name:
+                return
+            # Our own nickname edit coming back through the gateway
+            if self._is_own_edit(after):
+                self.update_stats["echoes"] += 1
+                return
+        if not feature_index.is_enabled(feature_index.ROLE_ICONS, after.guild.id):
             return
-        await self._apply_nickname(after)
-
-
-def build_regex(fmt: str) -> re.Pattern:
-    # Keep behaviour in sync with RoleIcons._build_regex
-    has_icons_placeholder = '{icons}' in fmt
-    name_group = r'(?P<name>.+?)' if has_icons_placeholder else r'(?P<name>.+)'
-
-    pattern = re.escape(fmt).replace(r'\{username\}', name_group)
-
-    if has_icons_placeholder:
-        pattern = pattern.replace(r'\{icons\}', r'.*')
-    else:
-        pattern += r'(?:\s*\[.*\]|\s+.*)?'
-
-    return re.compile(f'^{pattern}$')
+        self.update_stats["events"] += 1
+        self._schedule_update(after)
 
 
 async def setup(bot: commands.Bot):
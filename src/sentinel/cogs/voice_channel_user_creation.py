@@ -1,22 +1,49 @@
 from __future__ import annotations
 
+import asyncio
+import functools
 import logging
-from typing import Dict, Optional
+import time
+from collections import Counter, deque
+from typing import Any, Deque, Dict, List, Mapping, NamedTuple, Optional
 import re
 
 import discord
 from discord.ext import commands
 from discord import app_commands
 
-from sentinel.utils.storage import load_guild_config, save_guild_config
+import sentinel.utils.storage as storage
+from sentinel.utils import config_events, feature_index, voice_queue
+from sentinel.utils.channel_numbers import ChannelNumbers
+from sentinel.utils.timers import DeadlineScheduler
 
 _log = logging.getLogger(__name__)
 
 # Config keys and defaults
 VCUC_CONFIG_KEY = "voice_channel_user_creation_config"  # mapping: generator_id -> {target_category_id, name_pattern}
 VCUC_ENABLED_KEY = "voice_channel_user_creation_enabled"
+VCUC_POOL_KEY = "voice_channel_user_creation_pool"  # mapping: generator_id -> list of spare channel IDs
 DEFAULT_NAME_PATTERN = "{username}"
 
+# Pool mode: hidden spare channels waiting to be revealed on join
+POOL_CHANNEL_NAME = "⏳ Reserve"
+MAX_POOL_SIZE = 25
+MAX_GRACE_SECONDS = 3600
+RECONCILE_CONCURRENCY = 4  # guilds swept at the same time
+POOL_REFILL_INTERVAL = 2.0  # seconds between two spare channel creations per guild
+
+
+class _Generator(NamedTuple):
+    """Parsed generator channel entry."""
+
+    category_id: Optional[int]
+    name_pattern: str
+    # Numbering regex, precompiled when the pattern does not depend on the user
+    number_regex: Optional[re.Pattern]
+    pool_size: int = 0
+    # Seconds an empty auto channel is kept before it is deleted
+    grace_seconds: int = 0
+
 
 class VoiceChannelUserCreation(commands.Cog):
     """Erstellt temporäre Voice-Channels, wenn ein Nutzer einen definierten Generator-Channel betritt."""
@@ -24,73 +51,436 @@ class VoiceChannelUserCreation(commands.Cog):
     def __init__(self, bot: commands.Bot):
         self.bot = bot
         self._auto_channels: Dict[int, set[int]] = {}
+        # guild_id → generator channel ID → parsed entry (only enabled guilds)
+        self._generators: Dict[int, Dict[int, _Generator]] = {}
+        self._numbers = ChannelNumbers()
+        self._queue = voice_queue.VoiceOpQueue()
+        # channel ID → pending deletion of an empty auto channel
+        self._deletions = DeadlineScheduler(self._on_grace_expired)
+        # guild_id → generator ID → spare channel IDs (loaded from VCUC_POOL_KEY)
+        self._pools: Dict[int, Dict[int, List[int]]] = {}
+        self._refill_tasks: Dict[int, asyncio.Task] = {}
+        self._pool_stats: Counter[str] = Counter()
+        self._latencies: Dict[str, Deque[float]] = {"lookup": deque(maxlen=500), "join_to_move": deque(maxlen=500)}
+        self._subscriptions = [
+            config_events.subscribe(self._on_config_change, key=self._PERSIST_KEY),
+            config_events.subscribe(self._on_generator_change, key=VCUC_CONFIG_KEY),
+            config_events.subscribe(self._on_generator_change, key=VCUC_ENABLED_KEY),
+        ]
+
+    def cog_unload(self):
+        for sub in self._subscriptions:
+            sub.unsubscribe()
+        for task in self._refill_tasks.values():
+            task.cancel()
+        self._queue.cancel_all()
+        self._deletions.close()
+
+    def _on_config_change(self, change: config_events.ConfigChange) -> None:
+        # Keep the in-memory set in sync with the persisted list (e.g. edits
+        # through the web UI).  The document of local writes is cached already;
+        # after reloads the set is repopulated lazily by ``_auto_channel_ids``.
+        if change.source in ("save", "update"):
+            chan_ids = storage.get_guild_config_view(change.guild_id).get(self._PERSIST_KEY, [])
+            self._auto_channels[change.guild_id] = set(chan_ids)
+        else:
+            self._auto_channels.pop(change.guild_id, None)
+
+    def _on_generator_change(self, change: config_events.ConfigChange) -> None:
+        # Rebuilt lazily on the next voice event of this guild
+        self._generators.pop(change.guild_id, None)
+        # Pool sizes may have changed; without a running loop (changes made
+        # before the bot started) the next voice event picks them up
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            return
+        self._schedule_refill(change.guild_id)
 
     # ------------------------------------------------------------------
     # Helpers
     # ------------------------------------------------------------------
 
     @staticmethod
-    def _is_enabled(cfg: dict) -> bool:
+    def _is_enabled(cfg: Mapping) -> bool:
         return cfg.get(VCUC_ENABLED_KEY, False)
 
     @staticmethod
-    def _generator_map(cfg: dict) -> dict[str, dict]:
+    def _generator_map(cfg: Mapping) -> Mapping[str, Mapping]:
         return cfg.get(VCUC_CONFIG_KEY, {})
 
+    def _guild_generators(self, guild_id: int) -> Dict[int, _Generator]:
+        """Return the parsed generator channels of *guild_id* (empty if disabled)."""
+
+        generators = self._generators.get(guild_id)
+        if generators is None:
+            generators = self._generators[guild_id] = self._parse_generators(guild_id)
+        return generators
+
+    @classmethod
+    def _parse_generators(cls, guild_id: int) -> Dict[int, _Generator]:
+        # No cog state involved, safe to call from a worker thread
+        cfg = storage.get_guild_config_view(guild_id)
+        generators: Dict[int, _Generator] = {}
+        if cls._is_enabled(cfg):
+            for raw_id, entry in cls._generator_map(cfg).items():
+                try:
+                    generator_id = int(raw_id)
+                    raw_cat_id = entry.get("target_category_id")
+                    category_id = int(raw_cat_id) if raw_cat_id is not None else None
+                except (TypeError, ValueError, AttributeError):
+                    _log.warning("Ignoring invalid generator entry %r in guild %s", raw_id, guild_id)
+                    continue
+                name_pattern = entry.get("name_pattern") or entry.get("name_format") or DEFAULT_NAME_PATTERN
+                number_regex = None
+                if "{number}" in name_pattern and "{username}" not in name_pattern:
+                    number_regex = cls._build_number_regex(name_pattern, "")
+                try:
+                    pool_size = max(0, min(int(entry.get("pool_size") or 0), MAX_POOL_SIZE))
+                    grace_seconds = max(0, min(int(entry.get("grace_seconds") or 0), MAX_GRACE_SECONDS))
+                except (TypeError, ValueError):
+                    pool_size = grace_seconds = 0
+                generators[generator_id] = _Generator(category_id, name_pattern, number_regex, pool_size, grace_seconds)
+        return generators
+
+    def _auto_channel_ids(self, guild_id: int) -> set[int]:
+        chan_ids = self._auto_channels.get(guild_id)
+        if chan_ids is None:
+            # Populate from the persisted list once (bot restarts, reloads)
+            persisted = storage.get_guild_config_view(guild_id).get(self._PERSIST_KEY, [])
+            chan_ids = self._auto_channels[guild_id] = set(persisted)
+        return chan_ids
+
     def _register_auto_channel(self, guild_id: int, channel_id: int):
-        self._auto_channels.setdefault(guild_id, set()).add(channel_id)
+        self._auto_channel_ids(guild_id).add(channel_id)
 
     def _is_auto_channel(self, guild_id: int, channel_id: int) -> bool:
-        # Fast-path check in in-memory set first
-        if channel_id in self._auto_channels.get(guild_id, set()):
-            return True
+        return channel_id in self._auto_channel_ids(guild_id)
 
-        # Fallback to on-disk config to support bot restarts
-        cfg = load_guild_config(guild_id)
-        chan_ids = cfg.get(self._PERSIST_KEY, [])
-        if channel_id in chan_ids:
-            # Lazily repopulate in-memory cache for faster future lookups
-            self._register_auto_channel(guild_id, channel_id)
-            return True
-        return False
+    # ------------------------------------------------------------------
+    # Channel pool
+    # ------------------------------------------------------------------
 
-    async def _cleanup_channel_if_empty(self, channel: discord.VoiceChannel):
+    def _guild_pools(self, guild_id: int) -> Dict[int, List[int]]:
+        pools = self._pools.get(guild_id)
+        if pools is None:
+            persisted = storage.get_guild_config_view(guild_id).get(VCUC_POOL_KEY, {})
+            pools = {}
+            for raw_id, chan_ids in persisted.items():
+                try:
+                    pools[int(raw_id)] = [int(c) for c in chan_ids]
+                except (TypeError, ValueError):
+                    continue
+            self._pools[guild_id] = pools
+        return pools
+
+    def _take_spare(self, guild: discord.Guild, generator_id: int, category_id: int) -> Optional[discord.VoiceChannel]:
+        """Pop a spare channel of *generator_id* (synchronously, so joins never share one)."""
+
+        spares = self._guild_pools(guild.id).get(generator_id, [])
+        while spares:
+            channel = guild.get_channel(spares.pop())
+            if isinstance(channel, discord.VoiceChannel) and channel.category_id == category_id:
+                return channel
+        return None
+
+    async def _persist_pool(self, guild_id: int, generator_id: int, *, add: int | None = None, remove: int | None = None) -> None:
+        path = (VCUC_POOL_KEY, str(generator_id))
+        mutations = []
+        if add is not None:
+            mutations.append(storage.add_to_set(path, add))
+        if remove is not None:
+            mutations.append(storage.remove_from_set(path, remove))
+        await storage.update_guild_config(guild_id, *mutations)
+
+    @classmethod
+    def _pool_guild_ids(cls, guild_ids: List[int]) -> List[int]:
+        """Guilds using pool mode or holding spares (runs in a worker thread)."""
+
+        return [
+            guild_id
+            for guild_id in guild_ids
+            if any(g.pool_size for g in cls._parse_generators(guild_id).values())
+            or storage.get_guild_config_view(guild_id).get(VCUC_POOL_KEY)
+        ]
+
+    def _schedule_refill(self, guild_id: int) -> None:
+        task = self._refill_tasks.get(guild_id)
+        if task is None or task.done():
+            task = self._refill_tasks[guild_id] = asyncio.create_task(self._refill_pools(guild_id))
+            task.add_done_callback(functools.partial(self._refill_done, guild_id))
+
+    @staticmethod
+    def _refill_done(guild_id: int, task: asyncio.Task) -> None:
+        if not task.cancelled() and task.exception() is not None:
+            _log.error("Refilling the voice channel pools of guild %s failed", guild_id, exc_info=task.exception())
+
+    async def _refill_pools(self, guild_id: int) -> None:
+        """Bring every pool of the guild to its configured size, one channel at a time."""
+
+        while True:
+            guild = self.bot.get_guild(guild_id)
+            if guild is None:
+                return
+            generators = self._guild_generators(guild_id)
+            pools = self._guild_pools(guild_id)
+
+            # Spares that vanished, are orphaned or exceed the pool size go first
+            surplus = None
+            for gen_id, spares in list(pools.items()):
+                generator = generators.get(gen_id)
+                for chan_id in list(spares):
+                    if chan_id not in spares:
+                        continue  # taken by a join while persisting
+                    channel = guild.get_channel(chan_id)
+                    if not isinstance(channel, discord.VoiceChannel):
+                        spares.remove(chan_id)
+                        await self._persist_pool(guild_id, gen_id, remove=chan_id)
+                    elif generator is None or channel.category_id != generator.category_id:
+                        surplus = (gen_id, channel)
+                if surplus is None and len(spares) > (generator.pool_size if generator else 0):
+                    surplus = (gen_id, guild.get_channel(spares[0]))
+                if surplus is not None:
+                    break
+
+            if surplus is not None:
+                gen_id, channel = surplus
+                spares = pools.get(gen_id, [])
+                if channel is None or channel.id not in spares:
+                    continue  # taken by a join meanwhile, look again
+                spares.remove(channel.id)
+                await self._persist_pool(guild_id, gen_id, remove=channel.id)
+                try:
+                    await self._queue.submit(
+                        guild_id,
+                        voice_queue.DELETE,
+                        lambda: channel.delete(reason="Shrinking auto voice channel pool"),
+                        key=("delete", channel.id),
+                    )
+                    self._pool_stats["dropped"] += 1
+                except discord.HTTPException as exc:
+                    _log.warning("Failed to delete spare voice channel %s: %s", channel.id, exc)
+            else:
+                missing = next(
+                    ((gen_id, gen) for gen_id, gen in generators.items() if len(pools.get(gen_id, ())) < gen.pool_size),
+                    None,
+                )
+                if missing is None:
+                    return
+                if not await self._create_spare(guild, *missing):
+                    return  # retried on the next join
+
+            await asyncio.sleep(POOL_REFILL_INTERVAL)
+
+    async def _create_spare(self, guild: discord.Guild, generator_id: int, generator: _Generator) -> bool:
+        category = guild.get_channel(generator.category_id) if generator.category_id is not None else None
+        if not isinstance(category, discord.CategoryChannel) or guild.me is None:
+            return False
+        overwrites = {
+            guild.default_role: discord.PermissionOverwrite(view_channel=False),
+            guild.me: discord.PermissionOverwrite(view_channel=True, connect=True),
+        }
+        try:
+            channel = await self._queue.submit(
+                guild.id,
+                voice_queue.REFILL,
+                lambda: guild.create_voice_channel(
+                    POOL_CHANNEL_NAME, category=category, overwrites=overwrites, reason="Auto voice channel pool"
+                ),
+            )
+        except discord.HTTPException as exc:
+            _log.warning("Failed to create spare voice channel in guild %s: %s", guild.id, exc)
+            return False
+        self._guild_pools(guild.id).setdefault(generator_id, []).append(channel.id)
+        await self._persist_pool(guild.id, generator_id, add=channel.id)
+        self._pool_stats["created"] += 1
+        return True
+
+    async def _reuse_channel(
+        self,
+        guild: discord.Guild,
+        channel: discord.VoiceChannel,
+        name: str,
+        generator_channel: discord.VoiceChannel,
+        reason: str,
+    ) -> Optional[discord.VoiceChannel]:
+        """Rename *channel* and give it the generator's overwrites, ``None`` on failure."""
+
+        try:
+            edited = await self._queue.submit(
+                guild.id,
+                voice_queue.EDIT,
+                lambda: channel.edit(name=name, overwrites=generator_channel.overwrites, reason=reason),  # type: ignore[arg-type]
+            )
+        except discord.HTTPException as exc:
+            _log.warning("Failed to reuse voice channel %s: %s", channel.id, exc)
+            return None
+        return edited or channel
+
+    def _record_latency(self, kind: str, started: float) -> None:
+        self._latencies[kind].append(time.perf_counter() - started)
+
+    def stats(self) -> Dict[str, Any]:
+        """Latency percentiles of recent voice events (for the debug endpoint)."""
+
+        result: Dict[str, Any] = {
+            "indexed_guilds": len(self._generators),
+            "pool": {**self._pool_stats, "spares": sum(len(c) for p in self._pools.values() for c in p.values())},
+            "queue": self._queue.stats(),
+            "pending_deletions": {
+                "pending": len(self._deletions),
+                "expired": self._deletions.fired,
+                "cancelled": self._deletions.cancelled,
+            },
+        }
+        for kind, samples in self._latencies.items():
+            ms = sorted(s * 1000 for s in samples)
+            if not ms:
+                result[kind] = {"n": 0}
+                continue
+            result[kind] = {
+                "n": len(ms),
+                "p50_ms": round(ms[len(ms) // 2], 3),
+                "p95_ms": round(ms[min(len(ms) - 1, int(len(ms) * 0.95))], 3),
+                "max_ms": round(ms[-1], 3),
+            }
+        return result
+
+    def _grace_for(self, guild_id: int, category_id: Optional[int]) -> int:
+        """Grace period of auto channels in *category_id* (longest of its generators)."""
+
+        return max(
+            (g.grace_seconds for g in self._guild_generators(guild_id).values() if g.category_id == category_id),
+            default=0,
+        )
+
+    def _on_grace_expired(self, channel_id: int, guild_id: int):
+        guild = self.bot.get_guild(guild_id)
+        channel = guild.get_channel(channel_id) if guild is not None else None
+        if isinstance(channel, discord.VoiceChannel):
+            return self._cleanup_channel_if_empty(channel, immediate=True)
+        return None
+
+    async def _cleanup_channel_if_empty(self, channel: discord.VoiceChannel, *, immediate: bool = False):
         if channel.members:
             return
         guild_id = channel.guild.id
         if not self._is_auto_channel(guild_id, channel.id):
             return
+        if not immediate:
+            grace = self._grace_for(guild_id, channel.category_id)
+            if grace:
+                # Deleted once the grace period is over, unless someone rejoins
+                self._deletions.schedule(channel.id, grace, guild_id)
+                return
+
         try:
-            await channel.delete(reason="Cleaning up empty auto voice channel")
-            self._auto_channels[guild_id].discard(channel.id)
-            self._persist_autochannel_remove(guild_id, channel.id)
+            deleted = await self._queue_delete(channel, "Cleaning up empty auto voice channel")
+            if not deleted:
+                return  # still in use or reused for a new channel
+            self._numbers.release_channel(channel.id)
+            self._auto_channels.get(guild_id, set()).discard(channel.id)
+            await self._persist_autochannel_remove(guild_id, channel.id)
         except discord.Forbidden:
             _log.warning("Missing permissions to delete voice channel %s (guild %s)", channel, guild_id)
         except discord.HTTPException as exc:
             _log.error("Failed to delete voice channel %s: %s", channel, exc)
 
+    def _queue_delete(self, channel: discord.VoiceChannel, reason: str) -> asyncio.Future:
+        """Queue deleting *channel*; resolves to ``False`` if it was in use or reused."""
+
+        async def delete_if_still_empty() -> bool:
+            # Someone may have joined while the deletion was queued
+            if channel.members:
+                return False
+            await channel.delete(reason=reason)
+            return True
+
+        return self._queue.submit(
+            channel.guild.id,
+            voice_queue.DELETE,
+            delete_if_still_empty,
+            key=("delete", channel.id),
+            category_id=channel.category_id,
+            payload=channel,
+        )
+
+    async def _reconcile(self, guild: discord.Guild, chan_ids: set[int], reason: str) -> tuple[int, int]:
+        """Delete empty auto channels of *guild* and forget vanished ones.
+
+        Returns ``(deleted, dropped)``.  The persisted list is updated with a
+        single write.
+        """
+
+        vanished: set[int] = set()
+        empty: list[discord.VoiceChannel] = []
+        for chan_id in chan_ids:
+            channel = guild.get_channel(chan_id)
+            if not isinstance(channel, discord.VoiceChannel):
+                vanished.add(chan_id)
+            elif not channel.members:
+                self._deletions.cancel(chan_id)
+                empty.append(channel)
+
+        # All deletions are queued at once; the guild's queue paces them
+        results = await asyncio.gather(*(self._queue_delete(c, reason) for c in empty), return_exceptions=True)
+        deleted: set[int] = set()
+        for channel, result in zip(empty, results):
+            if result is True:
+                deleted.add(channel.id)
+            elif isinstance(result, discord.Forbidden):
+                _log.warning("Missing permissions to delete voice channel %s (guild %s)", channel, guild.id)
+            elif isinstance(result, BaseException):
+                _log.error("Failed to delete voice channel %s: %s", channel, result)
+
+        removed = deleted | vanished
+        if removed:
+            known = self._auto_channel_ids(guild.id)
+            for chan_id in removed:
+                self._numbers.release_channel(chan_id)
+                known.discard(chan_id)
+            await storage.update_guild_config(
+                guild.id, *(storage.remove_from_set(self._PERSIST_KEY, chan_id) for chan_id in removed)
+            )
+        return len(deleted), len(vanished)
+
+    async def _reconcile_all(self) -> None:
+        """Startup sweep: clean up auto channels left over from before the restart."""
+
+        await storage.flush_now()
+        persisted = await asyncio.to_thread(storage.get_backend().auto_channels)
+        semaphore = asyncio.Semaphore(RECONCILE_CONCURRENCY)
+
+        async def sweep(guild: discord.Guild, chan_ids: set[int]) -> None:
+            async with semaphore:
+                try:
+                    deleted, dropped = await self._reconcile(guild, chan_ids, "Cleaning up empty auto voice channel")
+                except Exception:
+                    _log.exception("Auto voice channel reconciliation failed for guild %s", guild.id)
+                    return
+                if deleted or dropped:
+                    _log.info("Guild %s: deleted %d empty and forgot %d vanished auto channels", guild.id, deleted, dropped)
+
+        sweeps = []
+        for guild in self.bot.guilds:
+            chan_ids = persisted.get(guild.id, set()) | self._auto_channels.get(guild.id, set())
+            if chan_ids:
+                sweeps.append(sweep(guild, chan_ids))
+        await asyncio.gather(*sweeps)
+
     # ------------------------------------------------------------------
     # Persistent storage helpers
     # ------------------------------------------------------------------
 
     _PERSIST_KEY = "voice_channel_user_creation_autochannels"  # list[int]
 
-    def _persist_autochannel_add(self, guild_id: int, chan_id: int) -> None:
+    async def _persist_autochannel_add(self, guild_id: int, chan_id: int) -> None:
         """Store a newly created auto-channel in the on-disk guild config."""
-        data = load_guild_config(guild_id)
-        ids = set(data.get(self._PERSIST_KEY, []))
-        ids.add(chan_id)
-        data[self._PERSIST_KEY] = list(ids)
-        save_guild_config(guild_id, data)
+        await storage.update_guild_config(guild_id, storage.add_to_set(self._PERSIST_KEY, chan_id))
 
-    def _persist_autochannel_remove(self, guild_id: int, chan_id: int) -> None:
+    async def _persist_autochannel_remove(self, guild_id: int, chan_id: int) -> None:
         """Remove an auto-channel from the on-disk guild config (if present)."""
-        data = load_guild_config(guild_id)
-        if self._PERSIST_KEY in data:
-            ids = set(data[self._PERSIST_KEY])
-            ids.discard(chan_id)
-            data[self._PERSIST_KEY] = list(ids)
-            save_guild_config(guild_id, data)
+        await storage.update_guild_config(guild_id, storage.remove_from_set(self._PERSIST_KEY, chan_id))
 
     # ------------------------------------------------------------------
     # Listener
@@ -107,22 +497,29 @@ class VoiceChannelUserCreation(commands.Cog):
         if before.channel == after.channel:
             return
 
-        guild = member.guild
-        cfg = load_guild_config(guild.id)
-        if not self._is_enabled(cfg):
+        # Only joins of generator channels and leaves of auto-channels matter
+        if not feature_index.watches(
+            feature_index.VOICE_CHANNELS,
+            member.guild.id,
+            after.channel.id if after.channel else None,
+            before.channel.id if before.channel else None,
+        ):
             return
 
-        generator_map = self._generator_map(cfg)
-        if not after.channel or str(after.channel.id) not in generator_map:
+        started = time.perf_counter()
+        guild = member.guild
+        if after.channel is not None:
+            # Rejoined an empty auto channel within its grace period
+            self._deletions.cancel(after.channel.id)
+        generator = self._guild_generators(guild.id).get(after.channel.id) if after.channel else None
+        self._record_latency("lookup", started)
+        if generator is None:
             # Might still need to clean up previous channel
             if before.channel and isinstance(before.channel, discord.VoiceChannel):
                 await self._cleanup_channel_if_empty(before.channel)
             return
 
-        entry = generator_map[str(after.channel.id)]
-        raw_cat_id = entry.get("target_category_id")
-        category_id: Optional[int] = int(raw_cat_id) if raw_cat_id is not None else None
-        name_pattern: str = entry.get("name_pattern") or entry.get("name_format") or DEFAULT_NAME_PATTERN
+        category_id, name_pattern, number_regex = generator.category_id, generator.name_pattern, generator.number_regex
 
         if category_id is None:
             _log.warning("Generator channel %s configured without target category", after.channel.id)
@@ -130,7 +527,7 @@ class VoiceChannelUserCreation(commands.Cog):
 
         category = guild.get_channel(category_id)  # type: ignore[arg-type]
         if category is None or not isinstance(category, discord.CategoryChannel):
-            _log.warning("Configured target category %s not found in guild %s", raw_cat_id, guild.id)
+            _log.warning("Configured target category %s not found in guild %s", category_id, guild.id)
             return
 
         # ------------------------------------------------------------------
@@ -166,31 +563,84 @@ class VoiceChannelUserCreation(commands.Cog):
         # Resolve placeholders in pattern
         chan_name = name_pattern.replace("{username}", member.display_name)
 
+        number = None
         if "{number}" in chan_name:
-            number = self._next_channel_number(name_pattern, category, member.display_name)
+            if number_regex is None:
+                number_regex = self._build_number_regex(name_pattern, member.display_name)
+            # Reserved right away, concurrent joins get distinct numbers
+            number = self._numbers.allocate(
+                category.id, number_regex, ((c.id, c.name) for c in category.voice_channels)
+            )
             chan_name = chan_name.replace("{number}", str(number))
 
-        try:
-            # Copy permission overwrites from the generator channel so that the
-            # newly created channel inherits the same access rules.
-            new_channel = await guild.create_voice_channel(
-                chan_name,
-                category=category,
-                overwrites=after.channel.overwrites if after.channel else None,  # type: ignore[arg-type]
-                reason="Auto voice channel creation",
+        new_channel: Optional[discord.VoiceChannel] = None
+        if generator.pool_size:
+            # Pool hit: rename and reveal a spare (one request instead of a create)
+            spare = self._take_spare(guild, after.channel.id, category.id)
+            if spare is not None:
+                await self._persist_pool(guild.id, after.channel.id, remove=spare.id)
+                new_channel = await self._reuse_channel(guild, spare, chan_name, after.channel, "Auto voice channel creation (pool)")
+                if new_channel is not None:
+                    self._pool_stats["hits"] += 1
+                else:
+                    self._queue.submit(
+                        guild.id, voice_queue.DELETE, lambda: spare.delete(reason="Broken spare voice channel")
+                    ).add_done_callback(lambda f: f.cancelled() or f.exception())
+            if new_channel is None:
+                self._pool_stats["misses"] += 1
+            self._schedule_refill(guild.id)
+
+        if new_channel is None:
+            # An empty auto channel of this category waiting for deletion is
+            # renamed instead (one edit instead of delete + create)
+            pending = self._queue.steal(
+                guild.id,
+                voice_queue.DELETE,
+                lambda op: op.category_id == category.id and op.payload is not None and not op.payload.members,
             )
-        except discord.Forbidden:
-            _log.warning("Missing permissions to create voice channel in guild %s", guild.id)
-            return
-        except discord.HTTPException as exc:
-            _log.error("Failed to create voice channel: %s", exc)
-            return
-
+            if pending is not None:
+                reused = pending.payload
+                new_channel = await self._reuse_channel(guild, reused, chan_name, after.channel, "Reusing empty auto voice channel")
+                if new_channel is not None:
+                    self._numbers.release_channel(reused.id)
+                else:
+                    asyncio.create_task(self._cleanup_channel_if_empty(reused))
+
+        if new_channel is None:
+            try:
+                # Copy permission overwrites from the generator channel so that the
+                # newly created channel inherits the same access rules.
+                new_channel = await self._queue.submit(
+                    guild.id,
+                    voice_queue.CREATE,
+                    lambda: guild.create_voice_channel(
+                        chan_name,
+                        category=category,
+                        overwrites=after.channel.overwrites if after.channel else None,  # type: ignore[arg-type]
+                        reason="Auto voice channel creation",
+                    ),
+                )
+            except discord.Forbidden:
+                _log.warning("Missing permissions to create voice channel in guild %s", guild.id)
+                if number is not None:
+                    self._numbers.release(category.id, number_regex, number)
+                return
+            except discord.HTTPException as exc:
+                _log.error("Failed to create voice channel: %s", exc)
+                if number is not None:
+                    self._numbers.release(category.id, number_regex, number)
+                return
+
+        if number is not None:
+            self._numbers.assign(new_channel.id, category.id, number_regex, number)
         self._register_auto_channel(guild.id, new_channel.id)
-        self._persist_autochannel_add(guild.id, new_channel.id)
+        await self._persist_autochannel_add(guild.id, new_channel.id)
 
         try:
-            await member.move_to(new_channel, reason="Moving to auto voice channel")
+            await self._queue.submit(
+                guild.id, voice_queue.MOVE, lambda: member.move_to(new_channel, reason="Moving to auto voice channel")
+            )
+            self._record_latency("join_to_move", started)
         except discord.Forbidden:
             _log.warning("Missing permissions to move member in guild %s", guild.id)
         except discord.HTTPException as exc:
@@ -200,6 +650,44 @@ class VoiceChannelUserCreation(commands.Cog):
         if before.channel and isinstance(before.channel, discord.VoiceChannel):
             await self._cleanup_channel_if_empty(before.channel)
 
+    @commands.Cog.listener()
+    async def on_ready(self):
+        # Fill (or drain) pools of all guilds that use pool mode; every guild
+        # config is read for this, so not on the event loop
+        guild_ids = [guild.id for guild in self.bot.guilds]
+        for guild_id in await asyncio.to_thread(self._pool_guild_ids, guild_ids):
+            self._schedule_refill(guild_id)
+        await self._reconcile_all()
+
+    @commands.Cog.listener()
+    async def on_guild_channel_create(self, channel: discord.abc.GuildChannel):
+        # Channels created by others (or by hand) take their number as well
+        if isinstance(channel, discord.VoiceChannel):
+            self._numbers.track(channel.id, channel.category_id, channel.name)
+
+    @commands.Cog.listener()
+    async def on_guild_channel_update(self, before: discord.abc.GuildChannel, after: discord.abc.GuildChannel):
+        # A rename or move frees the old number and may take a new one
+        if isinstance(after, discord.VoiceChannel) and (
+            before.name != after.name or before.category_id != after.category_id
+        ):
+            self._numbers.track(after.id, after.category_id, after.name)
+
+    @commands.Cog.listener()
+    async def on_guild_channel_delete(self, channel: discord.abc.GuildChannel):
+        # Channels deleted by hand free their number as well
+        if isinstance(channel, discord.CategoryChannel):
+            self._numbers.drop_category(channel.id)
+        else:
+            self._numbers.release_channel(channel.id)
+            self._deletions.cancel(channel.id)
+        for gen_id, spares in self._pools.get(channel.guild.id, {}).items():
+            if channel.id in spares:
+                spares.remove(channel.id)
+                await self._persist_pool(channel.guild.id, gen_id, remove=channel.id)
+                self._schedule_refill(channel.guild.id)
+                break
+
     # ------------------------------------------------------------------
     # Command
     # ------------------------------------------------------------------
@@ -213,51 +701,27 @@ class VoiceChannelUserCreation(commands.Cog):
             await interaction.response.send_message(embed=embed_err, ephemeral=True)
             return
 
-        removed = 0
+        await interaction.response.defer(thinking=True)
         # Combine in-memory and persisted IDs to ensure complete cleanup
-        persisted_ids = set(load_guild_config(guild.id).get(self._PERSIST_KEY, []))
-        candidate_ids = set(self._auto_channels.get(guild.id, set())) | persisted_ids
-
-        for chan_id in list(candidate_ids):
-            channel = guild.get_channel(chan_id)
-            if isinstance(channel, discord.VoiceChannel) and not channel.members:
-                try:
-                    await channel.delete(reason="Manual cleanup via command")
-                    self._auto_channels[guild.id].discard(chan_id)
-                    self._persist_autochannel_remove(guild.id, chan_id)
-                    removed += 1
-                except discord.Forbidden:
-                    pass
+        persisted_ids = set(storage.get_guild_config_view(guild.id).get(self._PERSIST_KEY, []))
+        candidate_ids = set(self._auto_channel_ids(guild.id)) | persisted_ids
+        removed, _ = await self._reconcile(guild, candidate_ids, "Manual cleanup via command")
 
         embed_ok = discord.Embed(description=f"✔️ {removed} channel(s) removed.", color=discord.Color.green())
-        await interaction.response.send_message(embed=embed_ok)
+        await interaction.followup.send(embed=embed_ok)
 
     # ------------------------------------------------------------------
     # Internal numbering helper
     # ------------------------------------------------------------------
 
     @staticmethod
+    @functools.lru_cache(maxsize=1024)
     def _build_number_regex(pattern: str, username_resolved: str) -> re.Pattern:
         escaped = re.escape(pattern)
         escaped = escaped.replace(re.escape("{username}"), re.escape(username_resolved))
         escaped = escaped.replace(re.escape("{number}"), r"(\d+)")
         return re.compile(f"^{escaped}$")
 
-    def _next_channel_number(self, pattern: str, category: discord.CategoryChannel, username_val: str) -> int:
-        regex = self._build_number_regex(pattern, username_val)
-        max_num = 0
-        for channel in category.channels:
-            if not isinstance(channel, discord.VoiceChannel):
-                continue
-            m = regex.match(channel.name)
-            if m and m.groups():
-                try:
-                    num = int(m.group(1))
-                    max_num = max(max_num, num)
-                except ValueError:
-                    continue
-        return max_num + 1 if max_num else 1
-
 
 async def setup(bot: commands.Bot):
     await bot.add_cog(VoiceChannelUserCreation(bot)) 
@@ -39,8 +39,11 @@ class Settings(BaseSettings):
     ssl_certfile: Optional[str] = None  # `SSL_CERTFILE`
     ssl_keyfile: Optional[str] = None  # `SSL_KEYFILE`
 
-    # Database (optional)
+    # Database (optional) – e.g. ``sqlite:///data/sentinel.db``. Unset means
+    # one JSON file per guild under ``data/``.
     database_url: Optional[str] = None  # `DATABASE_URL`
+    # File format of the per-guild documents: json | orjson | msgpack
+    storage_codec: str = "json"  # `STORAGE_CODEC`
 
     # Google Sheets
     google_credentials_path: Optional[str] = None  # `GOOGLE_CREDENTIALS_PATH`
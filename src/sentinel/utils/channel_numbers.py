@@ -0,0 +1,164 @@
+"""Allocation of ``{number}`` values for auto-created channel names.
+
+Every (category, numbering regex) pair gets a :class:`NumberAllocator` that
+knows which numbers are taken.  It is seeded once from the channel names in
+the category and afterwards kept up to date as channels are created and
+deleted (also by others, see :meth:`ChannelNumbers.track`), so a new channel
+gets the lowest free number without scanning the category::
+
+    number = numbers.allocate(category.id, regex, ((c.id, c.name) for c in category.voice_channels))
+    channel = await guild.create_voice_channel(...)
+    numbers.assign(channel.id, category.id, regex, number)
+
+Picking and reserving a number happens without awaiting, so concurrent joins
+handled by the event loop always get distinct numbers.
+"""
+
+from __future__ import annotations
+
+import heapq
+import re
+from typing import Iterable
+
+_Key = tuple[int, str]
+
+
+class NumberAllocator:
+    """Hands out the lowest unused positive number in amortized O(log n)."""
+
+    __slots__ = ("_used", "_free", "_next")
+
+    def __init__(self, used: Iterable[int] = ()):
+        self._used: set[int] = {n for n in used if n > 0}
+        # Every number below _next is used or in _free.  Seeding does not
+        # enumerate gaps, so a channel like "Room 1234567890" costs nothing;
+        # allocate() advances _next past used numbers instead.
+        self._next = 1
+        # Released numbers below _next; entries may be stale, checked on pop
+        self._free: list[int] = []
+
+    def allocate(self) -> int:
+        while self._free:
+            number = heapq.heappop(self._free)
+            if number not in self._used:
+                self._used.add(number)
+                return number
+        while self._next in self._used:
+            self._next += 1
+        number = self._next
+        self._next += 1
+        self._used.add(number)
+        return number
+
+    def reserve(self, number: int) -> bool:
+        """Mark *number* as taken, return ``False`` if it was taken already."""
+
+        if number <= 0 or number in self._used:
+            return False
+        self._used.add(number)
+        return True
+
+    def release(self, number: int) -> None:
+        if number in self._used:
+            self._used.discard(number)
+            if number < self._next:
+                heapq.heappush(self._free, number)
+
+    def __contains__(self, number: int) -> bool:
+        return number in self._used
+
+    def __len__(self) -> int:
+        return len(self._used)
+
+
+def _parse(regex: re.Pattern, name: str) -> int | None:
+    match = regex.match(name)
+    if not match or not match.groups():
+        return None
+    try:
+        return int(match.group(1))
+    except ValueError:
+        return None
+
+
+class ChannelNumbers:
+    """Per-(category, pattern) allocators plus the number each channel holds."""
+
+    def __init__(self) -> None:
+        self._allocators: dict[_Key, NumberAllocator] = {}
+        # category ID → pattern → compiled regex of its seeded allocators
+        self._regexes: dict[int, dict[str, re.Pattern]] = {}
+        self._channels: dict[int, tuple[_Key, int]] = {}
+
+    def _allocator(self, key: _Key, regex: re.Pattern, channels: Iterable[tuple[int, str]]) -> NumberAllocator:
+        allocator = self._allocators.get(key)
+        if allocator is None:
+            used: list[int] = []
+            for channel_id, name in channels:
+                number = _parse(regex, name)
+                if number is not None:
+                    used.append(number)
+                    self._channels[channel_id] = (key, number)
+            allocator = self._allocators[key] = NumberAllocator(used)
+            self._regexes.setdefault(key[0], {})[key[1]] = regex
+        return allocator
+
+    def allocate(self, category_id: int, regex: re.Pattern, channels: Iterable[tuple[int, str]]) -> int:
+        """Reserve the lowest free number in *category_id* for names matching *regex*.
+
+        *channels* – ``(id, name)`` pairs of the category, only iterated the
+        first time this category/pattern is seen (pass a generator).
+        """
+
+        return self._allocator((category_id, regex.pattern), regex, channels).allocate()
+
+    def assign(self, channel_id: int, category_id: int, regex: re.Pattern, number: int) -> None:
+        """Remember that the new channel *channel_id* holds *number*."""
+
+        self._channels[channel_id] = ((category_id, regex.pattern), number)
+
+    def release(self, category_id: int, regex: re.Pattern, number: int) -> None:
+        """Give back a number that was allocated but not used."""
+
+        allocator = self._allocators.get((category_id, regex.pattern))
+        if allocator is not None:
+            allocator.release(number)
+
+    def release_channel(self, channel_id: int) -> None:
+        """Free the number held by a deleted channel (no-op for unknown channels)."""
+
+        held = self._channels.pop(channel_id, None)
+        if held is None:
+            return
+        key, number = held
+        allocator = self._allocators.get(key)
+        if allocator is not None:
+            allocator.release(number)
+
+    def track(self, channel_id: int, category_id: int | None, name: str) -> None:
+        """Update the number of a channel created or renamed by someone else.
+
+        The number the channel held so far is freed.  If *name* matches a
+        pattern already seeded for *category_id* and the number is still free,
+        the channel takes it, otherwise it holds none.  Categories not seeded
+        yet read the name when they are.
+        """
+
+        self.release_channel(channel_id)
+        if category_id is None:
+            return
+        for pattern, regex in self._regexes.get(category_id, {}).items():
+            number = _parse(regex, name)
+            key = (category_id, pattern)
+            if number is not None and self._allocators[key].reserve(number):
+                self._channels[channel_id] = (key, number)
+                return
+
+    def drop_category(self, category_id: int) -> None:
+        """Forget everything about *category_id* (re-seeded on next use)."""
+
+        self._regexes.pop(category_id, None)
+        for key in [k for k in self._allocators if k[0] == category_id]:
+            del self._allocators[key]
+        for channel_id in [c for c, (k, _) in self._channels.items() if k[0] == category_id]:
+            del self._channels[channel_id]
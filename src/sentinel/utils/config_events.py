@@ -0,0 +1,190 @@
+"""In-process notifications about guild config changes.
+
+The storage layer publishes a :class:`ConfigChange` after every write (and
+whenever it notices that a document was changed behind its back), so cogs can
+keep derived state in memory and refresh it only when the config actually
+changes::
+
+    sub = config_events.subscribe(self._on_change, key="role_icons")
+    ...
+    sub.unsubscribe()
+
+Subscriptions are scoped to a guild, a top-level config key, both or neither.
+Callbacks run on the event loop: changes published on it are delivered
+synchronously, changes noticed in a storage worker thread (e.g. a reload
+after an external edit) are handed over with ``call_soon_threadsafe``.  They
+must be cheap and must not block – schedule real work elsewhere.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import threading
+import time
+from collections import Counter, deque
+from typing import Any, Callable, FrozenSet, NamedTuple, Optional
+
+_log = logging.getLogger(__name__)
+
+
+class ConfigChange(NamedTuple):
+    """A change to the config of one guild."""
+
+    guild_id: int
+    version: int
+    # Changed top-level keys, ``None`` if unknown (treat as "everything").
+    keys: Optional[FrozenSet[str]]
+    source: str  # "save" | "update" | "reload" | "invalidate"
+
+    def touches(self, *keys: str) -> bool:
+        """Return whether any of *keys* may have changed."""
+        return self.keys is None or not self.keys.isdisjoint(keys)
+
+
+Callback = Callable[[ConfigChange], Any]
+
+# Topic = (guild_id or None, key or None); (None, None) receives everything.
+_Topic = tuple[Optional[int], Optional[str]]
+
+
+class Subscription:
+    """Handle returned by :func:`subscribe`."""
+
+    __slots__ = ("callback", "topic", "active")
+
+    def __init__(self, callback: Callback, topic: _Topic):
+        self.callback = callback
+        self.topic = topic
+        self.active = True
+
+    def unsubscribe(self) -> None:
+        _unsubscribe(self)
+
+
+_lock = threading.Lock()
+_subscribers: dict[_Topic, list[Subscription]] = {}
+# Loop callbacks are delivered on, remembered from subscribe()/publish() calls made on it
+_loop: Optional[asyncio.AbstractEventLoop] = None
+
+
+def _running_loop() -> Optional[asyncio.AbstractEventLoop]:
+    global _loop
+    try:
+        loop = asyncio.get_running_loop()
+    except RuntimeError:
+        return None
+    _loop = loop
+    return loop
+
+# Statistics ---------------------------------------------------------------
+_RATE_WINDOW = 300.0  # seconds of history kept for event rates
+_recent: deque[float] = deque()
+_stats = {"published": 0, "delivered": 0, "errors": 0}
+_by_source: Counter[str] = Counter()
+_by_key: Counter[str] = Counter()
+
+
+def subscribe(callback: Callback, *, guild_id: int | None = None, key: str | None = None) -> Subscription:
+    """Call *callback* for changes of *guild_id* and/or top-level *key*.
+
+    Omitting both subscribes to every change.  Changes with unknown keys are
+    delivered to key subscribers as well.
+    """
+
+    sub = Subscription(callback, (guild_id, key))
+    _running_loop()
+    with _lock:
+        # Copy-on-write so publishing never has to hold the lock
+        _subscribers[sub.topic] = [*_subscribers.get(sub.topic, ()), sub]
+    return sub
+
+
+def _unsubscribe(sub: Subscription) -> None:
+    with _lock:
+        sub.active = False
+        remaining = [s for s in _subscribers.get(sub.topic, ()) if s is not sub]
+        if remaining:
+            _subscribers[sub.topic] = remaining
+        else:
+            _subscribers.pop(sub.topic, None)
+
+
+def _matching(change: ConfigChange) -> list[Subscription]:
+    gid = change.guild_id
+    topics: list[_Topic] = [(None, None), (gid, None)]
+    if change.keys is None:
+        topics.extend(t for t in _subscribers if t[1] is not None and t[0] in (None, gid))
+    else:
+        for key in change.keys:
+            topics.append((None, key))
+            topics.append((gid, key))
+
+    subs: list[Subscription] = []
+    seen: set[int] = set()
+    for topic in topics:
+        for sub in _subscribers.get(topic, ()):
+            if id(sub) not in seen:
+                seen.add(id(sub))
+                subs.append(sub)
+    return subs
+
+
+def publish(change: ConfigChange) -> None:
+    """Deliver *change* to all matching subscribers (called by the storage layer)."""
+
+    now = time.monotonic()
+    with _lock:
+        _stats["published"] += 1
+        _by_source[change.source] += 1
+        if change.keys is not None:
+            _by_key.update(change.keys)
+        _recent.append(now)
+        while _recent and now - _recent[0] > _RATE_WINDOW:
+            _recent.popleft()
+        subs = _matching(change)
+
+    loop = _loop
+    if _running_loop() is None and loop is not None and loop.is_running():
+        # Published from a worker thread: deliver on the event loop
+        loop.call_soon_threadsafe(_deliver, change, subs)
+        return
+    _deliver(change, subs)
+
+
+def _deliver(change: ConfigChange, subs: list[Subscription]) -> None:
+    for sub in subs:
+        if not sub.active:
+            continue
+        try:
+            sub.callback(change)
+        except Exception:
+            _stats["errors"] += 1
+            _log.exception("Config change subscriber %r failed", sub.callback)
+        else:
+            _stats["delivered"] += 1
+
+
+def stats() -> dict[str, Any]:
+    """Return subscriber counts and event rates (for the debug endpoint)."""
+
+    now = time.monotonic()
+    with _lock:
+        subscribers = {"all": 0, "guild": 0, "key": 0, "guild_key": 0}
+        per_key: Counter[str] = Counter()
+        for (gid, key), subs in _subscribers.items():
+            kind = "guild_key" if gid is not None and key is not None else "guild" if gid is not None else "key" if key is not None else "all"
+            subscribers[kind] += len(subs)
+            if key is not None:
+                per_key[key] += len(subs)
+        last_60 = sum(1 for t in _recent if now - t <= 60.0)
+        last_300 = sum(1 for t in _recent if now - t <= _RATE_WINDOW)
+        return {
+            **_stats,
+            "subscribers": subscribers,
+            "subscribers_by_key": dict(per_key),
+            "events_by_source": dict(_by_source),
+            "events_by_key": dict(_by_key.most_common(50)),
+            "rate_per_min_1m": last_60,
+            "rate_per_min_5m": round(last_300 / (_RATE_WINDOW / 60.0), 2),
+        }
@@ -0,0 +1,169 @@
+"""Which guild has which feature enabled – answered without touching storage.
+
+Gateway listeners such as ``on_message`` or ``on_voice_state_update`` fire for
+every guild the bot is in, while most guilds only use a handful of features.
+This index keeps, per guild, the set of enabled features plus the channel and
+thread-parent IDs each feature watches, so irrelevant events can be rejected
+with a dict/set lookup (reaction roles keep their own message index, see
+:mod:`sentinel.utils.reaction_index`)::
+
+    if not feature_index.watches(feature_index.IMAGE_ANALYSIS, guild.id, thread.parent_id):
+        return
+
+Guilds are indexed lazily on their first event and dropped whenever a config
+key the index is built from changes (see :mod:`sentinel.utils.config_events`),
+the next lookup re-indexes them from the cached document.  The auto voice
+channel list changes with every created or deleted channel, so such changes
+only mark those IDs stale; they are re-read on the next lookup.
+"""
+
+from __future__ import annotations
+
+import threading
+from collections import Counter
+from typing import Any, Mapping
+
+import sentinel.utils.storage as storage
+from sentinel.utils import config_events
+from sentinel.utils.snapshots import IMAGE_ANALYSIS_KEYS, ROLE_ICONS_KEYS, get_snapshot, parse_id
+
+ROLE_ICONS = "role_icons"
+IMAGE_ANALYSIS = "image_analysis"
+VOICE_CHANNELS = "voice_channel_user_creation"
+GOOGLE_SHEET = "google_sheet"
+
+FEATURES = (ROLE_ICONS, IMAGE_ANALYSIS, VOICE_CHANNELS, GOOGLE_SHEET)
+
+AUTOCHANNELS_KEY = "voice_channel_user_creation_autochannels"
+# Config keys the index is built from (besides AUTOCHANNELS_KEY)
+INDEX_KEYS = frozenset(
+    (
+        *ROLE_ICONS_KEYS,
+        *IMAGE_ANALYSIS_KEYS,
+        "voice_channel_user_creation_enabled",
+        "voice_channel_user_creation_config",
+        "google_sheet",
+    )
+)
+
+
+class _GuildFeatures:
+    __slots__ = ("enabled", "watched", "generators", "autochannels_stale")
+
+    def __init__(self, enabled: frozenset[str], watched: dict[str, frozenset[int]], generators: frozenset[int]):
+        self.enabled = enabled
+        self.watched = watched
+        self.generators = generators
+        self.autochannels_stale = False
+
+
+_guilds: dict[int, _GuildFeatures] = {}
+_counters: dict[str, Counter[str]] = {feature: Counter() for feature in FEATURES}
+_stats_lock = threading.Lock()
+
+
+def _ids(values: Any) -> frozenset[int]:
+    if isinstance(values, Mapping):
+        values = values.keys()
+    elif not isinstance(values, (list, tuple)):
+        return frozenset()
+    return frozenset(i for i in map(parse_id, values) if i is not None)
+
+
+def _build(guild_id: int) -> _GuildFeatures:
+    cfg = storage.get_guild_config_view(guild_id)
+    snap = get_snapshot(guild_id)
+    enabled: set[str] = set()
+    watched: dict[str, frozenset[int]] = {}
+    generators: frozenset[int] = frozenset()
+
+    if snap.role_icons.enabled:
+        enabled.add(ROLE_ICONS)
+
+    if snap.image_analysis.enabled and snap.image_analysis.channel_values:
+        enabled.add(IMAGE_ANALYSIS)
+        watched[IMAGE_ANALYSIS] = frozenset(snap.image_analysis.channel_values)
+
+    if cfg.get("voice_channel_user_creation_enabled", False):
+        enabled.add(VOICE_CHANNELS)
+        # Generator channels users join + auto-created channels users leave
+        generators = _ids(cfg.get("voice_channel_user_creation_config"))
+        watched[VOICE_CHANNELS] = generators | _ids(cfg.get(AUTOCHANNELS_KEY))
+
+    if cfg.get("google_sheet"):
+        enabled.add(GOOGLE_SHEET)
+
+    return _GuildFeatures(frozenset(enabled), watched, generators)
+
+
+def _get(guild_id: int) -> _GuildFeatures:
+    entry = _guilds.get(guild_id)
+    if entry is None:
+        entry = _guilds[guild_id] = _build(guild_id)
+    elif entry.autochannels_stale:
+        autochannels = _ids(storage.get_guild_config_value(guild_id, AUTOCHANNELS_KEY))
+        entry.watched = {**entry.watched, VOICE_CHANNELS: entry.generators | autochannels}
+        entry.autochannels_stale = False
+    return entry
+
+
+def _count(feature: str, passed: bool) -> bool:
+    with _stats_lock:
+        _counters[feature]["passed" if passed else "filtered"] += 1
+    return passed
+
+
+def is_enabled(feature: str, guild_id: int) -> bool:
+    """Return whether *feature* is enabled for *guild_id* (counted in :func:`stats`)."""
+
+    return _count(feature, feature in _get(guild_id).enabled)
+
+
+def watches(feature: str, guild_id: int, *object_ids: int | None) -> bool:
+    """Return whether *feature* is enabled and watches any of *object_ids*.
+
+    *object_ids* are channel or thread-parent IDs depending on the feature;
+    ``None`` values are ignored.
+    """
+
+    entry = _get(guild_id)
+    ids = entry.watched.get(feature)
+    passed = bool(ids) and any(oid in ids for oid in object_ids if oid is not None)
+    return _count(feature, passed)
+
+
+def drop(guild_id: int | None = None) -> None:
+    """Forget the index of *guild_id* (or all guilds), rebuilt on next lookup."""
+
+    if guild_id is None:
+        _guilds.clear()
+    else:
+        _guilds.pop(guild_id, None)
+
+
+def _on_config_change(change: config_events.ConfigChange) -> None:
+    if change.touches(*INDEX_KEYS):
+        drop(change.guild_id)
+    elif change.touches(AUTOCHANNELS_KEY):
+        entry = _guilds.get(change.guild_id)
+        if entry is not None and VOICE_CHANNELS in entry.enabled:
+            entry.autochannels_stale = True
+
+
+_subscription = config_events.subscribe(_on_config_change)
+
+
+def stats() -> dict[str, Any]:
+    """Per-feature counts of events passed to and filtered before cog code."""
+
+    with _stats_lock:
+        features = {}
+        for feature, counter in _counters.items():
+            total = counter["passed"] + counter["filtered"]
+            features[feature] = {
+                "passed": counter["passed"],
+                "filtered": counter["filtered"],
+                "filtered_ratio": round(counter["filtered"] / total, 4) if total else 0.0,
+                "enabled_guilds": sum(1 for g in list(_guilds.values()) if feature in g.enabled),
+            }
+    return {"indexed_guilds": len(_guilds), "features": features}
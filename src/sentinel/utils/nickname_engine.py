@@ -0,0 +1,255 @@
+"""Bulk nickname updates for the role icon feature.
+
+:func:`plan_nicknames` computes the target nickname of every member in one
+pass from a single config snapshot and keeps only those that actually change.
+:class:`NicknameEngine` then sends the remaining edits through a small pool of
+workers, backing off when Discord answers with a rate limit.
+
+Running jobs are checkpointed in the guild config (``role_icons_job``).  The
+plan is derived from the members' current nicknames, so resuming an
+interrupted job after a restart simply plans again and continues with the
+members that still differ.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import re
+import time
+from typing import Any, Callable, Iterable, NamedTuple, Sequence
+
+import discord
+
+import sentinel.utils.storage as storage
+from sentinel.utils.nicknames import build_regex, format_name
+from sentinel.utils.snapshots import RoleIconsSnapshot, get_snapshot
+
+_log = logging.getLogger(__name__)
+
+JOB_KEY = "role_icons_job"
+
+
+class NicknameChange(NamedTuple):
+    member: discord.Member
+    old: str
+    new: str
+
+
+def base_username(display_name: str, regexes: Sequence[re.Pattern]) -> str:
+    """Strip a previously applied format using the first matching regex."""
+
+    for regex in regexes:
+        match = regex.match(display_name)
+        if match:
+            return match.group("name").strip()
+    return display_name.strip()
+
+
+def compute_nickname(member: discord.Member, snap: RoleIconsSnapshot, regexes: Sequence[re.Pattern] = ()) -> str:
+    """Return the nickname *member* should have according to *snap*."""
+
+    emojis = snap.emojis_for(role.id for role in member.roles)
+    base = base_username(member.display_name, regexes or (snap.regex,))
+    return format_name(base, emojis, snap.name_format)
+
+
+def _can_edit(me: discord.Member | None, member: discord.Member) -> bool:
+    if me is None or member.id == member.guild.owner_id:
+        return False
+    if member.id == me.id:
+        return me.guild_permissions.change_nickname
+    return me.guild_permissions.manage_nicknames and me.top_role > member.top_role
+
+
+def plan_nicknames(
+    guild: discord.Guild,
+    members: Iterable[discord.Member] | None = None,
+    *,
+    old_format: str | None = None,
+) -> tuple[list[NicknameChange], dict[str, int]]:
+    """Compute the nickname changes for *members* (default: all).
+
+    With *old_format* names are parsed with the previous format first (used
+    after the format was changed).  Returns the changes plus counters of
+    skipped members; nothing changes while role icons are disabled.
+    """
+
+    snap = get_snapshot(guild.id).role_icons
+    regexes = (build_regex(old_format), snap.regex) if old_format is not None else (snap.regex,)
+    me = guild.me
+    changes: list[NicknameChange] = []
+    counts = {"members": 0, "unchanged": 0, "forbidden": 0}
+    # Format changes are applied even with icons disabled (strips old icons)
+    if not snap.enabled and old_format is None:
+        return changes, counts
+    for member in guild.members if members is None else members:
+        counts["members"] += 1
+        new = compute_nickname(member, snap, regexes)
+        if new == member.display_name:
+            counts["unchanged"] += 1
+        elif not _can_edit(me, member):
+            counts["forbidden"] += 1
+        else:
+            changes.append(NicknameChange(member, member.display_name, new))
+    return changes, counts
+
+
+class NicknameJob:
+    """Progress of one bulk nickname update."""
+
+    def __init__(self, guild_id: int, old_format: str | None, reason: str):
+        self.guild_id = guild_id
+        self.old_format = old_format
+        self.reason = reason
+        self.status = "planning"
+        self.counts: dict[str, int] = {}
+        self.total = 0
+        self.done = 0
+        self.edited = 0
+        self.failed = 0
+        self.rate_limited = 0
+        self.started_at = time.monotonic()
+        self.finished_at: float | None = None
+        self.task: asyncio.Task | None = None
+
+    def progress(self) -> dict[str, Any]:
+        elapsed = (self.finished_at or time.monotonic()) - self.started_at
+        rate = self.done / elapsed if elapsed > 0 else 0.0
+        remaining = self.total - self.done
+        return {
+            "status": self.status,
+            "total": self.total,
+            "done": self.done,
+            "edited": self.edited,
+            "failed": self.failed,
+            "rate_limited": self.rate_limited,
+            **self.counts,
+            "elapsed_s": round(elapsed, 2),
+            "edits_per_s": round(rate, 2),
+            "eta_s": round(remaining / rate, 1) if rate and remaining else None,
+        }
+
+
+class NicknameEngine:
+    """Runs at most one bulk nickname job per guild."""
+
+    def __init__(
+        self,
+        bot: discord.Client,
+        *,
+        workers: int = 4,
+        max_retries: int = 3,
+        on_edit: Callable[[discord.Member, str], Any] | None = None,
+    ):
+        self.bot = bot
+        self.workers = workers
+        self.max_retries = max_retries
+        # Called right before each edit (lets the cog recognise the echo event)
+        self.on_edit = on_edit
+        self.jobs: dict[int, NicknameJob] = {}
+
+    def get_job(self, guild_id: int) -> NicknameJob | None:
+        return self.jobs.get(guild_id)
+
+    async def start(
+        self, guild: discord.Guild, *, old_format: str | None = None, reason: str = "Updating role icons"
+    ) -> NicknameJob:
+        """Start a job for *guild*; a job already running there is restarted."""
+
+        previous = self.jobs.get(guild.id)
+        if previous is not None and previous.task is not None and not previous.task.done():
+            if old_format is None:
+                # Keep the older format of an interrupted format change
+                old_format = previous.old_format
+            previous.task.cancel()
+
+        job = NicknameJob(guild.id, old_format, reason)
+        self.jobs[guild.id] = job
+        await storage.update_guild_config(
+            guild.id, storage.set_key(JOB_KEY, {"status": "running", "old_format": old_format, "reason": reason})
+        )
+        job.task = asyncio.create_task(self._run(guild, job))
+        return job
+
+    async def resume_interrupted(self) -> int:
+        """Restart jobs whose checkpoint says they were still running."""
+
+        resumed = 0
+        for guild in self.bot.guilds:
+            checkpoint = storage.get_guild_config_view(guild.id).get(JOB_KEY)
+            if checkpoint and checkpoint.get("status") == "running" and guild.id not in self.jobs:
+                _log.info("Resuming interrupted nickname update for guild %s", guild.id)
+                await self.start(guild, old_format=checkpoint.get("old_format"), reason=checkpoint.get("reason") or "Updating role icons")
+                resumed += 1
+        return resumed
+
+    def cancel_all(self) -> None:
+        for job in self.jobs.values():
+            if job.task is not None and not job.task.done():
+                job.task.cancel()
+
+    # ------------------------------------------------------------------
+
+    async def _run(self, guild: discord.Guild, job: NicknameJob) -> None:
+        try:
+            changes, job.counts = plan_nicknames(guild, old_format=job.old_format)
+            job.total = len(changes)
+            job.status = "running"
+
+            queue: asyncio.Queue[tuple[NicknameChange, int]] = asyncio.Queue()
+            for change in changes:
+                queue.put_nowait((change, 0))
+            pause = asyncio.Event()
+            pause.set()
+            workers = [asyncio.create_task(self._worker(queue, pause, job)) for _ in range(min(self.workers, len(changes)))]
+            try:
+                await queue.join()
+            finally:
+                for w in workers:
+                    w.cancel()
+            job.status = "done"
+        except asyncio.CancelledError:
+            # Checkpoint stays "running" → resumed on next start
+            job.status = "cancelled"
+            raise
+        except Exception:
+            job.status = "failed"
+            _log.exception("Bulk nickname update failed for guild %s", guild.id)
+        finally:
+            job.finished_at = time.monotonic()
+
+        if self.jobs.get(guild.id) is job:
+            await storage.update_guild_config(guild.id, storage.delete_key(JOB_KEY))
+        _log.info("Nickname update for guild %s finished: %s", guild.id, job.progress())
+
+    async def _worker(self, queue: asyncio.Queue, pause: asyncio.Event, job: NicknameJob) -> None:
+        while True:
+            change, attempt = await queue.get()
+            try:
+                await pause.wait()
+                member, _, new = change
+                if self.on_edit is not None:
+                    self.on_edit(member, new)
+                try:
+                    await member.edit(nick=new, reason=job.reason)
+                    job.edited += 1
+                except discord.HTTPException as exc:
+                    if exc.status == 429 and attempt < self.max_retries:
+                        # discord.py retries internally; if a 429 still surfaces,
+                        # pause every worker of this job for the advertised time.
+                        job.rate_limited += 1
+                        retry_after = float(getattr(exc, "retry_after", 0) or 1.0)
+                        pause.clear()
+                        await asyncio.sleep(retry_after)
+                        pause.set()
+                        queue.put_nowait((change, attempt + 1))
+                        continue
+                    job.failed += 1
+                    if isinstance(exc, discord.Forbidden):
+                        _log.warning("Missing permissions to edit nickname for %s", member)
+                    else:
+                        _log.error("Failed to change nickname of %s: %s", member, exc)
+                job.done += 1
+            finally:
+                queue.task_done()
@@ -0,0 +1,255 @@
+"""Background publishing of reaction-role panels.
+
+Publishing a panel used to clear all reactions and re-add them one by one
+inside the web request, and a message that could not be fetched was searched
+for in every text channel of the guild.  :class:`PanelPublisher` instead runs
+one background job per panel and returns a :class:`PublishJob` handle right
+away::
+
+    job = publisher.start(guild, "classes", panel, channel)
+    job.progress()  # poll until status is "done" or "failed"
+
+The job
+
+* finds the old message through the channel stored with it
+  (``message_channel_id``), deleting it there if the panel moved channels
+* edits the embed in place, and only if it changed
+* diffs the message's reactions against the configured items: reactions of
+  emojis no longer configured are removed concurrently, only missing ones
+  are added (in panel order, so the reactions keep the configured order)
+
+Reactions of members stay on the message, so republishing no longer resets
+everybody's selection.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+from typing import Any, Mapping
+
+import discord
+
+import sentinel.utils.storage as storage
+from sentinel.utils import reaction_panels
+from sentinel.utils.reaction_index import emoji_key
+from sentinel.utils.reaction_panels import REACTION_ROLES_KEY, panel_path
+
+_log = logging.getLogger(__name__)
+
+
+async def update_panel(guild_id: int, *mutations: storage.Mutation) -> None:
+    """Apply panel *mutations*, converting a legacy single-panel config first.
+
+    The conversion runs under the guild lock together with *mutations* and is
+    a no-op for configs already using the panels layout.
+    """
+
+    await storage.update_guild_config(
+        guild_id, storage.transform_key(REACTION_ROLES_KEY, reaction_panels.migration), *mutations
+    )
+
+
+def build_embed(guild: discord.Guild, panel: Mapping[str, Any]) -> discord.Embed:
+    title = panel.get("title") or "Reaction Roles"
+    description = panel.get("description") or "React to get roles."
+    embed = discord.Embed(title=title, description=description, color=discord.Color.blurple())
+    for it in panel.get("items") or []:
+        role_id = it.get("role_id")
+        role = guild.get_role(int(role_id)) if role_id else None
+        # Render role name without raw mention markup to avoid <@&id> text
+        label = f"@{role.name}" if role else f"Role {role_id}"
+        per_item_desc = it.get("description") or ""
+        # Show emoji preview text
+        if it.get("emoji_unicode"):
+            emoji_preview = it["emoji_unicode"]
+        elif it.get("emoji_id"):
+            emoji_preview = f"<:{it.get('emoji_name') or 'emoji'}:{it['emoji_id']}>"
+        else:
+            emoji_preview = ""
+        embed.add_field(name=f"{emoji_preview} {label}", value=per_item_desc or "\u200b", inline=False)
+    return embed
+
+
+def _item_emoji(guild: discord.Guild, item: Mapping[str, Any]) -> tuple[str, Any] | None:
+    """``(emoji key, emoji to react with)`` of a panel item, ``None`` if unusable."""
+
+    if item.get("emoji_unicode"):
+        return item["emoji_unicode"], item["emoji_unicode"]
+    if item.get("emoji_id"):
+        emoji = guild.get_emoji(int(item["emoji_id"]))
+        if emoji is not None:
+            return str(emoji.id), emoji
+    return None
+
+
+class PublishJob:
+    """Progress of publishing one panel."""
+
+    def __init__(self, guild_id: int, panel_id: str):
+        self.guild_id = guild_id
+        self.panel_id = panel_id
+        self.status = "running"
+        self.message_id: int | None = None
+        self.created = False
+        self.edited = False
+        self.added = 0
+        self.removed = 0
+        self.skipped = 0
+        self.error: str | None = None
+        self.started_at = time.monotonic()
+        self.finished_at: float | None = None
+        self.task: asyncio.Task | None = None
+
+    def progress(self) -> dict[str, Any]:
+        elapsed = (self.finished_at or time.monotonic()) - self.started_at
+        return {
+            "status": self.status,
+            "panel_id": self.panel_id,
+            "message_id": str(self.message_id) if self.message_id else None,
+            "created": self.created,
+            "edited": self.edited,
+            "added": self.added,
+            "removed": self.removed,
+            "skipped": self.skipped,
+            "error": self.error,
+            "elapsed_s": round(elapsed, 2),
+        }
+
+
+class PanelPublisher:
+    """Runs at most one publish job per panel."""
+
+    def __init__(self) -> None:
+        self.jobs: dict[tuple[int, str], PublishJob] = {}
+
+    def get_job(self, guild_id: int, panel_id: str) -> PublishJob | None:
+        return self.jobs.get((guild_id, panel_id))
+
+    def start(
+        self, guild: discord.Guild, panel_id: str, panel: Mapping[str, Any], channel: discord.TextChannel
+    ) -> PublishJob:
+        """Publish *panel* to *channel*; a job already running for it is restarted."""
+
+        previous = self.jobs.get((guild.id, panel_id))
+        if previous is not None and previous.task is not None and not previous.task.done():
+            previous.task.cancel()
+
+        job = PublishJob(guild.id, panel_id)
+        self.jobs[(guild.id, panel_id)] = job
+        job.task = asyncio.create_task(self._run(guild, panel, channel, job))
+        return job
+
+    def cancel_all(self) -> None:
+        for job in self.jobs.values():
+            if job.task is not None and not job.task.done():
+                job.task.cancel()
+
+    async def _run(
+        self, guild: discord.Guild, panel: Mapping[str, Any], channel: discord.TextChannel, job: PublishJob
+    ) -> None:
+        try:
+            message = await self._upsert_message(guild, panel, channel, job)
+            await self._sync_reactions(guild, panel, message, job)
+            job.status = "done"
+        except asyncio.CancelledError:
+            job.status = "cancelled"
+            raise
+        except discord.HTTPException as exc:
+            job.status = "failed"
+            job.error = str(exc)
+            _log.warning("Publishing reaction-role panel %s of guild %s failed: %s", job.panel_id, guild.id, exc)
+        except Exception as exc:  # pragma: no cover - reported through the job
+            job.status = "failed"
+            job.error = str(exc)
+            _log.exception("Publishing reaction-role panel %s of guild %s failed", job.panel_id, guild.id)
+        finally:
+            job.finished_at = time.monotonic()
+
+    async def _upsert_message(
+        self, guild: discord.Guild, panel: Mapping[str, Any], channel: discord.TextChannel, job: PublishJob
+    ) -> discord.Message:
+        embed = build_embed(guild, panel)
+        old_id = panel.get("message_id")
+        # Panels published before the message channel was stored live in channel_id
+        old_channel_id = panel.get("message_channel_id") or panel.get("channel_id")
+        if not old_channel_id:
+            # Without a channel the old message can't be found: post a new one
+            old_id = None
+
+        message: discord.Message | None = None
+        if old_id and int(old_channel_id) == channel.id:
+            try:
+                message = await channel.fetch_message(int(old_id))
+            except discord.NotFound:
+                message = None
+        elif old_id:
+            # The panel moved: remove the old message where it was posted
+            old_channel = guild.get_channel(int(old_channel_id))
+            if isinstance(old_channel, discord.TextChannel):
+                try:
+                    await old_channel.get_partial_message(int(old_id)).delete()
+                except discord.HTTPException:
+                    pass
+
+        if message is None:
+            message = await channel.send(embed=embed)
+            job.created = True
+        elif not message.embeds or message.embeds[0].to_dict() != embed.to_dict():
+            await message.edit(embed=embed)
+            job.edited = True
+        job.message_id = message.id
+
+        if job.created or not panel.get("message_channel_id"):
+            await update_panel(
+                guild.id,
+                storage.set_key(panel_path(job.panel_id, "message_id"), message.id),
+                storage.set_key(panel_path(job.panel_id, "message_channel_id"), channel.id),
+            )
+        return message
+
+    async def _sync_reactions(
+        self, guild: discord.Guild, panel: Mapping[str, Any], message: discord.Message, job: PublishJob
+    ) -> None:
+        wanted: dict[str, Any] = {}
+        for item in panel.get("items") or []:
+            emoji = _item_emoji(guild, item)
+            if emoji is None:
+                job.skipped += 1
+            else:
+                wanted.setdefault(*emoji)
+
+        present: dict[str, discord.Reaction] = {}
+        for reaction in message.reactions:
+            emoji = reaction.emoji
+            key = emoji_key(getattr(emoji, "id", None), emoji if isinstance(emoji, str) else emoji.name)
+            if key:
+                present[key] = reaction
+
+        async def remove(reaction: discord.Reaction) -> None:
+            try:
+                await message.clear_reaction(reaction.emoji)
+            except discord.Forbidden:
+                # Without Manage Messages only our own reaction can go
+                if not reaction.me:
+                    return
+                await message.remove_reaction(reaction.emoji, guild.me)
+            job.removed += 1
+
+        stale = [r for key, r in present.items() if key not in wanted]
+        results = await asyncio.gather(*(remove(r) for r in stale), return_exceptions=True)
+        for result in results:
+            if isinstance(result, discord.HTTPException):
+                _log.debug("Could not remove stale reaction from panel %s: %s", job.panel_id, result)
+
+        for key, emoji in wanted.items():
+            reaction = present.get(key)
+            if reaction is not None and reaction.me:
+                continue
+            try:
+                await message.add_reaction(emoji)
+                job.added += 1
+            except discord.HTTPException:
+                # Skip invalid/unusable emojis
+                job.skipped += 1
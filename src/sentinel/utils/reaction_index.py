@@ -0,0 +1,69 @@
+"""Message ID → emoji → role lookup for reaction-role panels of all guilds.
+
+The raw reaction listeners see every reaction on every message the bot can
+read, and a guild may run any number of panels.  With this index a reaction
+on an unrelated message is discarded with a single dict lookup, and a panel
+reaction resolves to its role without touching the guild config::
+
+    role_id = index.role_for(payload.message_id, payload.emoji.id, payload.emoji.name)
+
+Guilds are indexed from their
+:class:`~sentinel.utils.snapshots.ReactionRolesSnapshot` (on startup and
+whenever the ``reaction_roles`` config changes).
+"""
+
+from __future__ import annotations
+
+import threading
+from typing import Dict, Iterable, Mapping
+
+from sentinel.utils.snapshots import get_snapshot
+
+
+def emoji_key(emoji_id: int | None, emoji_name: str | None) -> str | None:
+    """Custom emoji are keyed by ID, unicode emoji by the character itself."""
+
+    return str(emoji_id) if emoji_id else emoji_name
+
+
+class ReactionRoleIndex:
+    """In-memory index of all reaction-role panels."""
+
+    def __init__(self) -> None:
+        self._by_message: Dict[int, Mapping[str, int]] = {}
+        self._guild_messages: Dict[int, frozenset[int]] = {}
+        # Config callbacks run on the event loop, but index_guild may be called from any thread
+        self._lock = threading.Lock()
+
+    def index_guild(self, guild_id: int) -> None:
+        """(Re)index the panels of *guild_id* from its current config."""
+
+        rr = get_snapshot(guild_id).reaction_roles
+        self._replace(guild_id, {message_id: panel.by_emoji for message_id, panel in rr.by_message.items()})
+
+    def index_guilds(self, guild_ids: Iterable[int]) -> None:
+        for guild_id in guild_ids:
+            self.index_guild(guild_id)
+
+    def drop_guild(self, guild_id: int) -> None:
+        self._replace(guild_id, {})
+
+    def _replace(self, guild_id: int, panels: Dict[int, Mapping[str, int]]) -> None:
+        with self._lock:
+            for message_id in self._guild_messages.pop(guild_id, frozenset()):
+                self._by_message.pop(message_id, None)
+            if panels:
+                self._by_message.update(panels)
+                self._guild_messages[guild_id] = frozenset(panels)
+
+    def role_for(self, message_id: int, emoji_id: int | None, emoji_name: str | None) -> int | None:
+        """Return the role bound to this reaction, ``None`` for unrelated reactions."""
+
+        roles = self._by_message.get(message_id)
+        if roles is None:
+            return None
+        key = emoji_key(emoji_id, emoji_name)
+        return roles.get(key) if key else None
+
+    def __len__(self) -> int:
+        return len(self._by_message)
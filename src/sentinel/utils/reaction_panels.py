@@ -0,0 +1,56 @@
+"""Layout of the ``reaction_roles`` guild config.
+
+A guild can run any number of reaction-role panels, stored by panel ID::
+
+    "reaction_roles": {
+        "panels": {
+            "classes": {"channel_id": "123", "message_id": 456, "title": "...", "description": "...", "items": [...]},
+            "weapons": {...}
+        }
+    }
+
+Configs written before panels existed hold a single panel directly under
+``reaction_roles``.  :func:`panels` presents it as the panel ``default`` and
+:func:`migration` converts it on the next write.
+"""
+
+from __future__ import annotations
+
+import re
+from typing import Any, Mapping
+
+REACTION_ROLES_KEY = "reaction_roles"
+PANELS_KEY = "panels"
+DEFAULT_PANEL_ID = "default"
+PANEL_ID_RE = re.compile(r"^[a-z0-9_-]{1,32}$")
+
+
+def is_legacy(rr: Any) -> bool:
+    """Whether *rr* is a single panel stored in the pre-panels layout."""
+
+    return isinstance(rr, Mapping) and PANELS_KEY not in rr and "channel_id" in rr
+
+
+def panels(rr: Any) -> dict[str, Mapping[str, Any]]:
+    """Return ``{panel_id: panel}`` for the raw ``reaction_roles`` value."""
+
+    if is_legacy(rr):
+        return {DEFAULT_PANEL_ID: rr}
+    stored = rr.get(PANELS_KEY) if isinstance(rr, Mapping) else None
+    if not isinstance(stored, Mapping):
+        return {}
+    return {str(pid): panel for pid, panel in stored.items() if isinstance(panel, Mapping)}
+
+
+def panel_path(panel_id: str, *keys: str) -> tuple[str, ...]:
+    """Config key path of a panel (or one of its fields) for ``storage.set_key``."""
+
+    return (REACTION_ROLES_KEY, PANELS_KEY, panel_id, *keys)
+
+
+def migration(rr: Any) -> dict[str, Any] | None:
+    """New ``reaction_roles`` value if *rr* still uses the legacy layout, else ``None``."""
+
+    if not is_legacy(rr):
+        return None
+    return {PANELS_KEY: {DEFAULT_PANEL_ID: dict(rr)}}
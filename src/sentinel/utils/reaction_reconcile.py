@@ -0,0 +1,223 @@
+"""Catch up on reactions added or removed while the bot was offline.
+
+Raw reaction events missed during downtime or a disconnect leave roles out of
+sync with the panels.  :class:`ReactionReconciler` walks the users of every
+configured panel reaction and compares them with the members holding the
+bound role:
+
+* a member who reacted but lacks the role gets it
+* a member holding the role without reacting loses it – only for panels that
+  opted in (``remove_unreacted``) and only for roles bound to a single panel
+  emoji, since roles are often also handed out by admins
+
+Discord pages reaction users by ascending user ID, so each page also settles
+the role holders whose IDs fall into that page's ID range.  The walk is thus
+incremental: the cursor is checkpointed in the guild config
+(``reaction_roles_reconcile``) every ``CHECKPOINT_INTERVAL`` seconds and an
+interrupted run continues where it stopped.  Corrections are applied in small
+batches with a pause in between so a 20k-reaction panel never crowds out the
+live event handlers.  Members whose roles the live handlers touched since the
+page was read are left alone, the page is outdated for them::
+
+    reconciler = ReactionReconciler(bot, mutations=cog.roles)
+    reconciler.start()  # background task; a call while running queues one more run
+"""
+
+from __future__ import annotations
+
+import asyncio
+import bisect
+import logging
+import time
+from collections import Counter
+from typing import Any, AsyncIterator, Dict, Optional
+
+import discord
+
+import sentinel.utils.storage as storage
+from sentinel.utils.reaction_index import emoji_key
+from sentinel.utils.role_mutations import RoleMutationBuffer
+from sentinel.utils.snapshots import get_snapshot
+
+_log = logging.getLogger(__name__)
+
+CHECKPOINT_KEY = "reaction_roles_reconcile"
+PAGE_SIZE = 100  # maximum users per reaction page
+BATCH_SIZE = 10  # role corrections sent at once
+BATCH_PAUSE = 1.0  # seconds between two correction batches
+RECONCILE_CONCURRENCY = 2  # guilds reconciled at the same time
+CHECKPOINT_INTERVAL = 30.0  # seconds between two cursor writes of a guild
+REASON = "Reaction role sync"
+
+
+class ReactionReconciler:
+    """Background reconciliation of reaction-role panels against role holders."""
+
+    def __init__(
+        self,
+        bot: discord.Client,
+        *,
+        mutations: Optional[RoleMutationBuffer] = None,
+        batch_size: int = BATCH_SIZE,
+        batch_pause: float = BATCH_PAUSE,
+        concurrency: int = RECONCILE_CONCURRENCY,
+    ):
+        self.bot = bot
+        # Live role changes, consulted so a stale page never undoes them
+        self.mutations = mutations
+        self.batch_size = batch_size
+        self.batch_pause = batch_pause
+        self.concurrency = concurrency
+        self._task: Optional[asyncio.Task] = None
+        self._again = False
+        self.counters: Counter[str] = Counter()
+
+    def start(self) -> bool:
+        """Start a run over all guilds, return ``False`` if one is already running."""
+
+        if self._task is not None and not self._task.done():
+            # Events may have been missed after the running pass read them
+            self._again = True
+            return False
+        self._task = asyncio.create_task(self._run())
+        return True
+
+    def cancel(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+
+    def stats(self) -> Dict[str, Any]:
+        return {**self.counters, "running": self._task is not None and not self._task.done()}
+
+    async def _run(self) -> None:
+        while True:
+            self._again = False
+            semaphore = asyncio.Semaphore(self.concurrency)
+
+            async def sweep(guild: discord.Guild) -> None:
+                async with semaphore:
+                    try:
+                        await self.reconcile_guild(guild)
+                    except discord.HTTPException as exc:
+                        _log.warning("Reaction role reconciliation failed for guild %s: %s", guild.id, exc)
+                    except Exception:
+                        _log.exception("Reaction role reconciliation failed for guild %s", guild.id)
+
+            guilds = [g for g in self.bot.guilds if get_snapshot(g.id).reaction_roles.by_message]
+            await asyncio.gather(*(sweep(g) for g in guilds))
+            self.counters["runs"] += 1
+            if not self._again:
+                return
+
+    async def reconcile_guild(self, guild: discord.Guild) -> None:
+        """Bring the roles of all panels of *guild* in line with their reactions."""
+
+        rr = get_snapshot(guild.id).reaction_roles
+        cursors = dict(storage.get_guild_config_view(guild.id).get(CHECKPOINT_KEY) or {})
+        saved_at = time.monotonic()
+        if not guild.chunked:
+            await guild.chunk()
+
+        # Roles reachable through more than one emoji can't be removed safely
+        bindings = Counter(role_id for panel in rr.by_message.values() for role_id in panel.by_emoji.values())
+
+        for message_id, panel in rr.by_message.items():
+            channel = guild.get_channel(panel.message_channel_id) if panel.message_channel_id else None
+            if not isinstance(channel, discord.TextChannel):
+                continue
+            try:
+                message = await channel.fetch_message(message_id)
+            except discord.NotFound:
+                continue
+
+            reactions: Dict[str, discord.Reaction] = {}
+            for reaction in message.reactions:
+                emoji = reaction.emoji
+                key = emoji_key(getattr(emoji, "id", None), emoji if isinstance(emoji, str) else emoji.name)
+                if key:
+                    reactions[key] = reaction
+
+            for key, role_id in panel.by_emoji.items():
+                role = guild.get_role(role_id)
+                if role is None:
+                    continue
+                cursor_key = f"{message_id}:{key}"
+                async for cursor in self._reconcile_reaction(
+                    guild,
+                    role,
+                    reactions.get(key),
+                    int(cursors.get(cursor_key, 0)),
+                    # A missing reaction means a broken panel rather than nobody opting in
+                    may_remove=panel.remove_unreacted and bindings[role_id] == 1 and key in reactions,
+                ):
+                    cursors[cursor_key] = cursor
+                    if time.monotonic() - saved_at >= CHECKPOINT_INTERVAL:
+                        await storage.update_guild_config(guild.id, storage.set_key(CHECKPOINT_KEY, dict(cursors)))
+                        saved_at = time.monotonic()
+                if cursors.pop(cursor_key, None) is not None:
+                    await storage.update_guild_config(guild.id, storage.set_key(CHECKPOINT_KEY, dict(cursors)))
+                    saved_at = time.monotonic()
+        self.counters["guilds"] += 1
+
+    async def _reconcile_reaction(
+        self,
+        guild: discord.Guild,
+        role: discord.Role,
+        reaction: Optional[discord.Reaction],
+        after: int,
+        *,
+        may_remove: bool,
+    ) -> AsyncIterator[int]:
+        """Settle one reaction page by page, yielding the cursor after every page but the last."""
+
+        holder_ids = {m.id for m in role.members if not m.bot}
+        holders = sorted(holder_ids)
+
+        while True:
+            read_at = time.monotonic()
+            users: list[discord.abc.User] = []
+            if reaction is not None:
+                cursor = discord.Object(id=after) if after else None
+                users = [u async for u in reaction.users(limit=PAGE_SIZE, after=cursor)]
+            self.counters["pages"] += 1
+            final = len(users) < PAGE_SIZE
+            last = max((u.id for u in users), default=after)
+
+            reacted = {u.id for u in users if not u.bot}
+            add = [m for m in map(guild.get_member, reacted - holder_ids) if m is not None]
+            remove: list[discord.Member] = []
+            if may_remove:
+                # Holders in this page's ID range (everything above for the last page) that did not react
+                lo = bisect.bisect_right(holders, after)
+                hi = len(holders) if final else bisect.bisect_right(holders, last)
+                remove = [m for m in map(guild.get_member, holders[lo:hi]) if m is not None and m.id not in reacted]
+            if self.mutations is not None:
+                add = [m for m in add if not self.mutations.touched_since(guild.id, m.id, read_at)]
+                remove = [m for m in remove if not self.mutations.touched_since(guild.id, m.id, read_at)]
+            await self._apply(role, add, remove)
+
+            if final:
+                return
+            after = last
+            yield after
+
+    async def _apply(self, role: discord.Role, add: list[discord.Member], remove: list[discord.Member]) -> None:
+        corrections = [(m, True) for m in add] + [(m, False) for m in remove]
+        # Re-check against the member cache: pauses between batches leave time for changes
+        corrections = [(m, wanted) for m, wanted in corrections if (role in m.roles) is not wanted]
+        for start in range(0, len(corrections), self.batch_size):
+            batch = corrections[start : start + self.batch_size]
+            results = await asyncio.gather(
+                *(
+                    member.add_roles(role, reason=REASON) if wanted else member.remove_roles(role, reason=REASON)
+                    for member, wanted in batch
+                ),
+                return_exceptions=True,
+            )
+            for (member, wanted), result in zip(batch, results):
+                if isinstance(result, Exception):
+                    self.counters["failed"] += 1
+                    _log.debug("Could not sync role %s of member %s: %s", role.id, member.id, result)
+                else:
+                    self.counters["added" if wanted else "removed"] += 1
+            await asyncio.sleep(self.batch_pause)
@@ -0,0 +1,158 @@
+"""Per-member buffer merging rapid role add/remove requests.
+
+Clicking through the emojis of a reaction-role panel, or toggling one emoji on
+and off, used to cost one REST call per reaction.  :class:`RoleMutationBuffer`
+collects the intents for a member over a short window, lets opposing intents
+cancel out and then applies the net result with a single call::
+
+    buffer.add(member, role, reason="Reaction role opt-in")
+    buffer.remove(member, role, reason="Reaction role opt-out")  # cancels the add
+
+A single net change is applied with ``add_roles``/``remove_roles``, which
+leaves roles changed concurrently by others alone.  Several changes become
+one ``member.edit(roles=...)`` computed from the member's current roles, read
+from the member cache when the window closes.
+"""
+
+from __future__ import annotations
+
+import logging
+import time
+from collections import Counter, OrderedDict
+from typing import Any, Dict, Optional
+
+import discord
+
+from sentinel.utils.timers import DeadlineScheduler
+
+_log = logging.getLogger(__name__)
+
+_Key = tuple[int, int]
+
+# How long (and for how many members) the last change time is remembered
+RECENT_TTL = 300.0
+RECENT_MAX = 10_000
+
+
+class _Pending:
+    __slots__ = ("member", "intents", "reason", "requested")
+
+    def __init__(self, member: discord.Member):
+        self.member = member
+        # role ID → wanted (True = add, False = remove); the latest intent wins
+        self.intents: Dict[int, bool] = {}
+        self.reason: Optional[str] = None
+        self.requested = 0
+
+
+class RoleMutationBuffer:
+    """Collect role intents per member for *window* seconds, then apply the net change."""
+
+    def __init__(self, *, window: float = 0.75):
+        self.window = window
+        self._pending: Dict[_Key, _Pending] = {}
+        self._timers = DeadlineScheduler(self._on_due)
+        # member → monotonic time of the latest intent, oldest first
+        self._recent: OrderedDict[_Key, float] = OrderedDict()
+        self.counters: Counter[str] = Counter()
+
+    def add(self, member: discord.Member, role: discord.abc.Snowflake, *, reason: Optional[str] = None) -> None:
+        self._push(member, role.id, True, reason)
+
+    def remove(self, member: discord.Member, role: discord.abc.Snowflake, *, reason: Optional[str] = None) -> None:
+        self._push(member, role.id, False, reason)
+
+    def _push(self, member: discord.Member, role_id: int, wanted: bool, reason: Optional[str]) -> None:
+        key = (member.guild.id, member.id)
+        self._touch(key)
+        pending = self._pending.get(key)
+        if pending is None:
+            pending = self._pending[key] = _Pending(member)
+            # Fixed window from the first intent, so constant toggling can't postpone it forever
+            self._timers.schedule(key, self.window)
+        if pending.intents.get(role_id) is (not wanted):
+            self.counters["cancelled"] += 1
+        pending.member = member
+        pending.intents[role_id] = wanted
+        pending.reason = reason
+        pending.requested += 1
+        self.counters["requested"] += 1
+
+    def _touch(self, key: _Key) -> None:
+        now = time.monotonic()
+        self._recent[key] = now
+        self._recent.move_to_end(key)
+        while self._recent:
+            oldest_key, oldest = next(iter(self._recent.items()))
+            if len(self._recent) <= RECENT_MAX and now - oldest <= RECENT_TTL:
+                break
+            del self._recent[oldest_key]
+
+    def touched_since(self, guild_id: int, member_id: int, since: float) -> bool:
+        """Whether the member has buffered intents or got one after *since* (``time.monotonic()``).
+
+        Intents older than ``RECENT_TTL`` are forgotten.
+        """
+
+        key = (guild_id, member_id)
+        if key in self._pending:
+            return True
+        touched = self._recent.get(key)
+        return touched is not None and touched >= since
+
+    def _on_due(self, key: _Key, _payload: Any):
+        return self._apply(key)
+
+    async def flush(self) -> None:
+        """Apply all buffered intents now (e.g. before the cog is unloaded)."""
+
+        for key in list(self._pending):
+            self._timers.cancel(key)
+            await self._apply(key)
+        self._timers.close()
+
+    async def _apply(self, key: _Key) -> None:
+        pending = self._pending.pop(key, None)
+        if pending is None:
+            return
+        self.counters["resolved"] += pending.requested
+
+        # The member object of the first event is stale by now (roles changed
+        # by others in the window, or the member left)
+        member = pending.member.guild.get_member(pending.member.id)
+        if member is None:
+            self.counters["left"] += 1
+            return
+        current = {role.id for role in member.roles}
+        add = [rid for rid, wanted in pending.intents.items() if wanted and rid not in current]
+        remove = {rid for rid, wanted in pending.intents.items() if not wanted and rid in current}
+        if not add and not remove:
+            self.counters["noop"] += 1
+            return
+
+        try:
+            if len(add) + len(remove) == 1:
+                if add:
+                    await member.add_roles(discord.Object(id=add[0]), reason=pending.reason)
+                else:
+                    await member.remove_roles(discord.Object(id=next(iter(remove))), reason=pending.reason)
+            else:
+                roles = [r for r in member.roles if not r.is_default() and r.id not in remove]
+                roles.extend(discord.Object(id=rid) for rid in add)
+                await member.edit(roles=roles, reason=pending.reason)
+            self.counters["calls"] += 1
+        except discord.Forbidden:
+            self.counters["failed"] += 1
+            _log.warning("Missing permissions to update roles of %s in guild %s", member.id, member.guild.id)
+        except discord.HTTPException as exc:
+            self.counters["failed"] += 1
+            _log.error("Failed to update roles via reaction: %s", exc)
+
+    def stats(self) -> Dict[str, Any]:
+        """Counters plus the number of REST calls saved by merging intents."""
+
+        return {
+            **self.counters,
+            "saved": self.counters["resolved"] - self.counters["calls"] - self.counters["failed"],
+            "pending": len(self._pending),
+        }
@@ -1,31 +1,576 @@
 from __future__ import annotations
 
-import json
-from pathlib import Path
-from typing import Any
+import asyncio
+import logging
+import threading
+import time
+import weakref
+from collections import OrderedDict
+from types import MappingProxyType
+from typing import Any, Callable, Hashable, Mapping, NamedTuple, Sequence
 
-_DATA_DIR = Path.cwd() / "data"
-_DATA_DIR.mkdir(exist_ok=True)
+from . import config_events
+from .config_events import ConfigChange
+from .storage_backends import DELETED, Delta, StorageBackend, create_backend
 
+_log = logging.getLogger(__name__)
 
-def _guild_file(guild_id: int) -> Path:
-    return _DATA_DIR / f"guild_{guild_id}.json"
+# ---------------------------------------------------------------------------
+# In-process config cache
+# ---------------------------------------------------------------------------
+#
+# Gateway listeners read the guild config for nearly every event.  Parsed
+# documents are therefore kept in a small write-through LRU cache.  Writes
+# performed by this process update the cache directly; edits made by someone
+# else (e.g. an admin touching ``data/`` by hand) are picked up by comparing
+# the backend's change stamp (file mtime/size, SQLite row version), which we
+# re-check at most every ``_REVALIDATE_INTERVAL`` seconds per guild.
+
+_CACHE_MAX_GUILDS = 1024
+_REVALIDATE_INTERVAL = 5.0
+
+# Bursts of async saves for the same guild are coalesced into one flush.
+_FLUSH_DELAY = 0.25
+
+
+class _CacheEntry:
+    __slots__ = ("data", "view", "version", "stamp", "checked_at")
+
+    def __init__(self, data: dict[str, Any], version: int, stamp: Hashable | None):
+        self.data = data
+        self.view: Mapping[str, Any] | None = None  # frozen copy, built lazily
+        self.version = version
+        self.stamp = stamp
+        self.checked_at = time.monotonic()
+
+
+_cache: OrderedDict[int, _CacheEntry] = OrderedDict()
+_cache_lock = threading.RLock()
+_version_counter = 0
+_stats = {"hits": 0, "misses": 0, "evictions": 0, "invalidations": 0}
+
+# Write bookkeeping ----------------------------------------------------------
+# ``_dirty`` holds entries saved via the async API that are not on disk yet,
+# ``_pending_deltas`` the key-level changes accumulated since the last flush
+# (``None`` → the whole document has to be written).  ``_written`` remembers
+# the newest version written per guild so a slow flush can never overwrite a
+# newer document with an older one.
+_dirty: dict[int, _CacheEntry] = {}
+_pending_deltas: dict[int, list[Delta] | None] = {}
+_flush_tasks: dict[int, asyncio.Task] = {}
+_flush_locks: dict[int, asyncio.Lock] = {}
+_written: dict[int, int] = {}
+_write_locks: dict[int, threading.Lock] = {}
+_edit_locks: weakref.WeakValueDictionary[int, asyncio.Lock] = weakref.WeakValueDictionary()
+
+
+_backend: StorageBackend | None = None
+
+
+def get_backend() -> StorageBackend:
+    """Return the active persistence backend (selected via ``DATABASE_URL``)."""
+
+    global _backend
+    if _backend is None:
+        with _cache_lock:
+            if _backend is None:
+                from sentinel.config import get_settings  # local import: avoid import cycle
+
+                settings = get_settings()
+                _backend = create_backend(settings.database_url, settings.storage_codec)
+                _log.info("Using %s storage backend", _backend.name)
+    return _backend
+
+
+def set_backend(backend: StorageBackend) -> None:
+    """Replace the persistence backend (drops the cache, e.g. for benchmarks)."""
+
+    global _backend
+    with _cache_lock:
+        if _dirty:
+            raise RuntimeError("Cannot switch storage backend with unflushed writes")
+        _backend = backend
+        _cache.clear()
+        _written.clear()
+
+
+def _next_version() -> int:
+    global _version_counter
+    _version_counter += 1
+    return _version_counter
+
+
+def _copy(obj: Any) -> Any:
+    """Deep-copy a JSON document (much cheaper than ``copy.deepcopy``)."""
+
+    if isinstance(obj, dict):
+        return {k: _copy(v) for k, v in obj.items()}
+    if isinstance(obj, list):
+        return [_copy(v) for v in obj]
+    return obj
+
+
+def _freeze(obj: Any) -> Any:
+    """Return a read-only deep view of a JSON document (dicts → mappingproxy, lists → tuple)."""
+
+    if isinstance(obj, dict):
+        return MappingProxyType({k: _freeze(v) for k, v in obj.items()})
+    if isinstance(obj, list):
+        return tuple(_freeze(v) for v in obj)
+    return obj
+
+
+def _changed_keys(old: Mapping[str, Any] | None, new: Mapping[str, Any]) -> frozenset[str] | None:
+    """Top-level keys that differ between *old* and *new* (``None`` if *old* is unknown)."""
+
+    if old is None:
+        return None
+    return frozenset(k for k in old.keys() | new.keys() if old.get(k, DELETED) != new.get(k, DELETED))
+
+
+def _publish(guild_id: int, entry: _CacheEntry, keys: frozenset[str] | None, source: str) -> None:
+    if keys is not None and not keys:
+        return
+    config_events.publish(ConfigChange(guild_id, entry.version, keys, source))
+
+
+def _write_guild_doc(guild_id: int, entry: _CacheEntry, deltas: list[Delta] | None = None) -> None:
+    """Persist *entry* unless a newer version was written already.
+
+    With *deltas* only those key-level changes are handed to the backend.
+
+    Runs on the event loop (sync API) as well as in worker threads (async API),
+    writers of the same guild are serialised by a per-guild thread lock.
+    """
+
+    backend = get_backend()
+    with _cache_lock:
+        lock = _write_locks.setdefault(guild_id, threading.Lock())
+    with lock:
+        if _written.get(guild_id, 0) > entry.version:
+            return
+        if deltas is None:
+            backend.write(guild_id, entry.data)
+        elif deltas:
+            backend.apply(guild_id, deltas, entry.data)
+        _written[guild_id] = entry.version
+        entry.stamp = backend.stamp(guild_id)
+
+
+def _store(guild_id: int, data: dict[str, Any], stamp: Hashable | None) -> _CacheEntry:
+    entry = _CacheEntry(data, _next_version(), stamp)
+    _cache[guild_id] = entry
+    _cache.move_to_end(guild_id)
+    while len(_cache) > _CACHE_MAX_GUILDS:
+        _cache.popitem(last=False)
+        _stats["evictions"] += 1
+    return entry
+
+
+def _get_entry(guild_id: int) -> _CacheEntry:
+    backend = get_backend()
+    with _cache_lock:
+        entry = _cache.get(guild_id) or _dirty.get(guild_id)
+        if entry is not None:
+            now = time.monotonic()
+            # Unflushed entries are newer than the file, never revalidate them
+            if guild_id in _dirty or now - entry.checked_at < _REVALIDATE_INTERVAL:
+                _cache[guild_id] = entry
+                _cache.move_to_end(guild_id)
+                _stats["hits"] += 1
+                return entry
+            stamp = backend.stamp(guild_id)
+            if stamp == entry.stamp:
+                entry.checked_at = now
+                _cache.move_to_end(guild_id)
+                _stats["hits"] += 1
+                return entry
+            # Document changed behind our back → reload
+            _stats["invalidations"] += 1
+
+        _stats["misses"] += 1
+        stamp = backend.stamp(guild_id)
+        fresh = _store(guild_id, backend.read(guild_id), stamp)
+    if entry is not None:
+        _publish(guild_id, fresh, _changed_keys(entry.data, fresh.data), "reload")
+    return fresh
 
 
 def load_guild_config(guild_id: int) -> dict[str, Any]:
-    path = _guild_file(guild_id)
-    if path.exists():
-        try:
-            raw = path.read_text(encoding="utf-8")
-            if not raw.strip():
-                return {}
-            return json.loads(raw)
-        except json.JSONDecodeError:
-            # Corrupted or partially written file → start fresh
-            return {}
-    return {}
+    """Return a private, mutable copy of the guild config.
+
+    Callers may freely modify the returned dict (copy-on-write); changes only
+    become visible to others once passed to :func:`save_guild_config`.
+    """
+
+    return _copy(_get_entry(guild_id).data)
+
+
+def get_guild_config_view(guild_id: int) -> Mapping[str, Any]:
+    """Return a read-only view of the cached guild config.
+
+    Cheaper than :func:`load_guild_config` as no copy is made. Nested dicts
+    are exposed as read-only mappings and lists as tuples.
+    """
+
+    entry = _get_entry(guild_id)
+    if entry.view is None:
+        entry.view = _freeze(entry.data)
+    return entry.view
+
+
+def get_guild_config_value(guild_id: int, key: str, default: Any = None) -> Any:
+    """Return a read-only view of the top-level *key* of the guild config.
+
+    Only this value is frozen, so reading one key right after a change does
+    not pay for freezing the whole document (the full view is reused if it
+    exists already).
+    """
+
+    entry = _get_entry(guild_id)
+    if entry.view is not None:
+        return entry.view.get(key, default)
+    if key not in entry.data:
+        return default
+    return _freeze(entry.data[key])
+
+
+def get_guild_config_version(guild_id: int) -> int:
+    """Return a process-local version number that changes whenever the config does."""
+
+    return _get_entry(guild_id).version
 
 
 def save_guild_config(guild_id: int, data: dict[str, Any]) -> None:
-    path = _guild_file(guild_id)
-    path.write_text(json.dumps(data, ensure_ascii=False, indent=2), encoding="utf-8") 
+    """Persist *data* synchronously (atomic write).
+
+    Prefer :func:`asave_guild_config` from coroutines, this variant blocks the
+    event loop for the duration of the write.
+    """
+
+    with _cache_lock:
+        previous = _cache.get(guild_id) or _dirty.get(guild_id)
+        entry = _store(guild_id, _copy(data), None)
+        _dirty.pop(guild_id, None)
+        _pending_deltas.pop(guild_id, None)
+    _write_guild_doc(guild_id, entry)
+    _publish(guild_id, entry, _changed_keys(previous.data if previous else None, entry.data), "save")
+
+
+# ---------------------------------------------------------------------------
+# Async API
+# ---------------------------------------------------------------------------
+
+
+def guild_lock(guild_id: int) -> asyncio.Lock:
+    """Return the lock serialising read-modify-write cycles for *guild_id*.
+
+    Usage::
+
+        async with storage.guild_lock(guild_id):
+            cfg = await storage.aload_guild_config(guild_id)
+            cfg["foo"] = "bar"
+            await storage.asave_guild_config(guild_id, cfg)
+    """
+
+    lock = _edit_locks.get(guild_id)
+    if lock is None:
+        lock = asyncio.Lock()
+        _edit_locks[guild_id] = lock
+    return lock
+
+
+async def _aget_entry(guild_id: int) -> _CacheEntry:
+    with _cache_lock:
+        entry = _cache.get(guild_id)
+        if entry is not None and (
+            guild_id in _dirty or time.monotonic() - entry.checked_at < _REVALIDATE_INTERVAL
+        ):
+            return _get_entry(guild_id)
+    return await asyncio.to_thread(_get_entry, guild_id)
+
+
+async def aload_guild_config(guild_id: int) -> dict[str, Any]:
+    """Async variant of :func:`load_guild_config`, file I/O runs in a worker thread."""
+
+    return _copy((await _aget_entry(guild_id)).data)
+
+
+async def asave_guild_config(guild_id: int, data: dict[str, Any], *, flush: bool = False) -> None:
+    """Store *data* in the cache immediately and write it to disk off the event loop.
+
+    Saves arriving within ``_FLUSH_DELAY`` seconds are coalesced into a single
+    write.  Pass ``flush=True`` to wait until the document is on disk.
+    """
+
+    with _cache_lock:
+        previous = _cache.get(guild_id) or _dirty.get(guild_id)
+        entry = _store(guild_id, _copy(data), None)
+        _dirty[guild_id] = entry
+        _pending_deltas[guild_id] = None
+    _publish(guild_id, entry, _changed_keys(previous.data if previous else None, entry.data), "save")
+    await _schedule_flush(guild_id, flush)
+
+
+async def _schedule_flush(guild_id: int, flush: bool) -> None:
+    if flush:
+        await _flush(guild_id)
+        return
+
+    task = _flush_tasks.get(guild_id)
+    if task is None or task.done():
+        _flush_tasks[guild_id] = asyncio.create_task(_delayed_flush(guild_id))
+
+
+async def _delayed_flush(guild_id: int) -> None:
+    await asyncio.sleep(_FLUSH_DELAY)
+    _flush_tasks.pop(guild_id, None)
+    try:
+        await _flush(guild_id)
+    except Exception:
+        _log.exception("Failed to write config for guild %s", guild_id)
+
+
+async def _flush(guild_id: int) -> None:
+    lock = _flush_locks.setdefault(guild_id, asyncio.Lock())
+    async with lock:
+        with _cache_lock:
+            entry = _dirty.get(guild_id)
+            if entry is None:
+                return
+            # Changes arriving while we write start a fresh delta list
+            deltas = _pending_deltas.get(guild_id)
+            _pending_deltas[guild_id] = []
+        try:
+            await asyncio.to_thread(_write_guild_doc, guild_id, entry, deltas)
+        except BaseException:
+            with _cache_lock:
+                if guild_id in _pending_deltas:
+                    # Unknown on-disk state → next attempt writes the whole document
+                    _pending_deltas[guild_id] = None
+            raise
+        # Only mark clean once on disk – unless a newer save arrived meanwhile
+        with _cache_lock:
+            if _dirty.get(guild_id) is entry:
+                del _dirty[guild_id]
+                del _pending_deltas[guild_id]
+
+
+async def flush_now() -> None:
+    """Write every pending document to disk now, e.g. before reading the backend directly.
+
+    Unlike :func:`flush_pending` scheduled flushes stay in place (they find
+    nothing left to write), so this is safe to call while the bot runs.
+    """
+
+    for guild_id in list(_dirty):
+        try:
+            await _flush(guild_id)
+        except Exception:
+            _log.exception("Failed to write config for guild %s", guild_id)
+
+
+async def flush_pending() -> None:
+    """Write every pending document to disk (call on shutdown)."""
+
+    for task in list(_flush_tasks.values()):
+        task.cancel()
+    _flush_tasks.clear()
+    for guild_id in list(_dirty):
+        try:
+            await _flush(guild_id)
+        except Exception:
+            _log.exception("Failed to write config for guild %s", guild_id)
+
+
+async def close_backend() -> None:
+    """Close the active backend after :func:`flush_pending` (call on shutdown).
+
+    Closes the SQLite connection, compacts the journal; a later access opens
+    the backend again.
+    """
+
+    global _backend
+    with _cache_lock:
+        backend, _backend = _backend, None
+        _cache.clear()
+        _written.clear()
+    if backend is not None:
+        await asyncio.to_thread(backend.close)
+
+
+# ---------------------------------------------------------------------------
+# Key-level mutations
+# ---------------------------------------------------------------------------
+
+
+class Mutation(NamedTuple):
+    """A single change to a guild config, see :func:`update_guild_config`."""
+
+    op: str  # "set" | "delete" | "add" | "remove" | "transform"
+    path: tuple[str, ...]
+    value: Any = None
+
+
+def _key_path(path: str | Sequence[Any]) -> tuple[str, ...]:
+    keys = (path,) if isinstance(path, str) else tuple(str(k) for k in path)
+    if not keys:
+        raise ValueError("Mutation path must not be empty")
+    return keys
+
+
+def set_key(path: str | Sequence[Any], value: Any) -> Mutation:
+    """Set *path* (a key or sequence of nested keys) to *value*, creating parents."""
+    return Mutation("set", _key_path(path), value)
+
+
+def delete_key(path: str | Sequence[Any]) -> Mutation:
+    """Remove *path* if present."""
+    return Mutation("delete", _key_path(path))
+
+
+def add_to_set(path: str | Sequence[Any], value: Any) -> Mutation:
+    """Append *value* to the list at *path* unless already contained."""
+    return Mutation("add", _key_path(path), value)
+
+
+def remove_from_set(path: str | Sequence[Any], value: Any) -> Mutation:
+    """Remove every occurrence of *value* from the list at *path*."""
+    return Mutation("remove", _key_path(path), value)
+
+
+def transform_key(path: str | Sequence[Any], fn: Callable[[Any], Any]) -> Mutation:
+    """Replace *path* with ``fn(current)``, evaluated under the guild lock.
+
+    *fn* gets the current value (``None`` if missing) and must not modify it;
+    returning ``None`` leaves the config unchanged.  Useful for read-modify-
+    write steps such as layout migrations that must not race other updates.
+    """
+    return Mutation("transform", _key_path(path), fn)
+
+
+def _apply_mutation(doc: dict[str, Any], m: Mutation) -> tuple[dict[str, Any], Delta | None]:
+    """Apply *m* to *doc* without modifying it.
+
+    Only the dicts along ``m.path`` are copied, everything else is shared with
+    the previous version (cached documents are never mutated in place).
+    Returns the new document and the resulting :class:`Delta`, or *doc* itself
+    and ``None`` if nothing changed.
+    """
+
+    root = dict(doc)
+    node = root
+    # Length of the path prefix that has to be persisted: if a parent is
+    # missing the delta must carry the whole newly created subtree.
+    target_len = len(m.path)
+    for depth, key in enumerate(m.path[:-1]):
+        child = node.get(key)
+        if isinstance(child, dict):
+            child = dict(child)
+        elif m.op in ("delete", "remove"):
+            return doc, None
+        else:
+            child = {}
+            target_len = min(target_len, depth + 1)
+        node[key] = child
+        node = child
+
+    leaf = m.path[-1]
+    current = node.get(leaf, DELETED)
+    if m.op == "set":
+        if current == m.value:
+            return doc, None
+        node[leaf] = _copy(m.value)
+    elif m.op == "delete":
+        if current is DELETED:
+            return doc, None
+        del node[leaf]
+    elif m.op == "add":
+        items = list(current) if isinstance(current, list) else []
+        if isinstance(current, list) and m.value in items:
+            return doc, None
+        items.append(_copy(m.value))
+        node[leaf] = items
+    elif m.op == "remove":
+        if not isinstance(current, list) or m.value not in current:
+            return doc, None
+        node[leaf] = [v for v in current if v != m.value]
+    elif m.op == "transform":
+        new = m.value(None if current is DELETED else current)
+        if new is None or new == current:
+            return doc, None
+        node[leaf] = _copy(new)
+    else:
+        raise ValueError(f"Unknown mutation op {m.op!r}")
+
+    value: Any = root
+    for key in m.path[:target_len]:
+        value = value.get(key, DELETED) if value is not DELETED else DELETED
+    return root, Delta(m.path[:target_len], value)
+
+
+async def update_guild_config(guild_id: int, *mutations: Mutation, flush: bool = False) -> bool:
+    """Atomically apply *mutations* to the config of *guild_id*.
+
+    Runs under :func:`guild_lock` so concurrent updates never lose each other,
+    and only the changed keys are handed to the storage backend.  Returns
+    whether anything changed.
+
+    Example::
+
+        await storage.update_guild_config(
+            guild_id,
+            storage.add_to_set("voice_channel_user_creation_autochannels", channel.id),
+        )
+    """
+
+    async with guild_lock(guild_id):
+        entry = await _aget_entry(guild_id)
+        doc = entry.data
+        deltas: list[Delta] = []
+        for m in mutations:
+            doc, delta = _apply_mutation(doc, m)
+            if delta is not None:
+                deltas.append(delta)
+        if not deltas:
+            return False
+
+        with _cache_lock:
+            pending = _pending_deltas.get(guild_id, []) if guild_id in _dirty else []
+            if pending is not None:
+                pending.extend(deltas)
+            entry = _dirty[guild_id] = _store(guild_id, doc, None)
+            _pending_deltas[guild_id] = pending
+    _publish(guild_id, entry, frozenset(d.path[0] for d in deltas), "update")
+    await _schedule_flush(guild_id, flush)
+    return True
+
+
+def invalidate_guild_config(guild_id: int | None = None) -> None:
+    """Drop *guild_id* (or every guild if ``None``) from the in-memory cache."""
+
+    with _cache_lock:
+        if guild_id is None:
+            dropped = list(_cache.items())
+            _cache.clear()
+        else:
+            entry = _cache.pop(guild_id, None)
+            dropped = [(guild_id, entry)] if entry is not None else []
+        _stats["invalidations"] += len(dropped)
+    # The next read reloads from the backend, derived state must follow
+    for gid, entry in dropped:
+        _publish(gid, entry, None, "invalidate")
+
+
+def cache_stats() -> dict[str, Any]:
+    """Return hit/miss counters of the config cache."""
+
+    with _cache_lock:
+        lookups = _stats["hits"] + _stats["misses"]
+        return {
+            **_stats,
+            "size": len(_cache),
+            "pending_writes": len(_dirty),
+            "max_size": _CACHE_MAX_GUILDS,
+            "hit_ratio": round(_stats["hits"] / lookups, 4) if lookups else 0.0,
+        }
@@ -0,0 +1,671 @@
+"""Persistence backends for :mod:`sentinel.utils.storage`.
+
+The backend is selected via ``DATABASE_URL``:
+
+* unset → one JSON file per guild under ``data/`` (default)
+* ``sqlite:///data/sentinel.db`` (relative) or ``sqlite:////abs/path.db`` →
+  a single SQLite database in WAL mode
+* ``journal:///data/journal`` → documents kept in memory, persisted as a
+  snapshot plus an append-only change log
+
+The on-disk format of the file backend is chosen via ``STORAGE_CODEC``, see
+:mod:`sentinel.utils.storage_codecs`.
+
+Backends only deal with whole documents and are called from worker threads,
+caching and write coalescing live in :mod:`sentinel.utils.storage`.
+"""
+
+from __future__ import annotations
+
+import logging
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+import zlib
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Hashable, Iterable, Iterator, NamedTuple, Sequence
+from urllib.parse import urlparse
+
+from .storage_codecs import EXTENSIONS, Codec, CodecError, FastJsonCodec, get_codec, loads_json
+
+_log = logging.getLogger(__name__)
+
+DEFAULT_DATA_DIR = Path.cwd() / "data"
+
+# Config key mirrored into an indexed SQLite table
+AUTOCHANNELS_KEY = "voice_channel_user_creation_autochannels"
+
+
+class _Deleted:
+    __slots__ = ()
+
+    def __repr__(self) -> str:
+        return "DELETED"
+
+
+DELETED: Any = _Deleted()
+
+
+class Delta(NamedTuple):
+    """Key-level change: *value* now lives at *path* (``DELETED`` → key removed)."""
+
+    path: tuple[str, ...]
+    value: Any
+
+
+class StorageBackend:
+    """Interface implemented by every backend."""
+
+    name = "abstract"
+
+    def read(self, guild_id: int) -> dict[str, Any]:
+        raise NotImplementedError
+
+    def write(self, guild_id: int, data: dict[str, Any]) -> None:
+        raise NotImplementedError
+
+    def apply(self, guild_id: int, deltas: Sequence[Delta], data: dict[str, Any]) -> None:
+        """Persist key-level *deltas*; *data* is the resulting full document.
+
+        Backends without partial updates simply rewrite the document.
+        """
+
+        self.write(guild_id, data)
+
+    def stamp(self, guild_id: int) -> Hashable | None:
+        """Return a cheap token that changes whenever the stored document does."""
+        raise NotImplementedError
+
+    def guild_ids(self) -> list[int]:
+        raise NotImplementedError
+
+    def auto_channels(self) -> dict[int, set[int]]:
+        """Return persisted auto voice channel IDs for every guild."""
+
+        result: dict[int, set[int]] = {}
+        for guild_id in self.guild_ids():
+            ids = self.read(guild_id).get(AUTOCHANNELS_KEY) or []
+            if ids:
+                result[guild_id] = {int(i) for i in ids}
+        return result
+
+    def close(self) -> None:
+        pass
+
+
+# ---------------------------------------------------------------------------
+# JSON files
+# ---------------------------------------------------------------------------
+
+
+def write_atomic(path: Path, payload: str | bytes) -> None:
+    """Write *payload* to *path* via temp file + fsync + rename.
+
+    Readers either see the old or the new document, never a truncated one.
+    """
+
+    fd, tmp = tempfile.mkstemp(prefix=f".{path.name}.", suffix=".tmp", dir=path.parent)
+    try:
+        with os.fdopen(fd, "wb") as fh:
+            if isinstance(payload, str):
+                payload = payload.encode("utf-8")
+            fh.write(payload)
+            fh.flush()
+            os.fsync(fh.fileno())
+        os.replace(tmp, path)
+    except BaseException:
+        try:
+            os.unlink(tmp)
+        except FileNotFoundError:
+            pass
+        raise
+
+    # Persist the rename itself (not supported on every platform)
+    try:
+        dir_fd = os.open(path.parent, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(dir_fd)
+    except OSError:
+        pass
+    finally:
+        os.close(dir_fd)
+
+
+class JsonFileBackend(StorageBackend):
+    """One ``guild_<id>.json`` (or ``.msgpack``) document per guild.
+
+    Documents are written with *codec* but read in whatever format they were
+    stored in, so switching codecs needs no migration step.
+    """
+
+    name = "json"
+
+    def __init__(self, data_dir: Path | str = DEFAULT_DATA_DIR, codec: Codec | None = None):
+        self.data_dir = Path(data_dir)
+        self.data_dir.mkdir(parents=True, exist_ok=True)
+        self.codec = codec or get_codec(None)
+
+    def _guild_file(self, guild_id: int, extension: str | None = None) -> Path:
+        return self.data_dir / f"guild_{guild_id}{extension or self.codec.extension}"
+
+    def _existing_file(self, guild_id: int) -> Path | None:
+        # Prefer the active codec's file, fall back to other known formats
+        for ext in (self.codec.extension, *EXTENSIONS):
+            path = self._guild_file(guild_id, ext)
+            if path.exists():
+                return path
+        return None
+
+    def read(self, guild_id: int) -> dict[str, Any]:
+        path = self._existing_file(guild_id)
+        if path is None:
+            return {}
+        try:
+            return self.codec.decode(path.read_bytes())
+        except CodecError:
+            # Corrupted file → start fresh
+            _log.warning("Ignoring corrupted config file %s", path)
+            return {}
+
+    def write(self, guild_id: int, data: dict[str, Any]) -> None:
+        path = self._guild_file(guild_id)
+        write_atomic(path, self.codec.encode(data))
+        # Drop copies in other formats so they cannot shadow newer data
+        for ext in EXTENSIONS:
+            if ext != self.codec.extension:
+                try:
+                    self._guild_file(guild_id, ext).unlink()
+                except FileNotFoundError:
+                    pass
+
+    def stamp(self, guild_id: int) -> Hashable | None:
+        path = self._existing_file(guild_id)
+        if path is None:
+            return None
+        try:
+            st = path.stat()
+        except FileNotFoundError:
+            return None
+        return (path.suffix, st.st_mtime_ns, st.st_size)
+
+    def guild_ids(self) -> list[int]:
+        ids = set()
+        for ext in EXTENSIONS:
+            for path in self.data_dir.glob(f"guild_*{ext}"):
+                try:
+                    ids.add(int(path.stem.removeprefix("guild_")))
+                except ValueError:
+                    continue
+        return sorted(ids)
+
+
+# ---------------------------------------------------------------------------
+# SQLite
+# ---------------------------------------------------------------------------
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS guild_config (
+    guild_id   INTEGER PRIMARY KEY,
+    doc        TEXT    NOT NULL,
+    version    INTEGER NOT NULL DEFAULT 1,
+    updated_at REAL    NOT NULL
+);
+CREATE TABLE IF NOT EXISTS auto_voice_channels (
+    guild_id   INTEGER NOT NULL,
+    channel_id INTEGER NOT NULL,
+    PRIMARY KEY (guild_id, channel_id)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS meta (
+    key   TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+-- Former reaction-role mirror, never read (reaction roles use an in-memory index)
+DROP TABLE IF EXISTS reaction_role_items;
+"""
+
+
+def _to_int(value: Any) -> int | None:
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+class SqliteBackend(StorageBackend):
+    """All guild documents in a single SQLite database (WAL mode).
+
+    Besides the JSON documents, the auto voice channel lists are mirrored into
+    an indexed table so they can be queried for every guild at once without
+    parsing documents.
+    """
+
+    name = "sqlite"
+
+    def __init__(self, path: Path | str):
+        self.path = str(path)
+        if self.path != ":memory:":
+            Path(self.path).parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+        with self._lock:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.execute("PRAGMA busy_timeout=5000")
+            self._conn.executescript(_SCHEMA)
+
+    def read(self, guild_id: int) -> dict[str, Any]:
+        with self._lock:
+            row = self._conn.execute("SELECT doc FROM guild_config WHERE guild_id = ?", (guild_id,)).fetchone()
+        if row is None:
+            return {}
+        try:
+            return loads_json(row[0])
+        except ValueError:
+            _log.warning("Ignoring corrupted config document for guild %s", guild_id)
+            return {}
+
+    def write(self, guild_id: int, data: dict[str, Any]) -> None:
+        with self._lock, self._transaction():
+            self._write_doc(guild_id, data)
+
+    def apply(self, guild_id: int, deltas: Sequence[Delta], data: dict[str, Any]) -> None:
+        # SQLite's JSON path syntax has no escape for quotes inside labels
+        if any('"' in key for d in deltas for key in d.path):
+            self.write(guild_id, data)
+            return
+
+        with self._lock, self._transaction():
+            cur = self._conn.execute(
+                "UPDATE guild_config SET version = version + 1, updated_at = ? WHERE guild_id = ?",
+                (time.time(), guild_id),
+            )
+            if cur.rowcount == 0:
+                self._write_doc(guild_id, data)
+                return
+            for delta in deltas:
+                json_path = "$" + "".join(f'."{key}"' for key in delta.path)
+                if delta.value is DELETED:
+                    self._conn.execute(
+                        "UPDATE guild_config SET doc = json_remove(doc, ?) WHERE guild_id = ?",
+                        (json_path, guild_id),
+                    )
+                else:
+                    self._conn.execute(
+                        "UPDATE guild_config SET doc = json_set(doc, ?, json(?)) WHERE guild_id = ?",
+                        (json_path, self._encode(delta.value), guild_id),
+                    )
+            self._sync_indexes(guild_id, data, {d.path[0] for d in deltas})
+
+    def stamp(self, guild_id: int) -> Hashable | None:
+        with self._lock:
+            row = self._conn.execute("SELECT version FROM guild_config WHERE guild_id = ?", (guild_id,)).fetchone()
+        return row[0] if row else None
+
+    def guild_ids(self) -> list[int]:
+        with self._lock:
+            rows = self._conn.execute("SELECT guild_id FROM guild_config ORDER BY guild_id").fetchall()
+        return [r[0] for r in rows]
+
+    def auto_channels(self) -> dict[int, set[int]]:
+        with self._lock:
+            rows = self._conn.execute("SELECT guild_id, channel_id FROM auto_voice_channels").fetchall()
+        result: dict[int, set[int]] = {}
+        for guild_id, channel_id in rows:
+            result.setdefault(guild_id, set()).add(channel_id)
+        return result
+
+    def get_meta(self, key: str) -> str | None:
+        with self._lock:
+            row = self._conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+    def set_meta(self, key: str, value: str) -> None:
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO meta (key, value) VALUES (?, ?) ON CONFLICT (key) DO UPDATE SET value = excluded.value",
+                (key, value),
+            )
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+    # Helpers -------------------------------------------------------------
+
+    # Documents stay JSON text so json_set()/json_remove() can patch them
+    _codec = FastJsonCodec()
+
+    def _encode(self, value: Any) -> str:
+        return self._codec.encode(value).decode("utf-8")
+
+    def _write_doc(self, guild_id: int, data: dict[str, Any]) -> None:
+        self._conn.execute(
+            "INSERT INTO guild_config (guild_id, doc, version, updated_at) VALUES (?, ?, 1, ?) "
+            "ON CONFLICT (guild_id) DO UPDATE SET doc = excluded.doc, "
+            "version = guild_config.version + 1, updated_at = excluded.updated_at",
+            (guild_id, self._encode(data), time.time()),
+        )
+        self._sync_indexes(guild_id, data)
+
+    def _sync_indexes(self, guild_id: int, data: dict[str, Any], keys: set[str] | None = None) -> None:
+        """Refresh the indexed tables mirroring *keys* (all if ``None``) of *data*."""
+
+        if keys is None or AUTOCHANNELS_KEY in keys:
+            auto_ids = {i for i in map(_to_int, data.get(AUTOCHANNELS_KEY) or []) if i is not None}
+            self._conn.execute("DELETE FROM auto_voice_channels WHERE guild_id = ?", (guild_id,))
+            self._conn.executemany(
+                "INSERT INTO auto_voice_channels (guild_id, channel_id) VALUES (?, ?)",
+                [(guild_id, cid) for cid in auto_ids],
+            )
+
+    @contextmanager
+    def _transaction(self) -> Iterator[None]:
+        self._conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield
+        except BaseException:
+            self._conn.execute("ROLLBACK")
+            raise
+        self._conn.execute("COMMIT")
+
+
+# ---------------------------------------------------------------------------
+# Append-only journal
+# ---------------------------------------------------------------------------
+
+
+def _copy_doc(obj: Any) -> Any:
+    if isinstance(obj, dict):
+        return {k: _copy_doc(v) for k, v in obj.items()}
+    if isinstance(obj, list):
+        return [_copy_doc(v) for v in obj]
+    return obj
+
+
+def _apply_delta(doc: dict[str, Any], path: Sequence[str], value: Any) -> None:
+    """Apply a key-level change to *doc* in place (used during replay)."""
+
+    node = doc
+    for key in path[:-1]:
+        child = node.get(key)
+        if not isinstance(child, dict):
+            if value is DELETED:
+                return
+            child = node[key] = {}
+        node = child
+    if value is DELETED:
+        node.pop(path[-1], None)
+    else:
+        node[path[-1]] = value
+
+
+class JournalBackend(StorageBackend):
+    """All guild documents in memory, persisted as snapshot + append-only log.
+
+    Every write appends one small record (a whole document for
+    :meth:`write`, only the changed keys for :meth:`apply`) to
+    ``journal.<generation>.log``.  Startup loads ``snapshot.json`` and replays
+    the logs written after it – one sequential read instead of opening a file
+    per guild.  Once the log outgrows *compact_bytes* a background thread
+    writes a fresh snapshot and starts a new log generation.
+
+    Records are ``<crc32> <json>`` lines; a torn record at the end of the log
+    (crash mid-append) fails its checksum and is cut off during replay.  The
+    journal is owned by this process, changes made by others are not seen.
+    """
+
+    name = "journal"
+
+    _SNAPSHOT = "snapshot.json"
+
+    def __init__(self, data_dir: Path | str, *, compact_bytes: int = 8 * 1024 * 1024, fsync: bool = True):
+        self.data_dir = Path(data_dir)
+        self.data_dir.mkdir(parents=True, exist_ok=True)
+        self.compact_bytes = compact_bytes
+        self.fsync = fsync
+        self._lock = threading.Lock()
+        self._docs: dict[int, dict[str, Any]] = {}
+        self._seq: dict[int, int] = {}
+        self._codec = FastJsonCodec()
+        self._compacting: threading.Thread | None = None
+        self.stats = {"records": 0, "replayed": 0, "compactions": 0, "torn_records": 0}
+
+        self.generation = self._load()
+        self._log_fd = self._open_log(self.generation)
+        self._log_size = os.fstat(self._log_fd).st_size
+
+    @property
+    def is_empty(self) -> bool:
+        return not self._docs and not self._log_size
+
+    # Files ---------------------------------------------------------------
+
+    def _log_path(self, generation: int) -> Path:
+        return self.data_dir / f"journal.{generation}.log"
+
+    def _log_generations(self) -> list[int]:
+        gens = []
+        for path in self.data_dir.glob("journal.*.log"):
+            try:
+                gens.append(int(path.name.split(".")[1]))
+            except (IndexError, ValueError):
+                continue
+        return sorted(gens)
+
+    def _open_log(self, generation: int) -> int:
+        return os.open(self._log_path(generation), os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+
+    def _load(self) -> int:
+        generation = 0
+        snapshot = self.data_dir / self._SNAPSHOT
+        if snapshot.exists():
+            state = loads_json(snapshot.read_bytes())
+            generation = int(state.get("generation", 0))
+            self._docs = {int(gid): doc for gid, doc in state.get("guilds", {}).items()}
+        for gen in self._log_generations():
+            if gen < generation:
+                self._log_path(gen).unlink(missing_ok=True)  # already in the snapshot
+            else:
+                self._replay(self._log_path(gen))
+                generation = gen
+        self._seq = dict.fromkeys(self._docs, 1)
+        return generation
+
+    def _replay(self, path: Path) -> None:
+        good = 0
+        with open(path, "rb") as fh:
+            for line in fh:
+                record = self._parse(line)
+                if record is None:
+                    break
+                good += len(line)
+                gid = int(record["g"])
+                if "doc" in record:
+                    self._docs[gid] = record["doc"]
+                else:
+                    doc = self._docs.setdefault(gid, {})
+                    for path_, value, deleted in record["d"]:
+                        _apply_delta(doc, path_, DELETED if deleted else value)
+                self.stats["replayed"] += 1
+        if good < path.stat().st_size:
+            self.stats["torn_records"] += 1
+            _log.warning("Discarding torn record at the end of %s", path)
+            os.truncate(path, good)
+
+    @staticmethod
+    def _parse(line: bytes) -> dict[str, Any] | None:
+        crc, _, body = line.rstrip(b"\n").partition(b" ")
+        if not line.endswith(b"\n") or not body:
+            return None
+        try:
+            if int(crc, 16) != zlib.crc32(body):
+                return None
+            return loads_json(body)
+        except ValueError:
+            return None
+
+    def _append(self, record: dict[str, Any]) -> None:
+        body = self._codec.encode(record)
+        line = b"%08x %s\n" % (zlib.crc32(body), body)
+        os.write(self._log_fd, line)
+        if self.fsync:
+            os.fsync(self._log_fd)
+        self._log_size += len(line)
+        self.stats["records"] += 1
+
+    # StorageBackend ------------------------------------------------------
+
+    def read(self, guild_id: int) -> dict[str, Any]:
+        with self._lock:
+            doc = self._docs.get(guild_id)
+        return _copy_doc(doc) if doc is not None else {}
+
+    def write(self, guild_id: int, data: dict[str, Any]) -> None:
+        with self._lock:
+            self._append({"g": guild_id, "doc": data})
+            self._commit(guild_id, data)
+
+    def apply(self, guild_id: int, deltas: Sequence[Delta], data: dict[str, Any]) -> None:
+        changes = [[list(d.path), None if d.value is DELETED else d.value, d.value is DELETED] for d in deltas]
+        with self._lock:
+            if guild_id not in self._docs:
+                self._append({"g": guild_id, "doc": data})
+            else:
+                self._append({"g": guild_id, "d": changes})
+            self._commit(guild_id, data)
+
+    def stamp(self, guild_id: int) -> Hashable | None:
+        return self._seq.get(guild_id)
+
+    def guild_ids(self) -> list[int]:
+        with self._lock:
+            return sorted(self._docs)
+
+    def close(self) -> None:
+        if self._compacting is not None:
+            self._compacting.join()
+        if self._log_size:
+            self.compact()
+        with self._lock:
+            os.close(self._log_fd)
+
+    # Compaction ----------------------------------------------------------
+
+    def _commit(self, guild_id: int, data: dict[str, Any]) -> None:
+        # Documents handed in by the storage layer are never mutated in place
+        self._docs[guild_id] = data
+        self._seq[guild_id] = self._seq.get(guild_id, 0) + 1
+        if self._log_size >= self.compact_bytes and self._compacting is None:
+            self._compacting = threading.Thread(target=self._compact_in_background, name="journal-compact", daemon=True)
+            self._compacting.start()
+
+    def _compact_in_background(self) -> None:
+        try:
+            self.compact()
+        except Exception:
+            _log.exception("Journal compaction failed")
+        finally:
+            self._compacting = None
+
+    def compact(self) -> None:
+        """Write a snapshot of every document and start a new log generation."""
+
+        with self._lock:
+            old_generation = self.generation
+            self.generation += 1
+            os.close(self._log_fd)
+            self._log_fd = self._open_log(self.generation)
+            self._log_size = 0
+            docs = dict(self._docs)
+
+        # Appends continue in the new log while the snapshot is written; if we
+        # crash before the rename both logs are replayed on top of the old one.
+        payload = self._codec.encode({"generation": self.generation, "guilds": docs})
+        write_atomic(self.data_dir / self._SNAPSHOT, payload)
+        for gen in self._log_generations():
+            if gen <= old_generation:
+                self._log_path(gen).unlink(missing_ok=True)
+        self.stats["compactions"] += 1
+
+
+# ---------------------------------------------------------------------------
+# Factory & migration
+# ---------------------------------------------------------------------------
+
+_MIGRATED_META_KEY = "json_migrated_at"
+
+
+def migrate_documents(source: StorageBackend, target: StorageBackend, guild_ids: Iterable[int] | None = None) -> int:
+    """Copy every guild document from *source* to *target*; returns the count."""
+
+    count = 0
+    for guild_id in guild_ids if guild_ids is not None else source.guild_ids():
+        target.write(guild_id, source.read(guild_id))
+        count += 1
+    return count
+
+
+def convert_documents(data_dir: Path | str, codec: Codec) -> int:
+    """Rewrite every guild file under *data_dir* with *codec*; returns the count."""
+
+    target = JsonFileBackend(data_dir, codec)
+    count = 0
+    for guild_id in target.guild_ids():
+        path = target._existing_file(guild_id)
+        if path is None:
+            continue
+        try:
+            data = codec.decode(path.read_bytes())
+        except CodecError:
+            # Leave unreadable files alone instead of replacing them with {}
+            _log.warning("Skipping corrupted config file %s", path)
+            continue
+        target.write(guild_id, data)
+        count += 1
+    return count
+
+
+def create_backend(url: str | None, codec: str | None = None) -> StorageBackend:
+    """Instantiate the backend described by *url* (``DATABASE_URL``).
+
+    *codec* (``STORAGE_CODEC``) selects the file format of the JSON file
+    backend; SQLite always stores JSON text.
+    """
+
+    if not url:
+        return JsonFileBackend(codec=get_codec(codec))
+
+    parsed = urlparse(url)
+    if parsed.scheme in ("sqlite", "sqlite3"):
+        # sqlite:///relative.db → "relative.db", sqlite:////abs.db → "/abs.db"
+        path = parsed.path[1:] if parsed.path.startswith("/") else parsed.path
+        backend = SqliteBackend(path or DEFAULT_DATA_DIR / "sentinel.db")
+
+        # One-shot import of the legacy per-guild JSON files
+        if backend.get_meta(_MIGRATED_META_KEY) is None:
+            legacy = JsonFileBackend()
+            count = migrate_documents(legacy, backend)
+            backend.set_meta(_MIGRATED_META_KEY, str(time.time()))
+            if count:
+                _log.info("Migrated %d guild config file(s) from %s into %s", count, legacy.data_dir, backend.path)
+        return backend
+
+    if parsed.scheme == "journal":
+        path = parsed.path[1:] if parsed.path.startswith("/") else parsed.path
+        backend = JournalBackend(path or DEFAULT_DATA_DIR / "journal")
+
+        # Start from the per-guild JSON files on first use
+        if backend.is_empty:
+            legacy = JsonFileBackend()
+            count = migrate_documents(legacy, backend)
+            if count:
+                backend.compact()
+                _log.info("Imported %d guild config file(s) from %s into %s", count, legacy.data_dir, backend.data_dir)
+        return backend
+
+    raise ValueError(f"Unsupported DATABASE_URL scheme: {parsed.scheme!r}")
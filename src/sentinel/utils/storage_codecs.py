@@ -0,0 +1,137 @@
+"""Serialisation formats for stored guild documents.
+
+Selected via ``STORAGE_CODEC`` (file backend only):
+
+* ``json``    – indented stdlib JSON, human readable (default)
+* ``orjson``  – compact JSON written by `orjson` if installed, much faster to
+  encode and parse; falls back to compact stdlib JSON
+* ``msgpack`` – binary MessagePack, smallest and fastest (needs `msgpack`)
+
+Both packages come with the ``storage`` extra
+(``pip install "aeternum-sentinel[storage]"``).
+
+Reading never depends on the configured codec: :func:`decode` detects the
+format from the first byte (JSON documents are objects and start with
+``{``, MessagePack maps never do), so existing files keep working after the
+codec is changed.  ``sentinel convert-configs`` rewrites them in the new
+format.
+"""
+
+from __future__ import annotations
+
+import json
+from typing import Any
+
+# Installs both optional codec packages
+INSTALL_HINT = 'pip install "aeternum-sentinel[storage]"'
+
+try:  # optional speed-ups
+    import orjson
+except ImportError:  # pragma: no cover - optional dependency
+    orjson = None  # type: ignore[assignment]
+
+try:
+    import msgpack
+except ImportError:  # pragma: no cover - optional dependency
+    msgpack = None  # type: ignore[assignment]
+
+
+class CodecError(ValueError):
+    """Raised for undecodable documents or unavailable codecs."""
+
+
+class Codec:
+    """Encodes guild documents to bytes; decoding goes through :func:`decode`."""
+
+    name = "abstract"
+    extension = ".json"
+
+    def encode(self, data: dict[str, Any]) -> bytes:
+        raise NotImplementedError
+
+    def decode(self, raw: bytes) -> dict[str, Any]:
+        return decode(raw)
+
+
+class JsonCodec(Codec):
+    """Indented UTF-8 JSON, byte-compatible with the historic file format."""
+
+    name = "json"
+
+    def encode(self, data: dict[str, Any]) -> bytes:
+        return json.dumps(data, ensure_ascii=False, indent=2).encode("utf-8")
+
+
+class FastJsonCodec(Codec):
+    """Compact JSON via orjson (stdlib fallback)."""
+
+    name = "orjson"
+
+    def encode(self, data: dict[str, Any]) -> bytes:
+        if orjson is not None:
+            # Non-str keys are stringified exactly like the stdlib does
+            return orjson.dumps(data, option=orjson.OPT_NON_STR_KEYS)
+        return json.dumps(data, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+class MsgpackCodec(Codec):
+    """Binary MessagePack documents (``guild_<id>.msgpack``)."""
+
+    name = "msgpack"
+    extension = ".msgpack"
+
+    def __init__(self) -> None:
+        if msgpack is None:
+            raise CodecError(f"STORAGE_CODEC=msgpack requires the 'msgpack' package ({INSTALL_HINT})")
+
+    def encode(self, data: dict[str, Any]) -> bytes:
+        return msgpack.packb(data, use_bin_type=True)
+
+
+CODECS: dict[str, type[Codec]] = {
+    JsonCodec.name: JsonCodec,
+    FastJsonCodec.name: FastJsonCodec,
+    MsgpackCodec.name: MsgpackCodec,
+}
+
+# File extensions the file backend looks for, regardless of the active codec
+EXTENSIONS = tuple(dict.fromkeys(c.extension for c in CODECS.values()))
+
+
+def get_codec(name: str | None) -> Codec:
+    """Return the codec called *name* (``None`` → the default JSON codec)."""
+
+    try:
+        return CODECS[(name or JsonCodec.name).lower()]()
+    except KeyError:
+        raise CodecError(f"Unknown storage codec {name!r}, expected one of {', '.join(CODECS)}") from None
+
+
+def loads_json(raw: bytes | str) -> Any:
+    """Parse JSON with orjson if available."""
+
+    if orjson is not None:
+        return orjson.loads(raw)
+    return json.loads(raw)
+
+
+def decode(raw: bytes) -> dict[str, Any]:
+    """Decode a stored document in any supported format (empty → ``{}``)."""
+
+    stripped = raw.lstrip(b" \t\r\n\xef\xbb\xbf")  # whitespace and UTF-8 BOM
+    if not stripped:
+        return {}
+    try:
+        if stripped[:1] == b"{":
+            data = loads_json(stripped)
+        elif msgpack is None:
+            raise CodecError(f"Document is not JSON and msgpack is not installed ({INSTALL_HINT})")
+        else:
+            data = msgpack.unpackb(stripped, raw=False, strict_map_key=False)
+    except CodecError:
+        raise
+    except (ValueError, TypeError) as exc:  # JSONDecodeError, msgpack's UnpackValueError, ...
+        raise CodecError(str(exc)) from exc
+    if not isinstance(data, dict):
+        raise CodecError(f"Expected a document object, got {type(data).__name__}")
+    return data
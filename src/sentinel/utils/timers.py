@@ -0,0 +1,117 @@
+"""Many cancellable deadlines served by one background task.
+
+:class:`DeadlineScheduler` keeps pending deadlines in a heap and sleeps until
+the earliest one is due, so thousands of timers cost one task instead of one
+sleeping task each::
+
+    timers = DeadlineScheduler(lambda key, payload: ...)
+    timers.schedule(channel.id, 30.0, channel)
+    timers.cancel(channel.id)   # e.g. someone rejoined
+
+Rescheduling a key replaces its deadline.  Cancelled entries are removed from
+the heap lazily.  The callback is called on the event loop and must not block;
+coroutines it returns are scheduled as tasks, which are kept referenced until
+they finish and whose exceptions are logged.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import heapq
+import inspect
+import itertools
+import logging
+import time
+from typing import Any, Callable, Dict, Hashable, Optional, Set
+
+_log = logging.getLogger(__name__)
+
+
+class DeadlineScheduler:
+    """Call ``callback(key, payload)`` once a scheduled deadline has passed."""
+
+    def __init__(self, callback: Callable[[Hashable, Any], Any]):
+        self.callback = callback
+        self._heap: list[tuple[float, int, Hashable]] = []
+        self._pending: Dict[Hashable, tuple[float, int, Any]] = {}
+        self._seq = itertools.count()
+        self._wakeup: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+        # Tasks of coroutine callbacks, referenced so they are not collected mid-flight
+        self._tasks: Set[asyncio.Future] = set()
+        self.fired = 0
+        self.cancelled = 0
+
+    def schedule(self, key: Hashable, delay: float, payload: Any = None) -> None:
+        when = time.monotonic() + max(0.0, delay)
+        token = next(self._seq)
+        self._pending[key] = (when, token, payload)
+        heapq.heappush(self._heap, (when, token, key))
+        if len(self._heap) > 2 * len(self._pending) + 64:
+            self._compact()
+
+        if self._task is None or self._task.done():
+            self._wakeup = asyncio.Event()
+            self._task = asyncio.create_task(self._run())
+        elif self._heap[0][1] == token and self._wakeup is not None:
+            self._wakeup.set()  # new earliest deadline
+
+    def cancel(self, key: Hashable) -> bool:
+        """Forget the deadline of *key*, return whether one was pending."""
+
+        if self._pending.pop(key, None) is None:
+            return False
+        self.cancelled += 1
+        return True
+
+    def close(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+        self._heap.clear()
+        self._pending.clear()
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._pending
+
+    def __len__(self) -> int:
+        return len(self._pending)
+
+    def _compact(self) -> None:
+        self._heap = [(when, token, key) for key, (when, token, _) in self._pending.items()]
+        heapq.heapify(self._heap)
+
+    def _is_current(self, entry: tuple[float, int, Hashable]) -> bool:
+        pending = self._pending.get(entry[2])
+        return pending is not None and pending[1] == entry[1]
+
+    async def _run(self) -> None:
+        assert self._wakeup is not None
+        while True:
+            while self._heap and not self._is_current(self._heap[0]):
+                heapq.heappop(self._heap)
+
+            self._wakeup.clear()
+            timeout = self._heap[0][0] - time.monotonic() if self._heap else None
+            if timeout is None or timeout > 0:
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+
+            _, _, key = heapq.heappop(self._heap)
+            _, _, payload = self._pending.pop(key)
+            self.fired += 1
+            try:
+                result = self.callback(key, payload)
+                if inspect.isawaitable(result):
+                    task = asyncio.ensure_future(result)
+                    self._tasks.add(task)
+                    task.add_done_callback(lambda t, key=key: self._task_done(key, t))
+            except Exception:
+                _log.exception("Deadline callback for %r failed", key)
+
+    def _task_done(self, key: Hashable, task: asyncio.Future) -> None:
+        self._tasks.discard(task)
+        if not task.cancelled() and task.exception() is not None:
+            _log.error("Deadline callback for %r failed", key, exc_info=task.exception())
@@ -0,0 +1,213 @@
+"""Serialized per-guild queue for voice channel REST operations.
+
+When many users join a generator channel at once every event handler used to
+create channels and move members concurrently, which ends in 429 storms and
+channels appearing in random order.  All create/edit/move/delete requests of a
+guild are therefore executed one at a time by a small worker, ordered by
+priority (moves first, spare pool refills last) and FIFO within a priority::
+
+    channel = await queue.submit(guild.id, voice_queue.CREATE, lambda: guild.create_voice_channel(...))
+
+Redundant work is merged before it reaches Discord:
+
+* operations submitted with the same *key* (e.g. deleting the same channel
+  twice or moving a member twice) share one pending entry, the newest
+  callable wins
+* :meth:`VoiceOpQueue.steal` removes a pending operation so the caller can
+  reuse it, e.g. a channel about to be deleted for a new channel in the same
+  category (an edit instead of delete + create)
+
+discord.py already waits for the per-route rate-limit buckets; a 429 that
+still surfaces pauses the guild's queue for the advertised time and the
+operation is retried.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import heapq
+import itertools
+import logging
+import time
+from collections import Counter, deque
+from typing import Any, Awaitable, Callable, Deque, Dict, Hashable, Optional
+
+import discord
+
+_log = logging.getLogger(__name__)
+
+MOVE = "move"
+CREATE = "create"
+EDIT = "edit"
+DELETE = "delete"
+REFILL = "refill"
+
+# Lower value = executed first
+PRIORITIES = {MOVE: 0, CREATE: 1, EDIT: 1, DELETE: 2, REFILL: 3}
+
+
+class VoiceOp:
+    """A pending operation; ``payload`` is free for the submitter (e.g. the channel)."""
+
+    __slots__ = ("kind", "factory", "key", "category_id", "payload", "future", "enqueued_at", "attempts", "cancelled")
+
+    def __init__(
+        self,
+        kind: str,
+        factory: Callable[[], Awaitable[Any]],
+        key: Optional[Hashable],
+        category_id: Optional[int],
+        payload: Any,
+    ):
+        self.kind = kind
+        self.factory = factory
+        self.key = key
+        self.category_id = category_id
+        self.payload = payload
+        self.future: asyncio.Future = asyncio.get_running_loop().create_future()
+        self.enqueued_at = time.perf_counter()
+        self.attempts = 0
+        self.cancelled = False
+
+
+class _GuildQueue:
+    __slots__ = ("heap", "keys", "worker")
+
+    def __init__(self) -> None:
+        self.heap: list[tuple[int, int, VoiceOp]] = []
+        self.keys: Dict[Hashable, VoiceOp] = {}
+        self.worker: Optional[asyncio.Task] = None
+
+
+class VoiceOpQueue:
+    """One serialized, prioritised operation queue per guild."""
+
+    def __init__(self, *, max_retries: int = 3):
+        self.max_retries = max_retries
+        self._guilds: Dict[int, _GuildQueue] = {}
+        self._seq = itertools.count()
+        self._counts: Counter[str] = Counter()
+        self._waits: Dict[str, Deque[float]] = {kind: deque(maxlen=500) for kind in PRIORITIES}
+
+    def submit(
+        self,
+        guild_id: int,
+        kind: str,
+        factory: Callable[[], Awaitable[Any]],
+        *,
+        key: Optional[Hashable] = None,
+        category_id: Optional[int] = None,
+        payload: Any = None,
+    ) -> asyncio.Future:
+        """Queue *factory* (called when the operation is due) and return its future.
+
+        The future resolves to the coroutine's result or raises its exception.
+        """
+
+        queue = self._guilds.setdefault(guild_id, _GuildQueue())
+        if key is not None:
+            pending = queue.keys.get(key)
+            if pending is not None and not pending.cancelled:
+                pending.factory = factory
+                pending.payload = payload
+                self._counts["coalesced"] += 1
+                return pending.future
+
+        op = VoiceOp(kind, factory, key, category_id, payload)
+        if key is not None:
+            queue.keys[key] = op
+        heapq.heappush(queue.heap, (PRIORITIES[kind], next(self._seq), op))
+        self._counts["submitted"] += 1
+        if queue.worker is None or queue.worker.done():
+            queue.worker = asyncio.create_task(self._work(guild_id, queue))
+        return op.future
+
+    def steal(self, guild_id: int, kind: str, predicate: Callable[[VoiceOp], bool]) -> Optional[VoiceOp]:
+        """Take a pending *kind* operation matching *predicate* out of the queue.
+
+        Its future resolves to ``None``; the caller does the work instead.
+        """
+
+        queue = self._guilds.get(guild_id)
+        if queue is None:
+            return None
+        for _, _, op in sorted(queue.heap, key=lambda item: item[:2]):
+            if op.kind == kind and not op.cancelled and predicate(op):
+                self._drop(queue, op)
+                self._counts["merged"] += 1
+                return op
+        return None
+
+    def _drop(self, queue: _GuildQueue, op: VoiceOp) -> None:
+        op.cancelled = True  # lazily removed from the heap
+        if op.key is not None and queue.keys.get(op.key) is op:
+            del queue.keys[op.key]
+        if not op.future.done():
+            op.future.set_result(None)
+
+    def cancel_all(self) -> None:
+        for queue in self._guilds.values():
+            if queue.worker is not None:
+                queue.worker.cancel()
+            for _, _, op in queue.heap:
+                if not op.future.done():
+                    op.future.cancel()
+            queue.heap.clear()
+            queue.keys.clear()
+
+    async def _work(self, guild_id: int, queue: _GuildQueue) -> None:
+        while queue.heap:
+            _, seq, op = heapq.heappop(queue.heap)
+            if op.cancelled:
+                continue
+            if op.key is not None and queue.keys.get(op.key) is op:
+                del queue.keys[op.key]
+            if op.attempts == 0:
+                self._waits[op.kind].append(time.perf_counter() - op.enqueued_at)
+            op.attempts += 1
+            try:
+                result = await op.factory()
+            except discord.HTTPException as exc:
+                if exc.status == 429 and op.attempts <= self.max_retries:
+                    retry_after = float(getattr(exc, "retry_after", 0) or 1.0)
+                    self._counts["rate_limited"] += 1
+                    _log.warning("Voice queue of guild %s rate limited, pausing %.1fs", guild_id, retry_after)
+                    await asyncio.sleep(retry_after)
+                    heapq.heappush(queue.heap, (PRIORITIES[op.kind], seq, op))
+                    continue
+                self._counts["failed"] += 1
+                if not op.future.done():
+                    op.future.set_exception(exc)
+            except Exception as exc:  # pragma: no cover - passed on to the submitter
+                self._counts["failed"] += 1
+                if not op.future.done():
+                    op.future.set_exception(exc)
+            else:
+                self._counts[f"executed_{op.kind}"] += 1
+                if not op.future.done():
+                    op.future.set_result(result)
+
+    def depth(self, guild_id: int) -> int:
+        queue = self._guilds.get(guild_id)
+        return sum(1 for _, _, op in queue.heap if not op.cancelled) if queue else 0
+
+    def stats(self) -> Dict[str, Any]:
+        """Queue depths, counters and wait-time percentiles per operation kind."""
+
+        depths = {gid: self.depth(gid) for gid in self._guilds}
+        waits: Dict[str, Any] = {}
+        for kind, samples in self._waits.items():
+            ms = sorted(s * 1000 for s in samples)
+            if ms:
+                waits[kind] = {
+                    "n": len(ms),
+                    "p50_ms": round(ms[len(ms) // 2], 3),
+                    "p95_ms": round(ms[min(len(ms) - 1, int(len(ms) * 0.95))], 3),
+                    "max_ms": round(ms[-1], 3),
+                }
+        return {
+            **self._counts,
+            "depth": sum(depths.values()),
+            "max_guild_depth": max(depths.values(), default=0),
+            "wait": waits,
+        }
@@ -4,6 +4,7 @@ import secrets
 from typing import Any
 from urllib.parse import urlencode
 
+import discord
 import httpx
 from fastapi import APIRouter, HTTPException, Request, status
 from fastapi.responses import RedirectResponse
@@ -14,6 +15,7 @@ __all__ = [
     "get_session",
     "save_session",
     "require_admin",
+    "require_owner",
 ]
 
 # ---------------------------------------------------------------------------
@@ -113,6 +115,24 @@ def require_admin(guild_id: int, request: Request):  # pragma: no cover
     return session
 
 
+async def require_owner(request: Request):  # pragma: no cover
+    """Validate that the current session user owns the bot application.
+
+    Used for bot-wide endpoints that span all guilds.  Team applications
+    accept the team's admins as owners (see ``commands.Bot.is_owner``).
+    """
+
+    session = get_session(request)
+    if not session:
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Authentication required.")
+
+    bot = request.app.state.bot
+    if not await bot.is_owner(discord.Object(id=int(session["user"]["id"]))):
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Bot owner permissions required.")
+
+    return session
+
+
 # ---------------------------------------------------------------------------
 # Core auth routes (login & callback)
 # ---------------------------------------------------------------------------
@@ -0,0 +1,52 @@
+from fastapi import APIRouter, HTTPException, Request
+
+import sentinel.utils.storage as storage
+from sentinel.utils import config_events, feature_index
+
+from .auth_utils import require_owner
+
+router = APIRouter(tags=["debug"])
+
+
+@router.get("/debug/config-events")
+async def config_event_stats(request: Request):
+    """Subscriber counts and event rates of the config change bus."""
+    await require_owner(request)
+    return {"events": config_events.stats(), "cache": storage.cache_stats()}
+
+
+@router.get("/debug/feature-index")
+async def feature_index_stats(request: Request):
+    """Per-feature counts of gateway events filtered by the feature index."""
+    await require_owner(request)
+    return feature_index.stats()
+
+
+@router.get("/debug/role-icons")
+async def role_icons_stats(request: Request):
+    """Coalesced, echoed and executed nickname updates of the RoleIcons cog."""
+    await require_owner(request)
+    role_cog = request.app.state.bot.get_cog("RoleIcons")
+    if role_cog is None:  # pragma: no cover
+        raise HTTPException(status_code=500, detail="RoleIcons cog not loaded.")
+    return role_cog.stats()
+
+
+@router.get("/debug/voice-channels")
+async def voice_channel_stats(request: Request):
+    """Generator lookup and join-to-move latencies of the auto voice channels."""
+    await require_owner(request)
+    voice_cog = request.app.state.bot.get_cog("VoiceChannelUserCreation")
+    if voice_cog is None:  # pragma: no cover
+        raise HTTPException(status_code=500, detail="VoiceChannelUserCreation cog not loaded.")
+    return voice_cog.stats()
+
+
+@router.get("/debug/reaction-roles")
+async def reaction_role_stats(request: Request):
+    """Indexed panels and merged role mutations of the reaction roles."""
+    await require_owner(request)
+    rr_cog = request.app.state.bot.get_cog("ReactionRoles")
+    if rr_cog is None:  # pragma: no cover
+        raise HTTPException(status_code=500, detail="ReactionRoles cog not loaded.")
+    return rr_cog.stats()
@@ -1,13 +1,23 @@
-from fastapi import APIRouter, HTTPException, Request
+from fastapi import APIRouter, HTTPException, Query, Request
 
 from .auth_utils import require_admin
 
 router = APIRouter(tags=["actions"])
 
 
+def _role_cog(request: Request):
+    role_cog = request.app.state.bot.get_cog("RoleIcons")
+    if role_cog is None:  # pragma: no cover
+        raise HTTPException(status_code=500, detail="RoleIcons cog not loaded.")
+    return role_cog
+
+
 @router.post("/guilds/{guild_id}/apply-role-icons")
 async def apply_role_icons(guild_id: int, request: Request):
-    """Iterate over all guild members and re-apply the Role-Icon nickname format."""
+    """Start re-applying the Role-Icon nickname format to all guild members.
+
+    Returns immediately, poll ``GET`` on the same path for progress.
+    """
 
     require_admin(guild_id, request)
 
@@ -16,13 +26,35 @@ async def apply_role_icons(guild_id: int, request: Request):
     if guild is None:
         raise HTTPException(status_code=404, detail="Guild not found or bot not in guild.")
 
-    role_cog = bot.get_cog("RoleIcons")
-    if role_cog is None:  # pragma: no cover
-        raise HTTPException(status_code=500, detail="RoleIcons cog not loaded.")
+    job = await _role_cog(request).nicknames.start(guild)  # type: ignore[attr-defined]
+    return job.progress()
+
+
+@router.get("/guilds/{guild_id}/apply-role-icons")
+async def apply_role_icons_progress(guild_id: int, request: Request):
+    """Progress of the last bulk nickname update of this guild."""
 
-    updated = 0
-    for member in guild.members:
-        await role_cog._apply_nickname(member)  # type: ignore[attr-defined]
-        updated += 1
+    require_admin(guild_id, request)
+
+    job = _role_cog(request).nicknames.get_job(guild_id)  # type: ignore[attr-defined]
+    if job is None:
+        return {"status": "idle"}
+    return job.progress()
+
+
+@router.get("/guilds/{guild_id}/apply-role-icons/plan")
+async def plan_role_icons(
+    guild_id: int,
+    request: Request,
+    limit: int = Query(100, ge=0, le=10000),
+    old_format: str | None = None,
+):
+    """Dry run: nicknames an apply-role-icons run would change (no Discord calls)."""
+
+    require_admin(guild_id, request)
+
+    guild = request.app.state.bot.get_guild(guild_id)
+    if guild is None:
+        raise HTTPException(status_code=404, detail="Guild not found or bot not in guild.")
 
-    return {"updated": updated} 
+    return _role_cog(request).plan_update(guild, old_format=old_format, limit=limit)  # type: ignore[attr-defined]
@@ -37,15 +37,13 @@ async def set_google_sheet_config(
     if not payload.get("sheet_id"):
         raise HTTPException(status_code=400, detail="sheet_id is required")
 
-    cfg = storage.load_guild_config(guild_id)
-    sheet_cfg = cfg.get("google_sheet", {})
     # Accept additional optional keys for member filtering
     allowed_keys = ("sheet_id", "worksheet_name", "member_scope", "role_ids")
     allowed = {k: v for k, v in payload.items() if k in allowed_keys}
-    # Preserve other keys (e.g., username_mappings)
-    sheet_cfg.update(allowed)
-    cfg["google_sheet"] = sheet_cfg
-    storage.save_guild_config(guild_id, cfg)
+    # Only touch the given keys, other keys (e.g., username_mappings) are preserved
+    await storage.update_guild_config(
+        guild_id, *(storage.set_key(("google_sheet", k), v) for k, v in allowed.items())
+    )
     return {"status": "ok"}
 
 # --- Mapping Columns API ---
@@ -63,11 +61,9 @@ async def get_mapping_columns(guild_id: int, request: Request, worksheet: str |
 async def set_mapping_columns(guild_id: int, request: Request, columns: list = Body(...), worksheet: str | None = None):
     """Setzt die Mapping-Spalten-Konfiguration für das aktuelle Worksheet (ersetzt alle Spaltenregeln)."""
     require_admin(guild_id, request)
-    cfg = storage.load_guild_config(guild_id)
+    cfg = storage.get_guild_config_view(guild_id)
     worksheet_name = worksheet or cfg.get("google_sheet", {}).get("worksheet_name")
     if not worksheet_name:
         raise HTTPException(status_code=400, detail="worksheet_name erforderlich")
-    mapping_columns = cfg.setdefault("mapping_columns", {})
-    mapping_columns[worksheet_name] = columns
-    storage.save_guild_config(guild_id, cfg)
+    await storage.update_guild_config(guild_id, storage.set_key(("mapping_columns", worksheet_name), columns))
     return {"status": "ok"} 
@@ -23,12 +23,10 @@ async def set_username_mapping(
 ):
     require_admin(guild_id, request)
 
-    cfg = storage.load_guild_config(guild_id)
-    sheet_cfg = cfg.setdefault("google_sheet", {})
-    mappings = sheet_cfg.setdefault("username_mappings", {})
-    key = worksheet
-    mappings[key] = {"row": row, "col": col, "direction": direction}
-    storage.save_guild_config(guild_id, cfg)
+    await storage.update_guild_config(
+        guild_id,
+        storage.set_key(("google_sheet", "username_mappings", worksheet), {"row": row, "col": col, "direction": direction}),
+    )
     return {"status": "ok"}
 
 
@@ -49,26 +47,25 @@ async def set_username_mapping_settings(
 
     require_admin(guild_id, request)
 
-    cfg = storage.load_guild_config(guild_id)
-    sheet_cfg = cfg.setdefault("google_sheet", {})
-    mappings = sheet_cfg.setdefault("username_mappings", {})
+    cfg = storage.get_guild_config_view(guild_id)
+    mappings = cfg.get("google_sheet", {}).get("username_mappings", {})
 
-    mapping = mappings.get(worksheet)
-    if mapping is None:
+    if worksheet not in mappings:
         # Mapping must exist already – otherwise nothing to update
         raise HTTPException(status_code=404, detail="Username-Mapping für Worksheet nicht vorhanden")
 
-    mapping["member_scope"] = member_scope
+    mapping_path = ("google_sheet", "username_mappings", worksheet)
+    mutations = [storage.set_key((*mapping_path, "member_scope"), member_scope)]
 
     if member_scope == "role":
         if not role_ids:
             raise HTTPException(status_code=400, detail="role_ids erforderlich für member_scope=role")
-        mapping["role_ids"] = role_ids
+        mutations.append(storage.set_key((*mapping_path, "role_ids"), role_ids))
     else:
         # clear any previous role filter
-        mapping.pop("role_ids", None)
+        mutations.append(storage.delete_key((*mapping_path, "role_ids")))
 
-    storage.save_guild_config(guild_id, cfg)
+    await storage.update_guild_config(guild_id, *mutations)
     return {"status": "ok"}
 
 
@@ -87,13 +84,7 @@ async def delete_username_mapping(
 
     require_admin(guild_id, request)
 
-    cfg = storage.load_guild_config(guild_id)
-    sheet_cfg = cfg.get("google_sheet", {})
-    mappings = sheet_cfg.get("username_mappings", {})
-
-    if worksheet in mappings:
-        mappings.pop(worksheet)
-        storage.save_guild_config(guild_id, cfg)
+    if await storage.update_guild_config(guild_id, storage.delete_key(("google_sheet", "username_mappings", worksheet))):
         return {"status": "deleted"}
 
     raise HTTPException(status_code=404, detail="Mapping nicht gefunden") 
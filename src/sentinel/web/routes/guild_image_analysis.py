@@ -41,56 +41,56 @@ async def set_image_analysis_config(guild_id: int, request: Request, payload: di
     """Update image analysis configuration for the guild."""
     require_admin(guild_id, request)
     
-    cfg = storage.load_guild_config(guild_id)
+    updates = {}
     
     # Update configuration
     if "enabled" in payload:
-        cfg["image_analysis_enabled"] = bool(payload["enabled"])
+        updates["image_analysis_enabled"] = bool(payload["enabled"])
     
     if "channel_id" in payload:
-        cfg["image_analysis_channel_id"] = payload["channel_id"]
+        updates["image_analysis_channel_id"] = payload["channel_id"]
     
     if "second_channel_id" in payload:
-        cfg["image_analysis_second_channel_id"] = payload["second_channel_id"]
+        updates["image_analysis_second_channel_id"] = payload["second_channel_id"]
     
     if "channel_value" in payload:
-        cfg["image_analysis_channel_value"] = int(payload["channel_value"]) if payload["channel_value"] else 1
+        updates["image_analysis_channel_value"] = int(payload["channel_value"]) if payload["channel_value"] else 1
     
     if "second_channel_value" in payload:
-        cfg["image_analysis_second_channel_value"] = int(payload["second_channel_value"]) if payload["second_channel_value"] else 2
+        updates["image_analysis_second_channel_value"] = int(payload["second_channel_value"]) if payload["second_channel_value"] else 2
     
     if "gemini_api_key" in payload:
-        cfg["gemini_api_key"] = payload["gemini_api_key"]
+        updates["gemini_api_key"] = payload["gemini_api_key"]
     
     # Payout tracking configuration
     if "payout_sheet_id" in payload:
-        cfg["payout_sheet_id"] = payload["payout_sheet_id"]
+        updates["payout_sheet_id"] = payload["payout_sheet_id"]
     
     if "payout_worksheet_name" in payload:
-        cfg["payout_worksheet_name"] = payload["payout_worksheet_name"]
+        updates["payout_worksheet_name"] = payload["payout_worksheet_name"]
     
     if "payout_user_column" in payload:
-        cfg["payout_user_column"] = payload["payout_user_column"]
+        updates["payout_user_column"] = payload["payout_user_column"]
     
     if "payout_event_row" in payload:
-        cfg["payout_event_row"] = payload["payout_event_row"]
+        updates["payout_event_row"] = payload["payout_event_row"]
     
     if "payout_event_start_column" in payload:
-        cfg["payout_event_start_column"] = payload["payout_event_start_column"]
+        updates["payout_event_start_column"] = payload["payout_event_start_column"]
     
     if "payout_language" in payload:
-        cfg["payout_language"] = payload["payout_language"]
+        updates["payout_language"] = payload["payout_language"]
     
     if "confirmation_roles" in payload:
-        cfg["confirmation_roles"] = [str(role_id) for role_id in payload["confirmation_roles"]]
+        updates["confirmation_roles"] = [str(role_id) for role_id in payload["confirmation_roles"]]
     
     if "team_stats_sheet_id" in payload:
-        cfg["team_stats_sheet_id"] = payload["team_stats_sheet_id"]
+        updates["team_stats_sheet_id"] = payload["team_stats_sheet_id"]
     
     if "team_stats_worksheet_name" in payload:
-        cfg["team_stats_worksheet_name"] = payload["team_stats_worksheet_name"]
+        updates["team_stats_worksheet_name"] = payload["team_stats_worksheet_name"]
     
-    storage.save_guild_config(guild_id, cfg)
+    await storage.update_guild_config(guild_id, *(storage.set_key(k, v) for k, v in updates.items()))
     return {"status": "ok"}
 
 # ---------------------------------------------------------------------------
@@ -6,35 +6,99 @@ import discord
 from fastapi import APIRouter, Body, HTTPException, Request
 
 from .auth_utils import require_admin
-from sentinel.utils.storage import load_guild_config, save_guild_config
+import sentinel.utils.storage as storage
+from sentinel.utils import reaction_panels
+from sentinel.utils.panel_publisher import update_panel
+from sentinel.utils.reaction_panels import DEFAULT_PANEL_ID, REACTION_ROLES_KEY, panel_path
 
 router = APIRouter(tags=["reaction-roles"]) 
 
+# Panel fields editable through the UI; ``message_id`` is only set by publishing
+PANEL_FIELDS = ("channel_id", "title", "description", "items", "remove_unreacted")
+
+
+def _check_panel_id(panel_id: str) -> None:
+    if not reaction_panels.PANEL_ID_RE.match(panel_id):
+        raise HTTPException(status_code=400, detail="panel_id must be 1-32 chars of a-z, 0-9, _ or -")
+
+
+def _load_panels(guild_id: int) -> dict[str, Any]:
+    return reaction_panels.panels(storage.get_guild_config_view(guild_id).get(REACTION_ROLES_KEY))
+
+
+def _rr_cog(request: Request):
+    rr_cog = request.app.state.bot.get_cog("ReactionRoles")
+    if rr_cog is None:  # pragma: no cover
+        raise HTTPException(status_code=500, detail="ReactionRoles cog not loaded.")
+    return rr_cog
+
 
 @router.get("/guilds/{guild_id}/reaction-roles")
 async def get_reaction_roles(guild_id: int, request: Request) -> dict[str, Any]:
+    """The ``default`` panel in the single-panel shape (kept for compatibility)."""
     require_admin(guild_id, request)
-    cfg = load_guild_config(guild_id)
-    return cfg.get("reaction_roles", {})
+    return dict(_load_panels(guild_id).get(DEFAULT_PANEL_ID, {}))
 
 
-@router.post("/guilds/{guild_id}/reaction-roles")
-async def set_reaction_roles(guild_id: int, request: Request, payload: dict = Body(...)) -> dict[str, str]:
+@router.get("/guilds/{guild_id}/reaction-roles/panels")
+async def list_reaction_role_panels(guild_id: int, request: Request) -> dict[str, Any]:
     require_admin(guild_id, request)
+    return {"panels": _load_panels(guild_id)}
 
+
+async def _save_panel(guild_id: int, panel_id: str, payload: dict) -> None:
     # Minimal validation
     channel_id = payload.get("channel_id")
     items = payload.get("items")
     if not channel_id or not isinstance(items, list):
         raise HTTPException(status_code=400, detail="channel_id and items[] required")
 
-    # Persist configuration and preserve existing message_id so we can edit instead of reposting
-    cfg = load_guild_config(guild_id)
-    existing = cfg.get("reaction_roles") or {}
-    if existing.get("message_id"):
-        payload["message_id"] = existing["message_id"]
-    cfg["reaction_roles"] = payload
-    save_guild_config(guild_id, cfg)
+    # Only the edited fields are written, so an existing message_id is kept and
+    # publishing edits the message instead of reposting
+    mutations = [storage.set_key(panel_path(panel_id, field), payload.get(field)) for field in PANEL_FIELDS]
+    existing = _load_panels(guild_id).get(panel_id) or {}
+    if existing.get("message_id") and not existing.get("message_channel_id"):
+        # Published before the message channel was stored: remember it before channel_id changes
+        mutations.append(storage.set_key(panel_path(panel_id, "message_channel_id"), existing.get("channel_id")))
+    await update_panel(guild_id, *mutations)
+
+
+@router.post("/guilds/{guild_id}/reaction-roles/panels/{panel_id}")
+async def set_reaction_role_panel(
+    guild_id: int, panel_id: str, request: Request, payload: dict = Body(...)
+) -> dict[str, str]:
+    require_admin(guild_id, request)
+    _check_panel_id(panel_id)
+    await _save_panel(guild_id, panel_id, payload)
+    return {"status": "ok"}
+
+
+@router.post("/guilds/{guild_id}/reaction-roles")
+async def set_reaction_roles(guild_id: int, request: Request, payload: dict = Body(...)) -> dict[str, str]:
+    """Save the ``default`` panel (single-panel API kept for compatibility)."""
+    require_admin(guild_id, request)
+    await _save_panel(guild_id, DEFAULT_PANEL_ID, payload)
+    return {"status": "ok"}
+
+
+@router.delete("/guilds/{guild_id}/reaction-roles/panels/{panel_id}")
+async def delete_reaction_role_panel(guild_id: int, panel_id: str, request: Request) -> dict[str, str]:
+    """Remove a panel and, if it was published, its message."""
+    require_admin(guild_id, request)
+
+    panel = _load_panels(guild_id).get(panel_id)
+    if panel is None:
+        raise HTTPException(status_code=404, detail="Panel not found")
+    await update_panel(guild_id, storage.delete_key(panel_path(panel_id)))
+
+    guild: discord.Guild | None = request.app.state.bot.get_guild(guild_id)
+    channel_id = panel.get("message_channel_id") or panel.get("channel_id")
+    channel = guild.get_channel(int(channel_id)) if guild and channel_id else None
+    if isinstance(channel, discord.TextChannel) and panel.get("message_id"):
+        try:
+            await channel.get_partial_message(int(panel["message_id"])).delete()
+        except discord.HTTPException:
+            pass
     return {"status": "ok"}
 
 
@@ -59,107 +123,49 @@ async def list_guild_emojis(guild_id: int, request: Request):
     return emojis
 
 
-@router.post("/guilds/{guild_id}/reaction-roles/publish")
-async def publish_reaction_roles(guild_id: int, request: Request) -> dict[str, Any]:
-    """Create or update the reaction role message and add the configured reactions.
+@router.post("/guilds/{guild_id}/reaction-roles/panels/{panel_id}/publish")
+async def publish_reaction_role_panel(guild_id: int, panel_id: str, request: Request) -> dict[str, Any]:
+    """Start creating or updating the message of one panel and its reactions.
 
-    Returns message_id and a simple status.
+    Other panels of the guild are left untouched. Returns immediately with the
+    job handle, poll ``GET`` on the same path for progress.
     """
     require_admin(guild_id, request)
+    return _start_publish(guild_id, panel_id, request)
+
+
+@router.get("/guilds/{guild_id}/reaction-roles/panels/{panel_id}/publish")
+async def publish_reaction_role_panel_progress(guild_id: int, panel_id: str, request: Request) -> dict[str, Any]:
+    """Progress of the last publish job of this panel."""
+    require_admin(guild_id, request)
+
+    job = _rr_cog(request).publisher.get_job(guild_id, panel_id)  # type: ignore[attr-defined]
+    if job is None:
+        return {"status": "idle", "panel_id": panel_id}
+    return job.progress()
+
+
+@router.post("/guilds/{guild_id}/reaction-roles/publish")
+async def publish_reaction_roles(guild_id: int, request: Request) -> dict[str, Any]:
+    """Publish the ``default`` panel (single-panel API kept for compatibility)."""
+    require_admin(guild_id, request)
+    return _start_publish(guild_id, DEFAULT_PANEL_ID, request)
 
+
+def _start_publish(guild_id: int, panel_id: str, request: Request) -> dict[str, Any]:
     bot = request.app.state.bot
     guild: discord.Guild | None = bot.get_guild(guild_id)
     if guild is None:
         raise HTTPException(status_code=404, detail="Guild not found")
 
-    cfg = load_guild_config(guild_id)
-    rr = cfg.get("reaction_roles")
-    if not rr:
+    panel = _load_panels(guild_id).get(panel_id)
+    if not panel:
         raise HTTPException(status_code=400, detail="No reaction roles configured")
 
-    channel_id = int(rr.get("channel_id"))
-    channel = guild.get_channel(channel_id)
+    channel_id = panel.get("channel_id")
+    channel = guild.get_channel(int(channel_id)) if channel_id else None
     if channel is None or not isinstance(channel, discord.TextChannel):
         raise HTTPException(status_code=400, detail="Configured channel not found or not a text channel")
 
-    title = rr.get("title") or "Reaction Roles"
-    description = rr.get("description") or "React to get roles."
-    items: list[dict[str, Any]] = rr.get("items", [])
-
-    # Build embed
-    embed = discord.Embed(title=title, description=description, color=discord.Color.blurple())
-    for it in items:
-        role_id = it.get("role_id")
-        role = guild.get_role(int(role_id)) if role_id else None
-        # Render role name without raw mention markup to avoid <@&id> text
-        label = f"@{role.name}" if role else f"Role {role_id}"
-        per_item_desc = it.get("description") or ""
-        # Show emoji preview text
-        if it.get("emoji_unicode"):
-            emoji_preview = it["emoji_unicode"]
-        elif it.get("emoji_id"):
-            emoji_preview = f"<:{it.get('emoji_name') or 'emoji'}:{it['emoji_id']}>"
-        else:
-            emoji_preview = ""
-        embed.add_field(name=f"{emoji_preview} {label}", value=per_item_desc or "\u200b", inline=False)
-
-    # Send or edit message
-    message_id = rr.get("message_id")
-    message: discord.Message | None = None
-    if message_id:
-        try:
-            message = await channel.fetch_message(int(message_id))
-        except Exception:
-            message = None
-
-    # If an old message exists but is in a different channel or can't be fetched, delete it and post new
-    if message is None:
-        # Try to remove old message if stored but not found in channel
-        old_id = rr.get("message_id")
-        if old_id:
-            for ch in guild.text_channels:
-                try:
-                    old_msg = await ch.fetch_message(int(old_id))
-                    await old_msg.delete()
-                    break
-                except Exception:
-                    continue
-        message = await channel.send(embed=embed)
-        rr["message_id"] = message.id
-    else:
-        await message.edit(embed=embed)
-
-    # Clear existing reactions and add configured ones
-    try:
-        await message.clear_reactions()
-    except Exception:
-        # Fallback: remove only our own
-        try:
-            for reaction in message.reactions:
-                async for user in reaction.users():
-                    if user == bot.user:
-                        try:
-                            await reaction.remove(user)
-                        except Exception:
-                            pass
-        except Exception:
-            pass
-
-    # Add all reactions
-    for it in items:
-        try:
-            if it.get("emoji_unicode"):
-                await message.add_reaction(it["emoji_unicode"])
-            elif it.get("emoji_id"):
-                e = guild.get_emoji(int(it["emoji_id"]))
-                if e is not None:
-                    await message.add_reaction(e)
-        except discord.HTTPException:
-            # Skip invalid/unusable emojis
-            continue
-
-    # Persist possibly updated config
-    cfg["reaction_roles"] = rr
-    save_guild_config(guild_id, cfg)
-
-    return {"status": "ok", "message_id": rr["message_id"]} 
+    job = _rr_cog(request).publisher.start(guild, panel_id, panel, channel)  # type: ignore[attr-defined]
+    return job.progress()
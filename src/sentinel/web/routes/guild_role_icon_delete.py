@@ -10,8 +10,5 @@ router = APIRouter(tags=["config"])
 @router.delete("/guilds/{guild_id}/role-icons/{role_id}")
 async def delete_role_icon(guild_id: int, role_id: int, request: Request):
     require_admin(guild_id, request)
-    cfg = storage.load_guild_config(guild_id)
-    role_icons = cfg.get("role_icons", {})
-    role_icons.pop(str(role_id), None)
-    storage.save_guild_config(guild_id, cfg)
+    await storage.update_guild_config(guild_id, storage.delete_key(("role_icons", str(role_id))))
     return {"status": "deleted"} 
@@ -22,8 +22,8 @@ async def add_or_update_role_icon(
     entry: RoleIconEntry = Body(...),
 ):
     require_admin(guild_id, request)
-    cfg = storage.load_guild_config(guild_id)
-    role_icons = cfg.setdefault("role_icons", {})
-    role_icons[str(entry.role_id)] = {"emoji": entry.emoji, "priority": entry.priority}
-    storage.save_guild_config(guild_id, cfg)
+    await storage.update_guild_config(
+        guild_id,
+        storage.set_key(("role_icons", str(entry.role_id)), {"emoji": entry.emoji, "priority": entry.priority}),
+    )
     return {"status": "ok"} 
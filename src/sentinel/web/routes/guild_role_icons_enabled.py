@@ -18,7 +18,5 @@ async def get_role_icons_enabled(guild_id: int, request: Request):
 @router.post("/guilds/{guild_id}/role-icons-enabled")
 async def set_role_icons_enabled(guild_id: int, payload: TogglePayload, request: Request):
     require_admin(guild_id, request)
-    cfg = storage.load_guild_config(guild_id)
-    cfg["role_icon_enabled"] = payload.enabled
-    storage.save_guild_config(guild_id, cfg)
+    await storage.update_guild_config(guild_id, storage.set_key("role_icon_enabled", payload.enabled))
     return {"status": "ok"} 
@@ -20,7 +20,5 @@ async def get_ts_message(guild_id: int, request: Request):
 async def update_ts_message(guild_id: int, payload: TsMessagePayload, request: Request):
     """Create or update the TeamSpeak message for a guild."""
     require_admin(guild_id, request)
-    cfg = storage.load_guild_config(guild_id)
-    cfg["ts_message"] = payload.message
-    storage.save_guild_config(guild_id, cfg)
+    await storage.update_guild_config(guild_id, storage.set_key("ts_message", payload.message))
     return {"status": "ok"} 
@@ -23,11 +23,16 @@ async def upsert_voice_channel_user_creation_config(
     request: Request,
 ):
     require_admin(guild_id, request)
-    cfg = storage.load_guild_config(guild_id)
-    vacfg = cfg.setdefault("voice_channel_user_creation_config", {})
-    vacfg[payload.generator_channel_id] = {
-        "target_category_id": payload.target_category_id,
-        "name_pattern": payload.name_pattern or "{username}",
-    }
-    storage.save_guild_config(guild_id, cfg)
+    await storage.update_guild_config(
+        guild_id,
+        storage.set_key(
+            ("voice_channel_user_creation_config", payload.generator_channel_id),
+            {
+                "target_category_id": payload.target_category_id,
+                "name_pattern": payload.name_pattern or "{username}",
+                "pool_size": payload.pool_size,
+                "grace_seconds": payload.grace_seconds,
+            },
+        ),
+    )
     return {"status": "ok"} 
@@ -10,8 +10,7 @@ router = APIRouter(tags=["config"])
 @router.delete("/guilds/{guild_id}/voice-channel-user-creation-config/{generator_id}")
 async def delete_voice_channel_user_creation_config(guild_id: int, generator_id: int, request: Request):
     require_admin(guild_id, request)
-    cfg = storage.load_guild_config(guild_id)
-    vacfg = cfg.get("voice_channel_user_creation_config", {})
-    vacfg.pop(str(generator_id), None)
-    storage.save_guild_config(guild_id, cfg)
+    await storage.update_guild_config(
+        guild_id, storage.delete_key(("voice_channel_user_creation_config", str(generator_id)))
+    )
     return {"status": "deleted"} 
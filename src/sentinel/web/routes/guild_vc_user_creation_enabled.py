@@ -18,7 +18,5 @@ async def get_vc_user_creation_enabled(guild_id: int, request: Request):
 @router.post("/guilds/{guild_id}/voice-channel-user-creation-enabled")
 async def set_vc_user_creation_enabled(guild_id: int, payload: TogglePayload, request: Request):
     require_admin(guild_id, request)
-    cfg = storage.load_guild_config(guild_id)
-    cfg["voice_channel_user_creation_enabled"] = payload.enabled
-    storage.save_guild_config(guild_id, cfg)
+    await storage.update_guild_config(guild_id, storage.set_key("voice_channel_user_creation_enabled", payload.enabled))
     return {"status": "ok"} 
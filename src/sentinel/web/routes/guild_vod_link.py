@@ -20,7 +20,5 @@ async def get_vod_link(guild_id: int, request: Request):
 async def update_vod_link(guild_id: int, payload: VodLinkPayload, request: Request):
     """Create or update the VOD form link for a guild."""
     require_admin(guild_id, request)
-    cfg = storage.load_guild_config(guild_id)
-    cfg["vod_link"] = payload.link
-    storage.save_guild_config(guild_id, cfg)
+    await storage.update_guild_config(guild_id, storage.set_key("vod_link", payload.link))
     return {"status": "ok"} 
@@ -1,4 +1,4 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 
 __all__ = [
     "ConfigResponse",
@@ -34,6 +34,8 @@ class VoiceAutoConfigPayload(BaseModel):
     generator_channel_id: str
     target_category_id: str
     name_pattern: str | None = "{username}" 
+    pool_size: int = Field(0, ge=0, le=25)
+    grace_seconds: int = Field(0, ge=0, le=3600)
 
 
 class ReviewMessagePayload(BaseModel):
@@ -0,0 +1,28 @@
+import asyncio
+
+import pytest
+
+import sentinel.utils.storage as storage
+from sentinel.utils.storage_backends import JsonFileBackend
+
+
+class RecordingBackend(JsonFileBackend):
+    """File backend that remembers the deltas handed to :meth:`apply`."""
+
+    def __init__(self, data_dir):
+        super().__init__(data_dir)
+        self.applied = []
+
+    def apply(self, guild_id, deltas, data):
+        self.applied.append((guild_id, list(deltas)))
+        super().apply(guild_id, deltas, data)
+
+
+@pytest.fixture
+def backend(tmp_path):
+    """A fresh storage backend in *tmp_path* for the duration of the test."""
+
+    backend = RecordingBackend(tmp_path / "data")
+    storage.set_backend(backend)
+    yield backend
+    asyncio.run(storage.flush_pending())
@@ -0,0 +1,113 @@
+import re
+
+from sentinel.utils.channel_numbers import ChannelNumbers, NumberAllocator
+
+
+def test_allocates_lowest_free_number():
+    allocator = NumberAllocator([1, 2, 4, 0, -3])
+
+    assert len(allocator) == 3
+    assert [allocator.allocate() for _ in range(3)] == [3, 5, 6]
+
+
+def test_released_numbers_are_reused_lowest_first():
+    allocator = NumberAllocator()
+    assert [allocator.allocate() for _ in range(4)] == [1, 2, 3, 4]
+
+    allocator.release(3)
+    allocator.release(1)
+    allocator.release(7)  # never allocated
+
+    assert 1 not in allocator
+    assert [allocator.allocate() for _ in range(3)] == [1, 3, 5]
+
+
+def test_release_twice_does_not_hand_out_a_number_twice():
+    allocator = NumberAllocator([1, 2])
+    allocator.release(1)
+    allocator.release(1)
+
+    assert allocator.allocate() == 1
+    assert allocator.allocate() == 3
+
+
+def test_huge_numbers_are_not_expanded_into_gaps():
+    allocator = NumberAllocator([2, 1234567890])
+
+    assert [allocator.allocate() for _ in range(2)] == [1, 3]
+    assert 1234567890 in allocator
+
+    allocator.release(1234567890)
+    allocator.release(2)
+
+    assert allocator._free == [2]
+    assert [allocator.allocate() for _ in range(3)] == [2, 4, 5]
+
+
+REGEX = re.compile(r"^Room (\d+)$")
+
+
+def test_channel_numbers_seed_once_per_category():
+    numbers = ChannelNumbers()
+    existing = [(100, "Room 1"), (101, "Room 3"), (102, "Lobby")]
+
+    first = numbers.allocate(1, REGEX, iter(existing))
+    numbers.assign(200, 1, REGEX, first)
+    # Later calls must not iterate the channels again
+    second = numbers.allocate(1, REGEX, iter(()))
+
+    assert (first, second) == (2, 4)
+    assert numbers.allocate(2, REGEX, iter(())) == 1
+
+
+def test_release_channel_frees_seeded_and_assigned_numbers():
+    numbers = ChannelNumbers()
+    number = numbers.allocate(1, REGEX, iter([(100, "Room 1")]))
+    numbers.assign(200, 1, REGEX, number)
+
+    numbers.release_channel(100)
+    numbers.release_channel(200)
+    numbers.release_channel(999)
+
+    assert numbers.allocate(1, REGEX, iter(())) == 1
+    assert numbers.allocate(1, REGEX, iter(())) == 2
+
+
+def test_channels_created_or_renamed_elsewhere_are_tracked():
+    numbers = ChannelNumbers()
+    assert numbers.allocate(1, REGEX, iter([(100, "Room 1")])) == 2
+
+    numbers.track(300, 1, "Room 3")  # created by an admin
+    numbers.track(301, 1, "Room 1")  # duplicate name, holds no number
+    numbers.track(302, 2, "Room 1")  # category not seeded yet
+    numbers.track(303, None, "Room 5")
+
+    assert numbers.allocate(1, REGEX, iter(())) == 4
+
+    numbers.track(300, 1, "Quiet corner")  # renamed: number 3 is free again
+    numbers.release_channel(301)
+
+    assert numbers.allocate(1, REGEX, iter(())) == 3
+    assert numbers.allocate(1, REGEX, iter(())) == 5
+
+
+def test_tracking_own_channels_keeps_their_number():
+    numbers = ChannelNumbers()
+    number = numbers.allocate(1, REGEX, iter(()))
+    # The gateway event may arrive before or after assign()
+    numbers.track(200, 1, f"Room {number}")
+    numbers.assign(200, 1, REGEX, number)
+    numbers.track(200, 1, f"Room {number}")
+
+    assert numbers.allocate(1, REGEX, iter(())) == 2
+    numbers.release_channel(200)
+    assert numbers.allocate(1, REGEX, iter(())) == 1
+
+
+def test_drop_category_reseeds():
+    numbers = ChannelNumbers()
+    numbers.allocate(1, REGEX, iter([(100, "Room 1")]))
+
+    numbers.drop_category(1)
+
+    assert numbers.allocate(1, REGEX, iter([(100, "Room 1"), (101, "Room 2")])) == 3
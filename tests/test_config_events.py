@@ -0,0 +1,120 @@
+import asyncio
+import threading
+
+import pytest
+
+import sentinel.utils.storage as storage
+from sentinel.utils import config_events
+from sentinel.utils.config_events import ConfigChange
+
+
+@pytest.fixture
+def subscribe():
+    """``config_events.subscribe`` that unsubscribes again after the test."""
+
+    subs = []
+
+    def _subscribe(*args, **kwargs):
+        sub = config_events.subscribe(*args, **kwargs)
+        subs.append(sub)
+        return sub
+
+    yield _subscribe
+    for sub in subs:
+        sub.unsubscribe()
+
+
+def _change(guild_id=1, keys=frozenset({"a"}), source="update"):
+    return ConfigChange(guild_id, 1, keys, source)
+
+
+def test_touches():
+    assert _change(keys=frozenset({"a", "b"})).touches("b", "c")
+    assert not _change(keys=frozenset({"a"})).touches("b")
+    assert _change(keys=None).touches("b")
+
+
+def test_topics(subscribe):
+    seen = []
+    subscribe(lambda c: seen.append("all"))
+    subscribe(lambda c: seen.append("guild"), guild_id=1)
+    subscribe(lambda c: seen.append("key"), key="a")
+    subscribe(lambda c: seen.append("guild_key"), guild_id=1, key="a")
+    subscribe(lambda c: seen.append("other_guild"), guild_id=2)
+    subscribe(lambda c: seen.append("other_key"), key="b")
+
+    config_events.publish(_change())
+
+    assert sorted(seen) == ["all", "guild", "guild_key", "key"]
+
+
+def test_unknown_keys_reach_key_subscribers_once(subscribe):
+    seen = []
+    callback = seen.append
+    subscribe(callback, key="a")
+    subscribe(callback, guild_id=1, key="b")
+
+    config_events.publish(_change(keys=None))
+
+    assert len(seen) == 2
+
+
+def test_unsubscribe(subscribe):
+    seen = []
+    sub = subscribe(seen.append, guild_id=1)
+
+    sub.unsubscribe()
+    config_events.publish(_change())
+
+    assert seen == []
+
+
+def test_failing_subscriber_does_not_stop_delivery(subscribe):
+    seen = []
+
+    def broken(change):
+        raise RuntimeError("boom")
+
+    errors = config_events.stats()["errors"]
+    subscribe(broken, guild_id=1)
+    subscribe(seen.append, guild_id=1)
+
+    config_events.publish(_change())
+
+    assert len(seen) == 1
+    assert config_events.stats()["errors"] == errors + 1
+
+
+def test_storage_publishes_the_changed_keys(backend, subscribe):
+    seen = []
+    subscribe(seen.append, guild_id=10)
+
+    asyncio.run(storage.update_guild_config(10, storage.set_key("a", 1), storage.set_key(("b", "c"), 2)))
+    storage.save_guild_config(10, {"a": 1, "b": {"c": 2}, "d": 3})
+
+    assert [(c.source, c.keys) for c in seen] == [("update", frozenset({"a", "b"})), ("save", frozenset({"d"}))]
+    assert seen[0].version < seen[1].version
+
+
+def test_changes_published_in_a_thread_are_delivered_on_the_loop(subscribe):
+    threads = []
+
+    async def run():
+        subscribe(lambda change: threads.append(threading.get_ident()), guild_id=1)
+        await asyncio.to_thread(config_events.publish, _change())
+        await asyncio.sleep(0)
+
+    asyncio.run(run())
+
+    assert threads == [threading.get_ident()]
+
+
+def test_changes_without_a_running_loop_are_delivered_directly(subscribe):
+    threads = []
+    subscribe(lambda change: threads.append(threading.get_ident()), guild_id=1)
+
+    thread = threading.Thread(target=config_events.publish, args=(_change(),))
+    thread.start()
+    thread.join()
+
+    assert threads == [thread.ident]
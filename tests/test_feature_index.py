@@ -0,0 +1,119 @@
+import asyncio
+
+import pytest
+
+import sentinel.utils.storage as storage
+from sentinel.utils import feature_index
+
+
+@pytest.fixture(autouse=True)
+def index(backend):
+    feature_index.drop()
+    yield
+    feature_index.drop()
+
+
+def _configure(guild_id, **values):
+    asyncio.run(storage.update_guild_config(guild_id, *(storage.set_key(k, v) for k, v in values.items())))
+
+
+def test_unconfigured_guild_has_nothing_enabled():
+    for feature in feature_index.FEATURES:
+        assert not feature_index.is_enabled(feature, 1)
+    assert not feature_index.watches(feature_index.VOICE_CHANNELS, 1, 5)
+
+
+def test_enabled_features():
+    _configure(1, role_icon_enabled=True, google_sheet={"sheet_id": "x"})
+
+    assert feature_index.is_enabled(feature_index.ROLE_ICONS, 1)
+    assert feature_index.is_enabled(feature_index.GOOGLE_SHEET, 1)
+    assert not feature_index.is_enabled(feature_index.IMAGE_ANALYSIS, 1)
+
+
+def test_image_analysis_watches_its_channels():
+    _configure(
+        1,
+        image_analysis_enabled=True,
+        image_analysis_channel_id="100",
+        image_analysis_second_channel_id="101",
+    )
+
+    assert feature_index.watches(feature_index.IMAGE_ANALYSIS, 1, None, 100)
+    assert feature_index.watches(feature_index.IMAGE_ANALYSIS, 1, 101)
+    assert not feature_index.watches(feature_index.IMAGE_ANALYSIS, 1, 102, None)
+
+
+def test_voice_watches_generators_and_auto_channels():
+    _configure(
+        1,
+        voice_channel_user_creation_enabled=True,
+        voice_channel_user_creation_config={"200": {"target_category_id": "1"}},
+        voice_channel_user_creation_autochannels=[300],
+    )
+
+    assert feature_index.watches(feature_index.VOICE_CHANNELS, 1, 200)
+    assert feature_index.watches(feature_index.VOICE_CHANNELS, 1, None, 300)
+    assert not feature_index.watches(feature_index.VOICE_CHANNELS, 1, 400, None)
+
+    _configure(1, voice_channel_user_creation_enabled=False)
+    assert not feature_index.watches(feature_index.VOICE_CHANNELS, 1, 200)
+
+
+def test_config_changes_reindex_the_guild():
+    _configure(1, voice_channel_user_creation_enabled=True, voice_channel_user_creation_autochannels=[300])
+    assert not feature_index.watches(feature_index.VOICE_CHANNELS, 1, 301)
+
+    asyncio.run(storage.update_guild_config(1, storage.add_to_set("voice_channel_user_creation_autochannels", 301)))
+
+    assert feature_index.watches(feature_index.VOICE_CHANNELS, 1, 301)
+
+
+def test_unrelated_changes_keep_the_index():
+    _configure(1, role_icon_enabled=True)
+    feature_index.is_enabled(feature_index.ROLE_ICONS, 1)
+    entry = feature_index._guilds[1]
+
+    _configure(1, prefix="?", role_icons_job={"status": "running"})
+    assert feature_index._guilds.get(1) is entry
+
+    _configure(1, role_icon_enabled=False)
+    assert 1 not in feature_index._guilds
+    assert not feature_index.is_enabled(feature_index.ROLE_ICONS, 1)
+
+
+def test_auto_channel_changes_only_refresh_the_channel_ids():
+    _configure(
+        1,
+        voice_channel_user_creation_enabled=True,
+        voice_channel_user_creation_config={"200": {}},
+        voice_channel_user_creation_autochannels=[300],
+    )
+    assert feature_index.watches(feature_index.VOICE_CHANNELS, 1, 300)
+    entry = feature_index._guilds[1]
+
+    asyncio.run(
+        storage.update_guild_config(
+            1,
+            storage.remove_from_set("voice_channel_user_creation_autochannels", 300),
+            storage.add_to_set("voice_channel_user_creation_autochannels", 301),
+        )
+    )
+
+    assert feature_index.watches(feature_index.VOICE_CHANNELS, 1, 301)
+    assert not feature_index.watches(feature_index.VOICE_CHANNELS, 1, 300)
+    assert feature_index.watches(feature_index.VOICE_CHANNELS, 1, 200)
+    assert feature_index._guilds[1] is entry
+
+
+def test_stats_count_filtered_events():
+    _configure(1, role_icon_enabled=True)
+    before = feature_index.stats()["features"][feature_index.ROLE_ICONS]
+
+    feature_index.is_enabled(feature_index.ROLE_ICONS, 1)
+    feature_index.is_enabled(feature_index.ROLE_ICONS, 2)
+
+    after = feature_index.stats()["features"][feature_index.ROLE_ICONS]
+    assert after["passed"] == before["passed"] + 1
+    assert after["filtered"] == before["filtered"] + 1
+    assert after["enabled_guilds"] == 1
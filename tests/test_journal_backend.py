@@ -0,0 +1,105 @@
+from sentinel.utils.storage_backends import DELETED, Delta, JournalBackend
+
+
+def _open(path, **kwargs):
+    return JournalBackend(path, fsync=False, **kwargs)
+
+
+def test_replays_documents_and_deltas(tmp_path):
+    journal = _open(tmp_path)
+    journal.write(1, {"a": 1, "b": {"c": 2}})
+    journal.apply(1, [Delta(("b", "c"), 3), Delta(("a",), DELETED)], {"b": {"c": 3}})
+    journal.apply(2, [Delta(("x",), 1)], {"x": 1})
+    del journal  # simulate a crash: no close(), no compaction
+
+    reopened = _open(tmp_path)
+
+    assert reopened.read(1) == {"b": {"c": 3}}
+    assert reopened.read(2) == {"x": 1}
+    assert reopened.stats["replayed"] == 3
+    reopened.close()
+
+
+def test_torn_record_is_cut_off(tmp_path):
+    journal = _open(tmp_path)
+    journal.write(1, {"a": 1})
+    journal.apply(1, [Delta(("a",), 2)], {"a": 2})
+    log = journal._log_path(journal.generation)
+    size = log.stat().st_size
+    # Crash in the middle of the second append
+    with open(log, "r+b") as fh:
+        fh.truncate(size - 5)
+
+    reopened = _open(tmp_path)
+
+    assert reopened.read(1) == {"a": 1}
+    assert reopened.stats["torn_records"] == 1
+    assert log.stat().st_size < size - 5
+    reopened.write(1, {"a": 3})
+    reopened.close()
+    assert _open(tmp_path).read(1) == {"a": 3}
+
+
+def test_corrupted_record_stops_the_replay(tmp_path):
+    journal = _open(tmp_path)
+    journal.write(1, {"a": 1})
+    journal.write(1, {"a": 2})
+    log = journal._log_path(journal.generation)
+    lines = log.read_bytes().splitlines(keepends=True)
+    log.write_bytes(lines[0] + lines[1].replace(b"2", b"9"))
+
+    assert _open(tmp_path).read(1) == {"a": 1}
+
+
+def test_compaction_writes_a_snapshot_and_starts_a_new_log(tmp_path):
+    journal = _open(tmp_path)
+    for i in range(10):
+        journal.write(1, {"n": i})
+    first = journal.generation
+
+    journal.compact()
+
+    assert journal.generation == first + 1
+    assert not journal._log_path(first).exists()
+    assert journal._log_size == 0
+    journal.apply(1, [Delta(("m",), 1)], {"n": 9, "m": 1})
+    del journal
+
+    reopened = _open(tmp_path)
+    assert reopened.read(1) == {"n": 9, "m": 1}
+    # Only the record written after the snapshot is replayed
+    assert reopened.stats["replayed"] == 1
+    reopened.close()
+
+
+def test_close_compacts_the_log(tmp_path):
+    journal = _open(tmp_path)
+    journal.write(1, {"a": 1})
+    journal.close()
+
+    reopened = _open(tmp_path)
+    assert reopened.stats["replayed"] == 0
+    assert reopened.read(1) == {"a": 1}
+    reopened.close()
+
+
+def test_log_outgrowing_the_limit_compacts_in_the_background(tmp_path):
+    journal = _open(tmp_path, compact_bytes=200)
+    for i in range(20):
+        journal.write(1, {"n": i, "pad": "x" * 20})
+    if journal._compacting is not None:
+        journal._compacting.join()
+
+    assert journal.stats["compactions"] >= 1
+    journal.close()
+    assert _open(tmp_path).read(1)["n"] == 19
+
+
+def test_reads_are_copies(tmp_path):
+    journal = _open(tmp_path)
+    journal.write(1, {"ids": [1]})
+
+    journal.read(1)["ids"].append(2)
+
+    assert journal.read(1) == {"ids": [1]}
+    journal.close()
@@ -0,0 +1,105 @@
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+import sentinel.utils.storage as storage
+from sentinel.utils import nickname_engine
+from sentinel.utils.nickname_engine import JOB_KEY, NicknameChange, NicknameEngine
+
+
+class FakeMember:
+    def __init__(self, name, gate=None):
+        self.display_name = name
+        self.gate = gate
+        self.edits = []
+
+    async def edit(self, *, nick, reason=None):
+        if self.gate is not None:
+            await self.gate.wait()
+        self.edits.append(nick)
+        self.display_name = nick
+
+
+@pytest.fixture
+def plans(backend, monkeypatch):
+    """Members to rename per guild id, served instead of the real planner."""
+
+    plans = SimpleNamespace(members={}, calls=[])
+
+    def plan(guild, members=None, *, old_format=None):
+        plans.calls.append((guild.id, old_format))
+        members = plans.members.get(guild.id, ())
+        changes = [NicknameChange(m, m.display_name, f"[x] {m.display_name}") for m in members]
+        return changes, {"members": len(changes)}
+
+    monkeypatch.setattr(nickname_engine, "plan_nicknames", plan)
+    return plans
+
+
+def _checkpoint(guild_id):
+    return storage.get_guild_config_view(guild_id).get(JOB_KEY)
+
+
+def test_finished_job_removes_its_checkpoint(plans):
+    members = [FakeMember("a"), FakeMember("b")]
+    plans.members[1] = members
+
+    async def run():
+        engine = NicknameEngine(SimpleNamespace(guilds=[]))
+        job = await engine.start(SimpleNamespace(id=1), reason="Test")
+        assert _checkpoint(1) == {"status": "running", "old_format": None, "reason": "Test"}
+        await job.task
+        return job
+
+    job = asyncio.run(run())
+
+    assert job.status == "done"
+    assert (job.total, job.edited) == (2, 2)
+    assert [m.edits for m in members] == [["[x] a"], ["[x] b"]]
+    assert _checkpoint(1) is None
+
+
+def test_interrupted_job_is_resumed(plans):
+    async def interrupt():
+        gate = asyncio.Event()
+        plans.members[2] = [FakeMember("a", gate)]
+        engine = NicknameEngine(SimpleNamespace(guilds=[]))
+        job = await engine.start(SimpleNamespace(id=2), old_format="{name}", reason="Format")
+        await asyncio.sleep(0)
+        engine.cancel_all()
+        with pytest.raises(asyncio.CancelledError):
+            await job.task
+        return job
+
+    job = asyncio.run(interrupt())
+    assert job.status == "cancelled"
+    assert _checkpoint(2) == {"status": "running", "old_format": "{name}", "reason": "Format"}
+
+    # After a restart only the checkpoint survives
+    member = FakeMember("a")
+    plans.members[2] = [member]
+
+    async def resume():
+        guilds = [SimpleNamespace(id=2), SimpleNamespace(id=3)]
+        engine = NicknameEngine(SimpleNamespace(guilds=guilds))
+        assert await engine.resume_interrupted() == 1
+        job = engine.get_job(2)
+        await job.task
+        return job
+
+    job = asyncio.run(resume())
+
+    assert (job.old_format, job.reason, job.status) == ("{name}", "Format", "done")
+    assert plans.calls[-1] == (2, "{name}")
+    assert member.edits == ["[x] a"]
+    assert _checkpoint(2) is None
+
+
+def test_resume_ignores_finished_checkpoints(plans):
+    asyncio.run(storage.update_guild_config(4, storage.set_key(JOB_KEY, {"status": "done"})))
+
+    engine = NicknameEngine(SimpleNamespace(guilds=[SimpleNamespace(id=4), SimpleNamespace(id=5)]))
+
+    assert asyncio.run(engine.resume_interrupted()) == 0
+    assert engine.jobs == {}
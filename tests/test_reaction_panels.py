@@ -0,0 +1,81 @@
+from sentinel.utils import reaction_panels
+from sentinel.utils.snapshots import ReactionRolesSnapshot
+from sentinel.utils.storage import _apply_mutation, set_key, transform_key
+
+LEGACY = {
+    "channel_id": "10",
+    "message_id": 20,
+    "title": "Classes",
+    "items": [{"emoji_unicode": "🛡️", "role_id": "30"}, {"emoji_id": "40", "emoji_name": "axe", "role_id": "31"}],
+}
+
+
+def test_legacy_config_is_presented_as_default_panel():
+    assert reaction_panels.is_legacy(LEGACY)
+    assert reaction_panels.panels(LEGACY) == {"default": LEGACY}
+
+
+def test_panels_layout():
+    rr = {"panels": {"a": {"channel_id": "1"}, "broken": "x"}}
+
+    assert not reaction_panels.is_legacy(rr)
+    assert reaction_panels.panels(rr) == {"a": {"channel_id": "1"}}
+    assert reaction_panels.panels(None) == {}
+    assert reaction_panels.panels({}) == {}
+
+
+def test_migration_wraps_legacy_panel():
+    assert reaction_panels.migration(LEGACY) == {"panels": {"default": LEGACY}}
+    assert reaction_panels.migration({"panels": {}}) is None
+    assert reaction_panels.migration(None) is None
+
+
+def test_migration_runs_with_panel_updates():
+    doc = {"reaction_roles": LEGACY, "other": 1}
+    mutations = [
+        transform_key(reaction_panels.REACTION_ROLES_KEY, reaction_panels.migration),
+        set_key(reaction_panels.panel_path("weapons", "title"), "Weapons"),
+    ]
+    for m in mutations:
+        doc, _ = _apply_mutation(doc, m)
+
+    assert doc == {
+        "reaction_roles": {"panels": {"default": LEGACY, "weapons": {"title": "Weapons"}}},
+        "other": 1,
+    }
+    # Already migrated: the transform is a no-op
+    assert _apply_mutation(doc, mutations[0]) == (doc, None)
+
+
+def test_snapshot_reads_both_layouts():
+    for cfg in ({"reaction_roles": LEGACY}, {"reaction_roles": reaction_panels.migration(LEGACY)}):
+        rr = ReactionRolesSnapshot(cfg)
+
+        assert list(rr.panels) == ["default"]
+        panel = rr.by_message[20]
+        assert panel.channel_id == 10
+        assert panel.role_ids == {30, 31}
+        assert panel.remove_unreacted is False
+        assert panel.role_for(None, "🛡️") == 30
+        assert panel.role_for(40, "axe") == 31
+        assert panel.role_for(None, "🗡️") is None
+
+
+def test_snapshot_indexes_every_published_panel():
+    cfg = {
+        "reaction_roles": {
+            "panels": {
+                "a": {"message_id": 1, "items": [{"emoji_unicode": "🅰️", "role_id": 5}]},
+                "b": {"message_id": 2, "remove_unreacted": True, "items": [{"emoji_unicode": "🅱️", "role_id": 6}]},
+                "draft": {"items": [{"emoji_unicode": "🆎", "role_id": 7}]},
+                "empty": {"message_id": 3, "items": []},
+            }
+        }
+    }
+
+    rr = ReactionRolesSnapshot(cfg)
+
+    assert set(rr.panels) == {"a", "b", "draft", "empty"}
+    assert set(rr.by_message) == {1, 2}
+    assert rr.by_message[2].role_for(None, "🅱️") == 6
+    assert rr.by_message[2].remove_unreacted is True
@@ -0,0 +1,171 @@
+import asyncio
+from types import SimpleNamespace
+
+import discord
+import pytest
+
+import sentinel.utils.storage as storage
+from sentinel.utils import reaction_reconcile
+from sentinel.utils.reaction_reconcile import CHECKPOINT_KEY, ReactionReconciler
+from sentinel.utils.role_mutations import RoleMutationBuffer
+
+EMOJI = "🅰️"
+CURSOR = f"60:{EMOJI}"
+
+
+class FakeRole:
+    def __init__(self, guild, role_id):
+        self.guild = guild
+        self.id = role_id
+
+    @property
+    def members(self):
+        return [m for m in self.guild.members.values() if self in m.roles]
+
+
+class FakeMember:
+    def __init__(self, guild, member_id):
+        self.guild = guild
+        self.id = member_id
+        self.bot = False
+        self.roles = []
+
+    async def add_roles(self, role, reason=None):
+        self.roles.append(role)
+
+    async def remove_roles(self, role, reason=None):
+        self.roles.remove(role)
+
+
+class FakeReaction:
+    def __init__(self, user_ids, fail_after=None):
+        self.emoji = EMOJI
+        self.user_ids = sorted(user_ids)
+        self.fail_after = fail_after
+
+    async def users(self, *, limit, after=None):
+        after = after.id if after else 0
+        if after == self.fail_after:
+            raise RuntimeError("connection lost")
+        for uid in [u for u in self.user_ids if u > after][:limit]:
+            yield SimpleNamespace(id=uid, bot=False)
+
+
+class FakeChannel(discord.TextChannel):
+    def __init__(self, message):
+        self.message = message
+
+    async def fetch_message(self, message_id):
+        return self.message
+
+
+class FakeGuild:
+    def __init__(self, guild_id, member_ids, reaction):
+        self.id = guild_id
+        self.chunked = True
+        self.members = {mid: FakeMember(self, mid) for mid in member_ids}
+        self.role = FakeRole(self, 70)
+        self.channel = FakeChannel(SimpleNamespace(reactions=[reaction]))
+
+    def get_member(self, member_id):
+        return self.members.get(member_id)
+
+    def get_role(self, role_id):
+        return self.role if role_id == self.role.id else None
+
+    def get_channel(self, channel_id):
+        return self.channel if channel_id == 50 else None
+
+    def holders(self):
+        return sorted(m.id for m in self.role.members)
+
+
+@pytest.fixture(autouse=True)
+def small_pages(backend, monkeypatch):
+    monkeypatch.setattr(reaction_reconcile, "PAGE_SIZE", 2)
+
+
+def _setup(guild_id, reacted, holders, *, members=range(1, 10), fail_after=None, remove_unreacted=False):
+    panel = {
+        "channel_id": "50",
+        "message_id": 60,
+        "remove_unreacted": remove_unreacted,
+        "items": [{"emoji_unicode": EMOJI, "role_id": "70"}],
+    }
+    asyncio.run(storage.update_guild_config(guild_id, storage.set_key("reaction_roles", {"panels": {"p": panel}})))
+    guild = FakeGuild(guild_id, members, FakeReaction(reacted, fail_after))
+    for mid in holders:
+        guild.members[mid].roles.append(guild.role)
+    return guild
+
+
+def _reconcile(guild):
+    reconciler = ReactionReconciler(SimpleNamespace(guilds=[guild]), batch_pause=0)
+    asyncio.run(reconciler.reconcile_guild(guild))
+    return reconciler
+
+
+def _cursors(guild_id):
+    return storage.get_guild_config_view(guild_id).get(CHECKPOINT_KEY)
+
+
+def test_missing_roles_are_added_and_others_kept():
+    guild = _setup(1, reacted=[1, 2, 3, 5], holders=[2, 4, 6])
+
+    reconciler = _reconcile(guild)
+
+    assert guild.holders() == [1, 2, 3, 4, 5, 6]
+    assert (reconciler.counters["added"], reconciler.counters["removed"]) == (3, 0)
+    assert reconciler.counters["pages"] == 3
+    assert not _cursors(1)
+
+
+def test_opted_in_panels_remove_roles_without_reaction():
+    guild = _setup(5, reacted=[1, 2, 3, 5], holders=[2, 4, 6], remove_unreacted=True)
+
+    reconciler = _reconcile(guild)
+
+    assert guild.holders() == [1, 2, 3, 5]
+    assert (reconciler.counters["added"], reconciler.counters["removed"]) == (3, 2)
+
+
+def test_cursor_is_checkpointed_at_most_every_interval(monkeypatch):
+    guild = _setup(2, reacted=[1, 2, 3, 4, 5], holders=[], fail_after=2)
+
+    with pytest.raises(RuntimeError):
+        _reconcile(guild)
+
+    assert guild.holders() == [1, 2]
+    assert not _cursors(2)
+
+    monkeypatch.setattr(reaction_reconcile, "CHECKPOINT_INTERVAL", 0)
+    with pytest.raises(RuntimeError):
+        _reconcile(guild)
+
+    assert _cursors(2) == {CURSOR: 2}
+
+
+def test_walk_resumes_after_the_cursor():
+    guild = _setup(3, reacted=[1, 2, 3, 4, 5], holders=[])
+    asyncio.run(storage.update_guild_config(3, storage.set_key(CHECKPOINT_KEY, {CURSOR: 2})))
+
+    reconciler = _reconcile(guild)
+
+    assert guild.holders() == [3, 4, 5]
+    assert reconciler.counters["pages"] == 2
+    assert not _cursors(3)
+
+
+def test_members_with_live_role_changes_are_skipped():
+    guild = _setup(4, reacted=[1, 2, 3], holders=[])
+
+    async def run():
+        mutations = RoleMutationBuffer(window=60)
+        mutations.remove(guild.members[2], guild.role)
+        reconciler = ReactionReconciler(SimpleNamespace(guilds=[guild]), mutations=mutations, batch_pause=0)
+        await reconciler.reconcile_guild(guild)
+        await mutations.flush()
+
+    asyncio.run(run())
+
+    assert guild.holders() == [1, 3]
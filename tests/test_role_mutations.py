@@ -0,0 +1,181 @@
+import asyncio
+import time
+from types import SimpleNamespace
+
+from sentinel.utils import role_mutations
+from sentinel.utils.role_mutations import RoleMutationBuffer
+
+
+class FakeRole:
+    def __init__(self, role_id, default=False):
+        self.id = role_id
+        self.default = default
+
+    def is_default(self):
+        return self.default
+
+
+class FakeGuild:
+    def __init__(self, guild_id):
+        self.id = guild_id
+        self.members = {}
+
+    def get_member(self, member_id):
+        return self.members.get(member_id)
+
+
+class FakeMember:
+    def __init__(self, member_id, role_ids=(), guild=None):
+        self.id = member_id
+        self.guild = guild or FakeGuild(1)
+        self.guild.members[member_id] = self
+        self.roles = [FakeRole(self.guild.id, default=True), *(FakeRole(rid) for rid in role_ids)]
+        self.calls = []
+
+    async def add_roles(self, role, reason=None):
+        self.calls.append(("add", role.id, reason))
+
+    async def remove_roles(self, role, reason=None):
+        self.calls.append(("remove", role.id, reason))
+
+    async def edit(self, *, roles, reason=None):
+        self.calls.append(("edit", sorted(r.id for r in roles), reason))
+
+
+def _role(role_id):
+    return SimpleNamespace(id=role_id)
+
+
+def test_single_change_uses_add_roles():
+    member = FakeMember(5)
+
+    async def run():
+        buffer = RoleMutationBuffer(window=0.01)
+        buffer.add(member, _role(10), reason="opt-in")
+        await asyncio.sleep(0.05)
+        return buffer.stats()
+
+    stats = asyncio.run(run())
+
+    assert member.calls == [("add", 10, "opt-in")]
+    assert (stats["requested"], stats["calls"], stats["pending"]) == (1, 1, 0)
+
+
+def test_opposing_intents_cancel_out():
+    member = FakeMember(5, role_ids=[11])
+
+    async def run():
+        buffer = RoleMutationBuffer(window=60)
+        buffer.add(member, _role(10))
+        buffer.remove(member, _role(10))
+        buffer.remove(member, _role(11))
+        buffer.add(member, _role(11))
+        await buffer.flush()
+        return buffer.stats()
+
+    stats = asyncio.run(run())
+
+    assert member.calls == []
+    assert (stats["cancelled"], stats["noop"], stats["saved"]) == (2, 1, 4)
+
+
+def test_several_changes_become_one_edit():
+    member = FakeMember(5, role_ids=[11, 12])
+
+    async def run():
+        buffer = RoleMutationBuffer(window=60)
+        buffer.add(member, _role(10), reason="panel")
+        buffer.remove(member, _role(11), reason="panel")
+        buffer.add(member, _role(12))  # already there
+        await buffer.flush()
+        return buffer.stats()
+
+    stats = asyncio.run(run())
+
+    assert member.calls == [("edit", [10, 12], None)]
+    assert (stats["resolved"], stats["calls"], stats["saved"]) == (3, 1, 2)
+
+
+def test_members_are_buffered_separately():
+    first, second = FakeMember(5), FakeMember(6, role_ids=[10])
+
+    async def run():
+        buffer = RoleMutationBuffer(window=60)
+        buffer.add(first, _role(10))
+        buffer.remove(second, _role(10))
+        assert buffer.stats()["pending"] == 2
+        await buffer.flush()
+
+    asyncio.run(run())
+
+    assert first.calls == [("add", 10, None)]
+    assert second.calls == [("remove", 10, None)]
+
+
+def test_changes_are_computed_from_the_current_member():
+    member = FakeMember(5, role_ids=[11])
+    guild = member.guild
+
+    async def run():
+        buffer = RoleMutationBuffer(window=60)
+        buffer.add(member, _role(10))
+        buffer.add(member, _role(12))
+        # Role 10 was given by someone else in the meantime
+        current = FakeMember(5, role_ids=[10, 11], guild=guild)
+        await buffer.flush()
+        return current
+
+    current = asyncio.run(run())
+
+    assert member.calls == []
+    assert current.calls == [("add", 12, None)]
+
+
+def test_members_who_left_are_skipped():
+    member = FakeMember(5)
+
+    async def run():
+        buffer = RoleMutationBuffer(window=60)
+        buffer.add(member, _role(10))
+        del member.guild.members[5]
+        await buffer.flush()
+        return buffer.stats()
+
+    stats = asyncio.run(run())
+
+    assert member.calls == []
+    assert (stats["left"], stats["saved"]) == (1, 1)
+
+
+def test_touched_since_covers_pending_and_recent_intents():
+    member = FakeMember(5)
+
+    async def run():
+        buffer = RoleMutationBuffer(window=60)
+        before = time.monotonic()
+        buffer.add(member, _role(10))
+        assert buffer.touched_since(1, 5, time.monotonic() + 1)  # still buffered
+        await buffer.flush()
+        after = time.monotonic()
+        return buffer, before, after
+
+    buffer, before, after = asyncio.run(run())
+
+    assert buffer.touched_since(1, 5, before)
+    assert not buffer.touched_since(1, 5, after)
+    assert not buffer.touched_since(1, 6, before)
+
+
+def test_recent_intents_are_bounded(monkeypatch):
+    monkeypatch.setattr(role_mutations, "RECENT_MAX", 3)
+
+    async def run():
+        buffer = RoleMutationBuffer(window=60)
+        for member_id in range(1, 6):
+            buffer.add(FakeMember(member_id), _role(10))
+        await buffer.flush()
+        return buffer
+
+    buffer = asyncio.run(run())
+
+    assert [buffer.touched_since(1, mid, 0) for mid in range(1, 6)] == [False, False, True, True, True]
@@ -0,0 +1,134 @@
+import sqlite3
+
+import pytest
+
+from sentinel.utils.storage_backends import (
+    AUTOCHANNELS_KEY,
+    DELETED,
+    Delta,
+    JsonFileBackend,
+    SqliteBackend,
+    migrate_documents,
+)
+
+
+@pytest.fixture
+def db(tmp_path):
+    backend = SqliteBackend(tmp_path / "sentinel.db")
+    yield backend
+    backend.close()
+
+
+def test_round_trip(db):
+    doc = {"name": "Äternum", "nested": {"ids": [1, 2]}}
+
+    db.write(2, doc)
+    db.write(1, {})
+
+    assert db.read(2) == doc
+    assert db.read(3) == {}
+    assert db.guild_ids() == [1, 2]
+
+
+def test_stamp_changes_with_every_write(db):
+    assert db.stamp(1) is None
+
+    db.write(1, {"a": 1})
+    first = db.stamp(1)
+    db.write(1, {"a": 1})
+
+    assert first is not None
+    assert db.stamp(1) != first
+
+
+def test_auto_channels_are_mirrored(db):
+    db.write(1, {AUTOCHANNELS_KEY: ["10", 11, "junk"]})
+    db.write(2, {AUTOCHANNELS_KEY: [20]})
+    db.write(2, {})
+
+    assert db.auto_channels() == {1: {10, 11}}
+
+
+def test_corrupted_document_reads_as_empty(db):
+    db.write(1, {"a": 1})
+    db._conn.execute("UPDATE guild_config SET doc = '{' WHERE guild_id = 1")
+
+    assert db.read(1) == {}
+
+
+def test_meta(db):
+    assert db.get_meta("key") is None
+
+    db.set_meta("key", "a")
+    db.set_meta("key", "b")
+
+    assert db.get_meta("key") == "b"
+
+
+def test_migrate_documents(tmp_path, db):
+    legacy = JsonFileBackend(tmp_path / "json")
+    legacy.write(1, {"a": 1})
+    legacy.write(2, {AUTOCHANNELS_KEY: [5]})
+
+    assert migrate_documents(legacy, db) == 2
+    assert db.read(1) == {"a": 1}
+    assert db.auto_channels() == {2: {5}}
+
+
+def test_data_survives_reopening(tmp_path):
+    path = tmp_path / "sentinel.db"
+    backend = SqliteBackend(path)
+    backend.write(1, {"a": 1})
+    backend.close()
+
+    reopened = SqliteBackend(path)
+    assert reopened.read(1) == {"a": 1}
+    reopened.close()
+
+
+def test_unused_reaction_role_table_is_dropped(tmp_path):
+    path = tmp_path / "sentinel.db"
+    conn = sqlite3.connect(path)
+    conn.execute("CREATE TABLE reaction_role_items (message_id INTEGER, emoji_key TEXT)")
+    conn.close()
+
+    SqliteBackend(path).close()
+
+    conn = sqlite3.connect(path)
+    tables = {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+    conn.close()
+    assert "reaction_role_items" not in tables
+    assert {"guild_config", "auto_voice_channels", "meta"} <= tables
+
+
+def test_apply_patches_only_the_changed_keys(db):
+    db.write(1, {"a": 1, "nested": {"x": 1, "y": 2}})
+
+    # The resulting document is only used when the guild has no row yet
+    db.apply(1, [Delta(("nested", "x"), [3]), Delta(("a",), DELETED)], {"ignored": True})
+
+    assert db.read(1) == {"nested": {"x": [3], "y": 2}}
+
+
+def test_apply_without_row_writes_the_document(db):
+    db.apply(1, [Delta(("a",), 1)], {"a": 1, "b": 2})
+
+    assert db.read(1) == {"a": 1, "b": 2}
+
+
+def test_apply_falls_back_to_a_full_write_for_quoted_keys(db):
+    db.write(1, {"a": 1})
+
+    db.apply(1, [Delta(('say "hi"',), 1)], {"a": 1, 'say "hi"': 1})
+
+    assert db.read(1) == {"a": 1, 'say "hi"': 1}
+
+
+def test_apply_bumps_the_stamp_and_syncs_the_mirror(db):
+    db.write(1, {AUTOCHANNELS_KEY: [1]})
+    stamp = db.stamp(1)
+
+    db.apply(1, [Delta((AUTOCHANNELS_KEY,), [1, 2])], {AUTOCHANNELS_KEY: [1, 2]})
+
+    assert db.stamp(1) != stamp
+    assert db.auto_channels() == {1: {1, 2}}
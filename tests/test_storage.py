@@ -0,0 +1,188 @@
+import asyncio
+import sqlite3
+
+import pytest
+
+import sentinel.utils.storage as storage
+from sentinel.utils.storage import _apply_mutation
+from sentinel.utils.storage_backends import DELETED, Delta, SqliteBackend
+
+
+def test_set_key_copies_only_the_changed_path():
+    shared = {"x": 1}
+    doc = {"a": {"b": 1}, "other": shared}
+
+    new, delta = _apply_mutation(doc, storage.set_key(("a", "b"), 2))
+
+    assert new == {"a": {"b": 2}, "other": {"x": 1}}
+    assert doc == {"a": {"b": 1}, "other": {"x": 1}}
+    assert new["other"] is shared
+    assert delta == Delta(("a", "b"), 2)
+
+
+def test_set_key_creating_parents_persists_the_new_subtree():
+    _, delta = _apply_mutation({}, storage.set_key(("a", "b", "c"), 1))
+
+    assert delta == Delta(("a",), {"b": {"c": 1}})
+
+
+def test_set_key_stores_a_copy():
+    value = {"ids": [1]}
+    new, _ = _apply_mutation({}, storage.set_key("a", value))
+
+    value["ids"].append(2)
+
+    assert new == {"a": {"ids": [1]}}
+
+
+def test_unchanged_values_produce_no_delta():
+    doc = {"a": 1, "ids": [1, 2]}
+
+    for m in (
+        storage.set_key("a", 1),
+        storage.delete_key("missing"),
+        storage.delete_key(("missing", "child")),
+        storage.add_to_set("ids", 2),
+        storage.remove_from_set("ids", 3),
+        storage.remove_from_set(("missing", "ids"), 1),
+    ):
+        new, delta = _apply_mutation(doc, m)
+        assert new is doc
+        assert delta is None
+
+
+def test_delete_key_records_a_deletion():
+    new, delta = _apply_mutation({"a": {"b": 1, "c": 2}}, storage.delete_key(("a", "b")))
+
+    assert new == {"a": {"c": 2}}
+    assert delta == Delta(("a", "b"), DELETED)
+
+
+def test_set_operations():
+    new, delta = _apply_mutation({}, storage.add_to_set("ids", 1))
+    assert new == {"ids": [1]}
+    assert delta == Delta(("ids",), [1])
+
+    new, _ = _apply_mutation(new, storage.add_to_set("ids", 2))
+    new, delta = _apply_mutation(new, storage.remove_from_set("ids", 1))
+    assert new == {"ids": [2]}
+    assert delta == Delta(("ids",), [2])
+
+
+def test_path_keys_are_strings():
+    assert storage.set_key(("panels", 5), 1).path == ("panels", "5")
+    with pytest.raises(ValueError):
+        storage.set_key((), 1)
+
+
+def test_transform_key():
+    doc = {"n": 1}
+
+    new, delta = _apply_mutation(doc, storage.transform_key("n", lambda n: n + 1))
+    assert (new, delta) == ({"n": 2}, Delta(("n",), 2))
+
+    _, delta = _apply_mutation(doc, storage.transform_key(("a", "b"), lambda v: [v]))
+    assert delta == Delta(("a",), {"b": [None]})
+
+    for fn in (lambda n: None, lambda n: n):
+        assert _apply_mutation(doc, storage.transform_key("n", fn)) == (doc, None)
+
+
+def test_update_guild_config_hands_deltas_to_the_backend(backend):
+    async def run():
+        await storage.update_guild_config(1, storage.set_key("a", 1), flush=True)
+        await storage.update_guild_config(1, storage.set_key("b", 2), storage.add_to_set("ids", 3), flush=True)
+        return await storage.update_guild_config(1, storage.set_key("a", 1))
+
+    assert asyncio.run(run()) is False
+    assert backend.read(1) == {"a": 1, "b": 2, "ids": [3]}
+    assert backend.applied[-1] == (1, [Delta(("b",), 2), Delta(("ids",), [3])])
+
+
+def test_coalesced_updates_are_written_once(backend):
+    async def run():
+        for i in range(5):
+            await storage.update_guild_config(2, storage.add_to_set("ids", i))
+        await storage.flush_pending()
+
+    asyncio.run(run())
+
+    assert backend.read(2) == {"ids": [0, 1, 2, 3, 4]}
+    assert len(backend.applied) == 1
+    assert len(backend.applied[0][1]) == 5
+
+
+def test_get_guild_config_value(backend):
+    asyncio.run(storage.update_guild_config(8, storage.set_key("ids", [1]), storage.set_key("cfg", {"a": [2]})))
+
+    assert storage.get_guild_config_value(8, "ids") == (1,)
+    assert storage.get_guild_config_value(8, "cfg")["a"] == (2,)
+    assert storage.get_guild_config_value(8, "missing", ()) == ()
+    with pytest.raises(TypeError):
+        storage.get_guild_config_value(8, "cfg")["b"] = 1
+
+    view = storage.get_guild_config_view(8)
+    assert storage.get_guild_config_value(8, "cfg") is view["cfg"]
+
+
+def test_flush_now_writes_without_cancelling_scheduled_flushes(backend):
+    async def run():
+        await storage.update_guild_config(6, storage.set_key("a", 1))
+        scheduled = storage._flush_tasks[6]
+        await storage.flush_now()
+        assert backend.read(6) == {"a": 1}
+        assert not scheduled.cancelled()
+        await scheduled
+        return len(backend.applied)
+
+    assert asyncio.run(run()) == 1
+
+
+def test_concurrent_updates_do_not_lose_each_other(backend):
+    async def run():
+        await asyncio.gather(*(storage.update_guild_config(3, storage.add_to_set("ids", i)) for i in range(20)))
+        await storage.flush_pending()
+
+    asyncio.run(run())
+
+    assert sorted(backend.read(3)["ids"]) == list(range(20))
+    assert sorted(storage.load_guild_config(3)["ids"]) == list(range(20))
+
+
+def test_loaded_configs_are_private_copies(backend):
+    asyncio.run(storage.update_guild_config(4, storage.set_key("ids", [1]), flush=True))
+
+    storage.load_guild_config(4)["ids"].append(2)
+
+    assert storage.load_guild_config(4) == {"ids": [1]}
+    assert storage.get_guild_config_view(4)["ids"] == (1,)
+
+
+def test_transforms_see_the_latest_value(backend):
+    async def run():
+        increment = storage.transform_key("count", lambda n: (n or 0) + 1)
+        await asyncio.gather(*(storage.update_guild_config(5, increment) for _ in range(20)))
+
+    asyncio.run(run())
+
+    assert storage.get_guild_config_view(5)["count"] == 20
+
+
+def test_close_backend_closes_the_connection(backend, tmp_path):
+    db = SqliteBackend(tmp_path / "sentinel.db")
+    storage.set_backend(db)
+
+    async def run():
+        await storage.update_guild_config(7, storage.set_key("a", 1))
+        await storage.flush_pending()
+        await storage.close_backend()
+
+    asyncio.run(run())
+
+    assert storage._backend is None
+    with pytest.raises(sqlite3.ProgrammingError):
+        db.read(7)
+    reopened = SqliteBackend(tmp_path / "sentinel.db")
+    assert reopened.read(7) == {"a": 1}
+    reopened.close()
+    storage.set_backend(backend)
@@ -0,0 +1,86 @@
+import json
+
+import pytest
+
+from sentinel import cli
+from sentinel.utils.storage_backends import JsonFileBackend, convert_documents
+from sentinel.utils.storage_codecs import CodecError, FastJsonCodec, JsonCodec, decode, get_codec
+
+DOC = {"name": "Äternum", "ids": [1, 2], "nested": {"on": True, "none": None}}
+
+
+def test_json_codec_keeps_the_historic_format():
+    assert JsonCodec().encode(DOC) == json.dumps(DOC, ensure_ascii=False, indent=2).encode("utf-8")
+
+
+def test_fast_json_codec_stringifies_keys_like_the_stdlib():
+    raw = FastJsonCodec().encode({1: "a", "b": [1]})
+
+    assert decode(raw) == {"1": "a", "b": [1]}
+
+
+@pytest.mark.parametrize("name", ["json", "orjson", "msgpack"])
+def test_decode_detects_the_format(name):
+    if name == "msgpack":
+        pytest.importorskip("msgpack")
+    codec = get_codec(name)
+
+    assert decode(codec.encode(DOC)) == DOC
+
+
+def test_decode_skips_bom_and_whitespace():
+    assert decode(b"\xef\xbb\xbf \n" + JsonCodec().encode(DOC)) == DOC
+    assert decode(b"") == {}
+    assert decode(b" \n") == {}
+
+
+@pytest.mark.parametrize("raw", [b"{not json", b"[1, 2]", b"\x92\x01\x02"])
+def test_decode_rejects_garbage_and_non_objects(raw):
+    with pytest.raises(CodecError):
+        decode(raw)
+
+
+def test_get_codec():
+    assert get_codec(None).name == "json"
+    assert get_codec("ORJSON").name == "orjson"
+    with pytest.raises(CodecError):
+        get_codec("yaml")
+
+
+def test_file_backend_reads_files_written_with_another_codec(tmp_path):
+    pytest.importorskip("msgpack")
+    JsonFileBackend(tmp_path).write(1, DOC)
+
+    backend = JsonFileBackend(tmp_path, get_codec("msgpack"))
+    assert backend.read(1) == DOC
+
+    # Writing in the new format removes the old file so it can't shadow newer data
+    backend.write(1, {"a": 1})
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["guild_1.msgpack"]
+    assert JsonFileBackend(tmp_path).read(1) == {"a": 1}
+
+
+def test_convert_documents_skips_unreadable_files(tmp_path):
+    backend = JsonFileBackend(tmp_path)
+    backend.write(1, DOC)
+    backend.write(2, {"a": 1})
+    (tmp_path / "guild_3.json").write_text("{broken")
+
+    assert convert_documents(tmp_path, get_codec("orjson")) == 2
+
+    assert JsonFileBackend(tmp_path).read(1) == DOC
+    assert (tmp_path / "guild_1.json").read_bytes() == FastJsonCodec().encode(DOC)
+    assert (tmp_path / "guild_3.json").read_text() == "{broken"
+
+
+def test_convert_configs_command(tmp_path):
+    JsonFileBackend(tmp_path).write(1, DOC)
+
+    with pytest.raises(SystemExit) as exit_info:
+        cli.main(["convert-configs", "--codec", "orjson", "--data-dir", str(tmp_path)])
+    assert exit_info.value.code == 0
+    assert (tmp_path / "guild_1.json").read_bytes() == FastJsonCodec().encode(DOC)
+
+    with pytest.raises(SystemExit) as exit_info:
+        cli.main(["convert-configs", "--codec", "yaml", "--data-dir", str(tmp_path)])
+    assert exit_info.value.code == 1
@@ -0,0 +1,124 @@
+import asyncio
+
+from sentinel.utils.timers import DeadlineScheduler
+
+
+def _recorder():
+    fired = []
+    return fired, lambda key, payload: fired.append((key, payload))
+
+
+def test_deadlines_fire_in_order():
+    fired, callback = _recorder()
+
+    async def run():
+        timers = DeadlineScheduler(callback)
+        timers.schedule("late", 0.03, 3)
+        timers.schedule("early", 0.01, 1)
+        timers.schedule("middle", 0.02, 2)
+        assert len(timers) == 3
+        await asyncio.sleep(0.06)
+        timers.close()
+        return timers
+
+    timers = asyncio.run(run())
+
+    assert fired == [("early", 1), ("middle", 2), ("late", 3)]
+    assert (timers.fired, len(timers)) == (3, 0)
+
+
+def test_cancel_and_reschedule():
+    fired, callback = _recorder()
+
+    async def run():
+        timers = DeadlineScheduler(callback)
+        timers.schedule("gone", 0.01)
+        timers.schedule("moved", 0.01, "old")
+        assert timers.cancel("gone")
+        assert not timers.cancel("gone")
+        timers.schedule("moved", 0.03, "new")
+        await asyncio.sleep(0.02)
+        assert fired == []
+        assert "moved" in timers and "gone" not in timers
+        await asyncio.sleep(0.03)
+        timers.close()
+        return timers
+
+    timers = asyncio.run(run())
+
+    assert fired == [("moved", "new")]
+    assert (timers.fired, timers.cancelled) == (1, 1)
+
+
+def test_coroutine_callbacks_are_scheduled():
+    done = []
+
+    async def callback(key, payload):
+        done.append(key)
+
+    async def run():
+        timers = DeadlineScheduler(callback)
+        timers.schedule(1, 0)
+        await asyncio.sleep(0.01)
+        timers.close()
+
+    asyncio.run(run())
+
+    assert done == [1]
+
+
+def test_failing_callback_does_not_stop_the_scheduler(caplog):
+    fired = []
+
+    def callback(key, payload):
+        if key == "bad":
+            raise RuntimeError("boom")
+        fired.append(key)
+
+    async def run():
+        timers = DeadlineScheduler(callback)
+        timers.schedule("bad", 0)
+        timers.schedule("good", 0.01)
+        await asyncio.sleep(0.03)
+        timers.close()
+
+    asyncio.run(run())
+
+    assert fired == ["good"]
+    assert "Deadline callback for 'bad' failed" in caplog.text
+
+
+def test_coroutine_callbacks_are_referenced_and_their_errors_logged(caplog):
+    gate = asyncio.Event()
+
+    async def callback(key, payload):
+        await gate.wait()
+        raise RuntimeError("boom")
+
+    async def run():
+        timers = DeadlineScheduler(callback)
+        timers.schedule("slow", 0)
+        await asyncio.sleep(0.01)
+        assert len(timers._tasks) == 1
+        gate.set()
+        await asyncio.sleep(0.01)
+        timers.close()
+        return timers
+
+    timers = asyncio.run(run())
+
+    assert not timers._tasks
+    assert "Deadline callback for 'slow' failed" in caplog.text
+    assert "boom" in caplog.text
+
+
+def test_rescheduling_compacts_the_heap():
+    async def run():
+        timers = DeadlineScheduler(lambda key, payload: None)
+        for _ in range(500):
+            timers.schedule("channel", 60)
+        heap = len(timers._heap)
+        timers.close()
+        return heap
+
+    assert asyncio.run(run()) < 100
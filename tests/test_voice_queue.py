@@ -0,0 +1,130 @@
+import asyncio
+from types import SimpleNamespace
+
+import discord
+import pytest
+
+from sentinel.utils import voice_queue
+from sentinel.utils.voice_queue import VoiceOpQueue
+
+
+def _rate_limited(retry_after=0.01):
+    exc = discord.HTTPException(SimpleNamespace(status=429, reason="Too Many Requests"), "rate limited")
+    exc.retry_after = retry_after
+    return exc
+
+
+def _op(log, name, result=None):
+    async def run():
+        log.append(name)
+        return result
+
+    return run
+
+
+def test_operations_run_by_priority_then_fifo():
+    async def run():
+        queue = VoiceOpQueue()
+        log = []
+        futures = [
+            queue.submit(1, voice_queue.REFILL, _op(log, "refill")),
+            queue.submit(1, voice_queue.DELETE, _op(log, "delete")),
+            queue.submit(1, voice_queue.CREATE, _op(log, "create-1")),
+            queue.submit(1, voice_queue.MOVE, _op(log, "move")),
+            queue.submit(1, voice_queue.EDIT, _op(log, "edit")),
+            queue.submit(1, voice_queue.CREATE, _op(log, "create-2")),
+        ]
+        assert queue.depth(1) == 6
+        await asyncio.gather(*futures)
+        return log, queue.depth(1)
+
+    log, depth = asyncio.run(run())
+
+    assert log == ["move", "create-1", "edit", "create-2", "delete", "refill"]
+    assert depth == 0
+
+
+def test_same_key_is_coalesced_and_newest_callable_wins():
+    async def run():
+        queue = VoiceOpQueue()
+        log = []
+        first = queue.submit(1, voice_queue.MOVE, _op(log, "old", 1), key=("move", 5))
+        second = queue.submit(1, voice_queue.MOVE, _op(log, "new", 2), key=("move", 5))
+        assert first is second
+        result = await first
+        # Once executed the key is free again
+        third = queue.submit(1, voice_queue.MOVE, _op(log, "later", 3), key=("move", 5))
+        assert third is not first
+        return log, result, await third, queue.stats()
+
+    log, result, later, stats = asyncio.run(run())
+
+    assert (log, result, later) == (["new", "later"], 2, 3)
+    assert stats["coalesced"] == 1
+    assert stats["submitted"] == 2
+
+
+def test_steal_takes_a_pending_operation_out():
+    async def run():
+        queue = VoiceOpQueue()
+        log = []
+        deletes = [
+            queue.submit(1, voice_queue.DELETE, _op(log, f"delete-{cid}"), key=("delete", cid), category_id=cid, payload=cid)
+            for cid in (10, 20)
+        ]
+        stolen = queue.steal(1, voice_queue.DELETE, lambda op: op.category_id == 20)
+        assert queue.steal(1, voice_queue.DELETE, lambda op: op.category_id == 30) is None
+        results = await asyncio.gather(*deletes)
+        return stolen, results, log, queue.stats()
+
+    stolen, results, log, stats = asyncio.run(run())
+
+    assert stolen.payload == 20
+    assert results == [None, None]
+    assert log == ["delete-10"]
+    assert stats["merged"] == 1
+
+
+def test_rate_limit_pauses_the_queue_and_retries():
+    async def run():
+        queue = VoiceOpQueue()
+        log = []
+        attempts = 0
+
+        async def flaky():
+            nonlocal attempts
+            attempts += 1
+            if attempts == 1:
+                raise _rate_limited()
+            log.append("create")
+            return "channel"
+
+        created = queue.submit(1, voice_queue.CREATE, flaky)
+        deleted = queue.submit(1, voice_queue.DELETE, _op(log, "delete"))
+        return await created, await deleted, log, queue.stats()
+
+    created, deleted, log, stats = asyncio.run(run())
+
+    assert created == "channel"
+    assert log == ["create", "delete"]
+    assert stats["rate_limited"] == 1
+
+
+def test_operation_fails_after_max_retries():
+    async def run():
+        queue = VoiceOpQueue(max_retries=2)
+        calls = 0
+
+        async def always_limited():
+            nonlocal calls
+            calls += 1
+            raise _rate_limited(0.001)
+
+        with pytest.raises(discord.HTTPException):
+            await queue.submit(1, voice_queue.EDIT, always_limited)
+        return calls, queue.stats()
+
+    calls, stats = asyncio.run(run())
+
+    assert calls == 3
+    assert (stats["rate_limited"], stats["failed"]) == (2, 1)